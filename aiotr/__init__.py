@@ -4,13 +4,54 @@ Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
 
 # spec see https://github.com/transmission/transmission/blob/master/extras/rpc-spec.txt
 # config https://github.com/transmission/transmission/wiki/Editing-Configuration-Files
-from aiotr.client import TransmissionClient
+import importlib
+from typing import TYPE_CHECKING
+
 from aiotr.exception import (
     BaseTransmissionException,
+    TransmissionCircuitOpenException,
     TransmissionConnectException,
     TransmissionException,
     TransmissionMisdirectedException,
+    TransmissionTimeoutException,
     TransmissionUnauthorizedException,
 )
 
+if TYPE_CHECKING:
+    from aiotr.capabilities import Capabilities
+    from aiotr.client import TransmissionBatch, TransmissionClient
+
 __version__ = "0.1.2"
+
+# imported on first access, keeping ``import aiotr`` cheap
+_LAZY = {
+    "Capabilities": "aiotr.capabilities",
+    "TransmissionBatch": "aiotr.client",
+    "TransmissionClient": "aiotr.client",
+}
+
+__all__ = [
+    "BaseTransmissionException",
+    "Capabilities",
+    "TransmissionBatch",
+    "TransmissionCircuitOpenException",
+    "TransmissionClient",
+    "TransmissionConnectException",
+    "TransmissionException",
+    "TransmissionMisdirectedException",
+    "TransmissionTimeoutException",
+    "TransmissionUnauthorizedException",
+]
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
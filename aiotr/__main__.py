@@ -0,0 +1,9 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import sys
+
+from aiotr.cli import main
+
+sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Choose the download dir of new torrents without asking the daemon each time.
+Free space of every tracked (daemon, path) is cached and refreshed in the
+background, together with the bytes still to be written by the torrents
+already in each path (their "leftUntilDone"). Adds made through the allocator
+reserve their size until the next refresh sees them, so concurrent adds never
+promise the same bytes twice::
+
+    allocator = Allocator(interval=60)
+    allocator.track(client, ["/mnt/a", "/mnt/b", "/mnt/c"])
+    async with allocator:
+        await allocator.add(client, metainfo=b64, paused=False)
+"""
+
+import asyncio
+import base64
+import logging
+import posixpath
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiotr.exception import TransmissionException
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(path: str) -> str:
+    return posixpath.normpath(path) if path else path
+
+
+class Space:
+    """
+    Cached figures of one tracked directory
+    """
+
+    __slots__ = ("free", "inflight", "pending", "refreshed")
+
+    def __init__(self):
+        self.free: Optional[int] = None  # free-space "size-bytes", None until fetched
+        self.inflight = 0  # "leftUntilDone" of the daemon's torrents in this dir
+        self.pending = 0  # reserved by adds the daemon did not report yet
+        self.refreshed = 0.0  # time.monotonic() of the last refresh
+
+    @property
+    def available(self) -> int:
+        if self.free is None:
+            return -1
+        return self.free - self.inflight - self.pending
+
+
+class Reservation:
+    __slots__ = ("daemon", "path", "size", "done")
+
+    def __init__(self, daemon: str, path: str, size: int):
+        self.daemon = daemon
+        self.path = path
+        self.size = size
+        self.done: Optional[float] = None  # time.monotonic() when the add returned
+
+    def __repr__(self) -> str:
+        return "<Reservation {}:{} {} bytes>".format(self.daemon, self.path, self.size)
+
+
+class Allocator:
+    """
+    :param interval: seconds between background refreshes of each daemon
+    :param headroom: bytes to keep free in every directory
+    """
+
+    def __init__(self, interval: float = 60.0, headroom: int = 0):
+        self.interval = interval
+        self.headroom = headroom
+        self.clients: Dict[str, object] = {}  # daemon -> client
+        self.paths: Dict[str, List[str]] = {}  # daemon -> tracked dirs
+        self.spaces: Dict[Tuple[str, str], Space] = {}
+        self.reservations: Dict[Tuple[str, str], List[Reservation]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def track(self, client, paths: Sequence[str]) -> None:
+        daemon = client.daemon
+        self.clients[daemon] = client
+        tracked = self.paths.setdefault(daemon, [])
+        for path in map(_normalize, paths):
+            if (daemon, path) not in self.spaces:
+                tracked.append(path)
+                self.spaces[(daemon, path)] = Space()
+                self.reservations[(daemon, path)] = []
+
+    def owner(self, daemon: str, directory: str) -> Optional[str]:
+        """
+        The tracked path holding ``directory``, the deepest one when they nest
+        """
+        path = _normalize(directory)
+        while True:
+            if (daemon, path) in self.spaces:
+                return path
+            parent = posixpath.dirname(path)
+            if parent == path or not parent:
+                return None
+            path = parent
+
+    async def refresh(self, client) -> None:
+        """
+        Fetch free space of every tracked dir of ``client``'s daemon and the bytes
+        its torrents still need, in one batch
+        """
+        daemon = client.daemon
+        paths = self.paths.get(daemon, [])
+        if not paths:
+            return
+        started = time.monotonic()
+        async with client.batch() as batch:
+            torrents = await batch.torrent_get(["downloadDir", "leftUntilDone"])
+            free = [await batch.free_space(path) for path in paths]
+        inflight = dict.fromkeys(paths, 0)
+        for torrent in torrents.result().get("torrents") or ():
+            path = self.owner(daemon, torrent["downloadDir"])
+            if path is not None:
+                inflight[path] += torrent["leftUntilDone"]
+        now = time.monotonic()
+        for path, future in zip(paths, free):
+            key = (daemon, path)
+            space = self.spaces[key]
+            space.free = future.result()["size-bytes"]
+            space.inflight = inflight[path]
+            space.refreshed = now
+            # adds answered before the torrent-get was sent are part of "inflight" now
+            kept = []
+            for reservation in self.reservations[key]:
+                if reservation.done is not None and reservation.done < started:
+                    space.pending -= reservation.size
+                else:
+                    kept.append(reservation)
+            self.reservations[key] = kept
+
+    async def refresh_all(self) -> None:
+        results = await asyncio.gather(
+            *(self.refresh(client) for client in self.clients.values()),
+            return_exceptions=True,
+        )
+        for daemon, result in zip(self.clients, results):
+            if isinstance(result, Exception):
+                logger.warning("free space refresh of %s failed: %s", daemon, result)
+
+    def available(self, client, path: str) -> int:
+        """
+        Bytes which may still be promised in ``path``, -1 before the first refresh
+        """
+        return self.spaces[(client.daemon, _normalize(path))].available - self.headroom
+
+    def choose(self, client, size: int = 0) -> str:
+        """
+        The tracked dir of ``client``'s daemon with the most space left, no rpc
+
+        :raise TransmissionException: no known dir has ``size`` bytes left
+        """
+        daemon = client.daemon
+        best = None
+        most = -1
+        for path in self.paths.get(daemon, ()):
+            available = self.spaces[(daemon, path)].available
+            if available > most:
+                best, most = path, available
+        if best is None or most - self.headroom < size:
+            raise TransmissionException(
+                "no directory of {} has {} bytes free".format(daemon, size)
+            )
+        return best
+
+    def reserve(self, client, size: int, path: Optional[str] = None) -> Reservation:
+        """
+        Promise ``size`` bytes of ``path`` (the best dir by default) to a new torrent
+        """
+        path = self.choose(client, size) if path is None else _normalize(path)
+        key = (client.daemon, path)
+        reservation = Reservation(client.daemon, path, size)
+        self.spaces[key].pending += size
+        self.reservations[key].append(reservation)
+        return reservation
+
+    def release(self, reservation: Reservation) -> None:
+        key = (reservation.daemon, reservation.path)
+        reservations = self.reservations[key]
+        if reservation in reservations:
+            reservations.remove(reservation)
+            self.spaces[key].pending -= reservation.size
+
+    async def add(self, client, size: Optional[int] = None, **arguments) -> dict:
+        """
+        ``torrent_add`` into the dir chosen for ``size`` bytes
+
+        :param size: bytes the torrent needs, read from ``metainfo`` when omitted
+        :param arguments: passed to ``torrent_add``, except "download_dir"
+        """
+        if size is None:
+            metainfo = arguments.get("metainfo")
+            if metainfo is None:
+                raise ValueError("size is required to add by filename or magnet")
+            from aiotr.locate import Metainfo
+
+            size = Metainfo.parse(base64.b64decode(metainfo)).total_size
+        reservation = self.reserve(client, size)
+        try:
+            result = await client.torrent_add(
+                download_dir=reservation.path, **arguments
+            )
+        except BaseException:
+            self.release(reservation)
+            raise
+        if "torrent-added" in result:
+            reservation.done = time.monotonic()
+        else:
+            self.release(reservation)  # duplicate, nothing new to write
+        return result
+
+    async def _refresher(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.refresh_all()
+
+    async def start(self) -> None:
+        await self.refresh_all()
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresher())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,140 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+from typing import Dict, Optional
+
+from aiotr.exception import TransmissionException
+from aiotr.utils import JSONRPC_RPC_VERSION
+
+# session-get fields read by the handshake
+HANDSHAKE_FIELDS = ["rpc-version", "rpc-version-minimum", "version"]
+
+# rpc-version which introduced each method, see the changelog of rpc-spec.txt
+METHOD_SINCE: Dict[str, int] = {
+    "torrent-start-now": 14,
+    "torrent-rename-path": 15,
+    "free-space": 15,
+    "group-get": 17,
+    "group-set": 17,
+}
+
+# rpc-version which introduced each argument (or requested field), per method
+ARGUMENT_SINCE: Dict[str, Dict[str, int]] = {
+    "torrent-get": {
+        "editDate": 16,
+        "labels": 16,
+        "file-count": 17,
+        "group": 17,
+        "percentComplete": 17,
+        "primary-mime-type": 17,
+        "trackerList": 17,
+        "sequentialDownload": 18,
+    },
+    "torrent-set": {
+        "labels": 16,
+        "group": 17,
+        "trackerList": 17,
+        "sequentialDownload": 18,
+    },
+    "torrent-add": {
+        "labels": 17,
+    },
+    "session-get": {
+        "default-trackers": 17,
+        "rpc-version-semver": 17,
+        "script-torrent-added-enabled": 17,
+        "script-torrent-added-filename": 17,
+        "script-torrent-done-seeding-enabled": 17,
+        "script-torrent-done-seeding-filename": 17,
+    },
+    "session-set": {
+        "default-trackers": 17,
+        "script-torrent-added-enabled": 17,
+        "script-torrent-added-filename": 17,
+        "script-torrent-done-seeding-enabled": 17,
+        "script-torrent-done-seeding-filename": 17,
+    },
+    "port-test": {
+        "ipProtocol": 18,
+    },
+}
+
+# torrent-get "format": "table" was added in rpc-version 16
+TABLE_FORMAT_RPC_VERSION = 16
+
+
+class Capabilities:
+    """
+    What a daemon understands, derived from its rpc-version
+    """
+
+    def __init__(
+        self,
+        rpc_version: int = 0,
+        rpc_version_minimum: int = 0,
+        version: Optional[str] = None,
+    ):
+        self.rpc_version = rpc_version
+        self.rpc_version_minimum = rpc_version_minimum
+        self.version = version
+
+    @classmethod
+    def from_session(cls, data: Optional[dict]) -> "Capabilities":
+        data = data or {}
+        return cls(
+            data.get("rpc-version", 0),
+            data.get("rpc-version-minimum", 0),
+            data.get("version"),
+        )
+
+    @property
+    def table_format(self) -> bool:
+        return self.rpc_version >= TABLE_FORMAT_RPC_VERSION
+
+    @property
+    def jsonrpc(self) -> bool:
+        return self.rpc_version >= JSONRPC_RPC_VERSION
+
+    def supports(self, method: str, argument: Optional[str] = None) -> bool:
+        if self.rpc_version < METHOD_SINCE.get(method, 0):
+            return False
+        if argument is None:
+            return True
+        return self.rpc_version >= ARGUMENT_SINCE.get(method, {}).get(argument, 0)
+
+    def adapt(self, method: str, arguments: dict) -> dict:
+        """
+        Drop the arguments and requested fields the daemon does not know about
+
+        :param method: rpc method name
+        :param arguments: request arguments
+        :return: arguments safe to send
+        """
+        if not self.supports(method):
+            raise TransmissionException(
+                "{} requires rpc-version {}, daemon has {}".format(
+                    method, METHOD_SINCE[method], self.rpc_version
+                )
+            )
+        since = ARGUMENT_SINCE.get(method)
+        if since is None:
+            return arguments
+        rpc_version = self.rpc_version
+        adapted = {k: v for k, v in arguments.items() if rpc_version >= since.get(k, 0)}
+        fields = adapted.get("fields")
+        if fields:
+            adapted["fields"] = [f for f in fields if rpc_version >= since.get(f, 0)]
+        return adapted
+
+    def __repr__(self):
+        return (
+            "Capabilities(rpc_version={}, rpc_version_minimum={}, version={!r})".format(
+                self.rpc_version, self.rpc_version_minimum, self.version
+            )
+        )
+
+
+# profiles shared by every client talking to the same daemon, keyed by
+# ``client.daemon``: the url without credentials, or the unix socket path
+PROFILES: Dict[str, Capabilities] = {}
@@ -0,0 +1,702 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+The ``aiotr`` command, also run as ``python -m aiotr``::
+
+    aiotr list
+    aiotr filter status=seeding "ratio>2" --ids | xargs aiotr stop
+    aiotr --url http://a:9091/transmission/rpc --url http://b:9091/transmission/rpc top
+    aiotr remove --delete 7f3c2b... "label=old"
+
+The last torrent list of every daemon is cached under ``$XDG_CACHE_HOME/aiotr``
+(``~/.cache/aiotr``). ``list`` and ``filter`` print it straight away without
+importing asyncio or aiohttp, and leave a detached ``aiotr refresh`` updating
+it when it is older than ``--max-age``. Commands that change torrents read the
+daemons themselves, all of them concurrently.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from aiotr.utils import DEFAULT_HOST
+
+FIELDS = [
+    "id",
+    "hashString",
+    "name",
+    "status",
+    "percentDone",
+    "rateDownload",
+    "rateUpload",
+    "uploadRatio",
+    "totalSize",
+    "labels",
+    "downloadDir",
+    "error",
+    "errorString",
+]
+
+# as aiotr.exporter.STATUS, which imports asyncio
+STATUS = (
+    "stopped",
+    "check_pending",
+    "checking",
+    "download_pending",
+    "downloading",
+    "seed_pending",
+    "seeding",
+)
+
+# fields holding lists, matched by membership
+LIST_FIELDS = ("labels",)
+# fields compared as numbers, "1.5G" and "50%" allowed
+NUMERIC_FIELDS = (
+    "id",
+    "percentDone",
+    "rateDownload",
+    "rateUpload",
+    "uploadRatio",
+    "totalSize",
+    "error",
+)
+
+# filter keys besides the torrent-get field names
+ALIASES = {
+    "hash": "hashString",
+    "done": "percentDone",
+    "down": "rateDownload",
+    "up": "rateUpload",
+    "ratio": "uploadRatio",
+    "size": "totalSize",
+    "label": "labels",
+    "dir": "downloadDir",
+}
+
+UNITS = "KMGTP"
+
+TERM = re.compile(r"^(\w+)(!=|>=|<=|=|<|>|~)(.*)$")
+HASH = re.compile(r"^[0-9a-fA-F]{40}$")
+
+
+def number(text: str) -> float:
+    """
+    "1.5G" -> 1610612736.0, "50%" -> 0.5
+    """
+    text = text.strip()
+    if text.endswith("%"):
+        return float(text[:-1]) / 100
+    suffix = text[-1:].upper()
+    if suffix in UNITS:
+        return float(text[:-1]) * 1024 ** (UNITS.index(suffix) + 1)
+    return float(text)
+
+
+def human(value: float) -> str:
+    if abs(value) < 1024:
+        return "{:.0f}".format(value)
+    for unit in UNITS:
+        value /= 1024
+        if abs(value) < 1024 or unit == UNITS[-1]:
+            break
+    return "{:.1f}{}".format(value, unit)
+
+
+class Term(NamedTuple):
+    """
+    One condition of ``filter``, e.g. "status=seeding", "ratio>2", "name~linux*"
+    """
+
+    key: str
+    op: str
+    value: str
+
+    @classmethod
+    def parse(cls, text: str) -> "Term":
+        match = TERM.match(text)
+        if match is None:
+            raise ValueError("not a filter term: {!r}".format(text))
+        key, op, value = match.groups()
+        field = ALIASES.get(key, key)
+        if field not in FIELDS:
+            raise ValueError(
+                "unknown filter key {!r}, one of {}".format(
+                    key, ", ".join(sorted(set(FIELDS) | set(ALIASES)))
+                )
+            )
+        if field in LIST_FIELDS and op not in ("=", "!=", "~"):
+            raise ValueError("{} is a list, use =, != or ~".format(key))
+        if field in NUMERIC_FIELDS:
+            if op == "~":
+                raise ValueError("{} is a number, ~ does not apply".format(key))
+            try:
+                number(value)
+            except ValueError:
+                raise ValueError(
+                    "{} needs a number, not {!r}".format(key, value)
+                ) from None
+        if field == "status" and not value.isdigit() and value not in STATUS:
+            raise ValueError(
+                "unknown status {!r}, one of {}".format(value, ", ".join(STATUS))
+            )
+        return cls(field, op, value)
+
+    def __call__(self, row: dict) -> bool:
+        if row.get(self.key) is None:
+            return False  # e.g. labels from a daemon older than rpc-version 16
+        actual = row[self.key]
+        op = self.op
+        if self.key == "status":
+            wanted: Any = (
+                int(self.value) if self.value.isdigit() else STATUS.index(self.value)
+            )
+        elif self.key in NUMERIC_FIELDS:
+            wanted = number(self.value)
+        elif self.key in LIST_FIELDS:
+            if op == "~":
+                return any(self._like(item) for item in actual)
+            return (self.value in actual) == (op == "=")
+        else:
+            actual = str(actual)
+            wanted = self.value
+            if op == "~":
+                return self._like(actual)
+        if op == "=":
+            return actual == wanted
+        if op == "!=":
+            return actual != wanted
+        if op == "<":
+            return actual < wanted
+        if op == ">":
+            return actual > wanted
+        if op == "<=":
+            return actual <= wanted
+        if op == ">=":
+            return actual >= wanted
+        return False
+
+    def _like(self, text: str) -> bool:
+        """
+        Case-insensitive glob, or substring without wildcards
+        """
+        if any(c in self.value for c in "*?["):
+            from fnmatch import fnmatch
+
+            return fnmatch(text.lower(), self.value.lower())
+        return self.value.lower() in text.lower()
+
+
+def cache_dir() -> str:
+    if os.environ.get("AIOTR_CACHE_DIR"):
+        return os.environ["AIOTR_CACHE_DIR"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "aiotr")
+
+
+def daemon_of(url: str) -> str:
+    """
+    ``url`` without credentials, the key of its cache
+    """
+    parts = urlsplit(url)
+    return urlunsplit(parts._replace(netloc=parts.netloc.rpartition("@")[2]))
+
+
+class Cache:
+    """
+    The last torrent list of one daemon, one json file rewritten atomically
+    """
+
+    def __init__(self, directory: str, url: str):
+        self.daemon = daemon_of(url)
+        name = hashlib.sha1(self.daemon.encode()).hexdigest()[:16]
+        self.path = os.path.join(directory, name + ".json")
+        self.lock = self.path + ".lock"
+
+    def load(self) -> Optional[dict]:
+        """
+        {"daemon", "fetched", "torrents"}, or None when missing or unreadable
+        """
+        try:
+            with open(self.path, "rb") as f:
+                data = json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("daemon") != self.daemon:
+            return None
+        return data
+
+    def save(self, torrents: List[dict]) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {"daemon": self.daemon, "fetched": time.time(), "torrents": torrents}
+        temp = "{}.{}.tmp".format(self.path, os.getpid())
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(temp, self.path)
+
+    def claim(self, ttl: float = 60.0) -> bool:
+        """
+        Take the refresh lock, so that one background refresh runs at a time.
+        Locks older than ``ttl`` are left by a dead refresh and are taken over.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        for _ in range(2):
+            try:
+                os.close(os.open(self.lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.lock) < ttl:
+                        return False
+                    os.unlink(self.lock)
+                except FileNotFoundError:
+                    pass
+        return False
+
+    def release(self) -> None:
+        try:
+            os.unlink(self.lock)
+        except FileNotFoundError:
+            pass
+
+
+# output
+def label(daemon: str) -> str:
+    return urlsplit(daemon).netloc or daemon
+
+
+def render(
+    rows: Sequence[Tuple[str, dict]], fleet: bool, width: Optional[int] = None
+) -> List[str]:
+    """
+    Table lines of (daemon, torrent) rows, names cut to ``width`` columns
+    """
+    header = "{:>5} {:>5} {:>7} {:>7} {:>6} {:<16} {:>7}  {}".format(
+        "ID", "DONE", "DOWN", "UP", "RATIO", "STATUS", "SIZE", "NAME"
+    )
+    if fleet:
+        header = "{:<21} ".format("DAEMON") + header
+    lines = [header]
+    for daemon, t in rows:
+        status = t.get("status", 0)
+        ratio = t.get("uploadRatio", -1)
+        line = "{:>5} {:>4.0f}% {:>7} {:>7} {:>6} {:<16} {:>7}  {}".format(
+            t.get("id", ""),
+            t.get("percentDone", 0) * 100,
+            human(t.get("rateDownload", 0)),
+            human(t.get("rateUpload", 0)),
+            "{:.2f}".format(ratio) if ratio >= 0 else "-",
+            STATUS[status] if 0 <= status < len(STATUS) else status,
+            human(t.get("totalSize", 0)),
+            t.get("name", ""),
+        )
+        if t.get("error"):
+            line += "  ! " + t.get("errorString", "")
+        if fleet:
+            line = "{:<21} ".format(label(daemon)[:21]) + line
+        lines.append(line)
+    if width:
+        lines = [line[:width] for line in lines]
+    return lines
+
+
+def terminal_size() -> Optional[os.terminal_size]:
+    if not sys.stdout.isatty():
+        return None
+    try:
+        return os.get_terminal_size()
+    except OSError:
+        return None
+
+
+def emit(args: argparse.Namespace, rows: List[Tuple[str, dict]]) -> None:
+    fleet = len(args.url) > 1
+    out = sys.stdout
+    if args.json:
+        for daemon, t in rows:
+            out.write(json.dumps(dict(t, daemon=daemon)) + "\n")
+    elif args.ids:
+        # ids only mean something on their own daemon
+        key = "hashString" if fleet else "id"
+        out.write("".join("{}\n".format(t[key]) for _, t in rows))
+    else:
+        size = terminal_size()
+        out.write("\n".join(render(rows, fleet, size and size.columns)) + "\n")
+
+
+def error(daemon: str, exc: BaseException) -> None:
+    sys.stderr.write("aiotr: {}: {}\n".format(label(daemon), exc or type(exc)))
+
+
+# talking to the daemons, asyncio and aiohttp are imported only from here on
+def run_fleet(
+    args: argparse.Namespace,
+    urls: Sequence[str],
+    job: Callable,
+    during: Optional[Callable] = None,
+) -> Dict[str, Any]:
+    """
+    Run ``await job(client, cache)`` for every url at once
+
+    :param during: a coroutine function run alongside, cancelled after the jobs
+
+    :return: daemon -> result, or the exception it raised
+    """
+    import asyncio
+
+    from aiotr.client import TransmissionClient
+
+    async def one(url: str):
+        client = TransmissionClient(
+            args.username, args.password, url=url, timeout=args.timeout
+        )
+        try:
+            return await job(client, Cache(args.cache_dir, url))
+        finally:
+            await client.close()
+
+    async def fan_out():
+        side = asyncio.ensure_future(during()) if during else None
+        try:
+            return await asyncio.gather(
+                *(one(url) for url in urls), return_exceptions=True
+            )
+        finally:
+            if side is not None:
+                side.cancel()
+
+    results = asyncio.run(fan_out())
+    return {daemon_of(url): result for url, result in zip(urls, results)}
+
+
+async def fetch(client, cache: Cache) -> List[dict]:
+    data = await client.torrent_get(FIELDS)
+    torrents = data.get("torrents") or []
+    cache.save(torrents)
+    return torrents
+
+
+def spawn_refresh(args: argparse.Namespace, urls: Sequence[str]) -> None:
+    """
+    Update the caches of ``urls`` from a detached process, outliving this one
+    """
+    import subprocess
+
+    env = dict(os.environ)
+    if args.username:
+        env["AIOTR_USERNAME"] = args.username
+    if args.password:  # kept out of the command line
+        env["AIOTR_PASSWORD"] = args.password
+    command = [sys.executable, "-m", "aiotr", "--cache-dir", args.cache_dir]
+    command += ["--timeout", str(args.timeout)]
+    for url in urls:
+        command += ["--url", url]
+    subprocess.Popen(
+        command + ["refresh"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=env,
+        start_new_session=True,
+    )
+
+
+# commands
+def cmd_list(args: argparse.Namespace) -> int:
+    terms = [Term.parse(text) for text in args.terms]
+    cached: Dict[str, dict] = {}
+    missing = []
+    stale = []
+    now = time.time()
+    for url in args.url:
+        cache = Cache(args.cache_dir, url)
+        data = None if args.refresh else cache.load()
+        if data is None:
+            missing.append(url)
+            continue
+        cached[cache.daemon] = data
+        if now - data["fetched"] > args.max_age and cache.claim():
+            stale.append(url)
+    status = 0
+    if missing:
+        for daemon, result in run_fleet(args, missing, fetch).items():
+            if isinstance(result, BaseException):
+                error(daemon, result)
+                status = 1
+            else:
+                cached[daemon] = {"fetched": now, "torrents": result}
+    if stale:
+        spawn_refresh(args, stale)
+        if not args.quiet:
+            sys.stderr.write(
+                "aiotr: showing cached lists, refreshing {} in the background\n".format(
+                    ", ".join(label(daemon_of(url)) for url in stale)
+                )
+            )
+    rows = [
+        (daemon, t)
+        for daemon in map(daemon_of, args.url)
+        if daemon in cached
+        for t in cached[daemon]["torrents"]
+        if all(term(t) for term in terms)
+    ]
+    emit(args, rows)
+    return status
+
+
+def cmd_refresh(args: argparse.Namespace) -> int:
+    try:
+        results = run_fleet(args, args.url, fetch)
+    finally:
+        for url in args.url:
+            Cache(args.cache_dir, url).release()
+    status = 0
+    for daemon, result in results.items():
+        if isinstance(result, BaseException):
+            error(daemon, result)
+            status = 1
+    return status
+
+
+def targets(args: argparse.Namespace) -> Tuple[List[Any], List[Term]]:
+    """
+    Ids, hashes and filter terms of an action command
+    """
+    ids: List[Any] = []
+    terms = []
+    for text in args.targets:
+        if text.isdigit():
+            if len(args.url) > 1:
+                raise ValueError(
+                    "ids differ between daemons, select by hash or filter term"
+                )
+            ids.append(int(text))
+        elif HASH.match(text):
+            ids.append(text.lower())
+        else:
+            terms.append(Term.parse(text))
+    return ids, terms
+
+
+def cmd_action(args: argparse.Namespace) -> int:
+    ids, terms = targets(args)
+    method = {"start": "torrent_start", "stop": "torrent_stop"}.get(
+        args.command, "torrent_remove"
+    )
+    arguments = {"delete_local_data": True} if getattr(args, "delete", False) else {}
+
+    async def act(client, cache: Cache) -> List[dict]:
+        torrents = await client.torrent_get(FIELDS)
+        chosen = [
+            t
+            for t in torrents.get("torrents") or ()
+            if (t["id"] in ids or t["hashString"] in ids)
+            or (terms and all(term(t) for term in terms))
+        ]
+        if chosen and not args.dry_run:
+            await getattr(client, method)(ids=[t["id"] for t in chosen], **arguments)
+            await fetch(client, cache)
+        return chosen
+
+    status = 0
+    verb = "would {}".format(args.command) if args.dry_run else args.command
+    for daemon, result in run_fleet(args, args.url, act).items():
+        if isinstance(result, BaseException):
+            error(daemon, result)
+            status = 1
+            continue
+        if not args.quiet:
+            for t in result:
+                sys.stdout.write("{} {} {}\n".format(verb, t["id"], t["name"]))
+    return status
+
+
+def cmd_top(args: argparse.Namespace) -> int:
+    import asyncio
+
+    fleet = len(args.url) > 1
+    # daemon -> torrent id -> row, shown from the cache until the first poll
+    tables: Dict[str, Dict[int, dict]] = {}
+    for url in args.url:
+        data = Cache(args.cache_dir, url).load()
+        if data is not None:
+            tables[data["daemon"]] = {t["id"]: t for t in data["torrents"]}
+    errors: Dict[str, BaseException] = {}
+
+    def draw() -> None:
+        lines = []
+        for daemon in map(daemon_of, args.url):
+            table = tables.get(daemon, {})
+            line = "{}  {} torrents  down {}/s  up {}/s".format(
+                label(daemon),
+                len(table),
+                human(sum(t.get("rateDownload", 0) for t in table.values())),
+                human(sum(t.get("rateUpload", 0) for t in table.values())),
+            )
+            if daemon in errors:
+                line += "  ! {}".format(errors[daemon])
+            lines.append(line)
+        rows = [(d, t) for d, table in tables.items() for t in table.values()]
+        rows.sort(
+            key=lambda row: row[1].get("rateDownload", 0) + row[1].get("rateUpload", 0),
+            reverse=True,
+        )
+        size = terminal_size()
+        height = args.limit or (size.lines - len(lines) - 3 if size else 20)
+        lines.append("")
+        lines += render(rows[: max(height, 1)], fleet, size and size.columns)
+        # cursor home and clear screen before every frame on a terminal
+        sys.stdout.write(("\x1b[H\x1b[2J" if size else "") + "\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+    async def watch(client, cache: Cache) -> None:
+        daemon = cache.daemon
+        polls = 0
+        try:
+            while True:
+                full = polls % args.full_every == 0
+                try:
+                    data = await client.torrent_get(
+                        FIELDS, ids=None if full else "recently-active"
+                    )
+                except Exception as e:
+                    errors[daemon] = e
+                else:
+                    errors.pop(daemon, None)
+                    table = {} if full else tables.get(daemon, {})
+                    for t in data.get("torrents") or ():
+                        table[t["id"]] = t
+                    for tid in data.get("removed") or ():
+                        table.pop(tid, None)
+                    tables[daemon] = table
+                polls += 1
+                if args.iterations is not None and polls >= args.iterations:
+                    return
+                await asyncio.sleep(args.interval)
+        finally:
+            if daemon in tables:
+                cache.save(list(tables[daemon].values()))
+
+    async def paint() -> None:
+        while True:
+            await asyncio.sleep(args.interval)
+            draw()
+
+    draw()
+    try:
+        run_fleet(args, args.url, watch, paint)
+    except KeyboardInterrupt:
+        return 0
+    draw()
+    return 1 if errors else 0
+
+
+def parser() -> argparse.ArgumentParser:
+    root = argparse.ArgumentParser(
+        prog="aiotr", description="Inspect and control transmission daemons"
+    )
+    root.add_argument(
+        "--url",
+        action="append",
+        help="rpc url of a daemon, repeat for a fleet "
+        "(default: $AIOTR_URL, comma separated, or {})".format(DEFAULT_HOST),
+    )
+    root.add_argument("--username", default=os.environ.get("AIOTR_USERNAME"))
+    root.add_argument(
+        "--password",
+        default=os.environ.get("AIOTR_PASSWORD"),
+        help="better given as $AIOTR_PASSWORD",
+    )
+    root.add_argument("--timeout", type=float, default=10.0)
+    root.add_argument("--cache-dir", default=cache_dir())
+    root.add_argument("-q", "--quiet", action="store_true")
+    commands = root.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    def output(command: argparse.ArgumentParser) -> None:
+        command.add_argument(
+            "--max-age",
+            type=float,
+            default=10.0,
+            help="seconds before a cached list is refreshed in the background",
+        )
+        command.add_argument(
+            "--refresh", action="store_true", help="read the daemons, not the cache"
+        )
+        group = command.add_mutually_exclusive_group()
+        group.add_argument("--json", action="store_true", help="json lines")
+        group.add_argument(
+            "--ids", action="store_true", help="ids, or hashes for a fleet"
+        )
+
+    command = commands.add_parser("list", help="list torrents")
+    output(command)
+    command.set_defaults(func=cmd_list, terms=[])
+    command = commands.add_parser(
+        "filter",
+        help="list torrents matching every term",
+        description="Terms are KEY OP VALUE with OP one of = != < > <= >= ~ "
+        "(glob or substring), e.g. status=seeding 'ratio>2' 'size>4G' "
+        "label=linux name~ubuntu*. Keys are {} or their aliases {}.".format(
+            ", ".join(FIELDS), ", ".join(ALIASES)
+        ),
+    )
+    command.add_argument("terms", nargs="+", metavar="term")
+    output(command)
+    command.set_defaults(func=cmd_list)
+    for name in ("start", "stop", "remove"):
+        command = commands.add_parser(
+            name, help="{} torrents by id, hash or filter term".format(name)
+        )
+        command.add_argument("targets", nargs="+", metavar="target")
+        command.add_argument(
+            "-n", "--dry-run", action="store_true", help="only print the torrents"
+        )
+        if name == "remove":
+            command.add_argument(
+                "--delete", action="store_true", help="delete the downloaded data"
+            )
+        command.set_defaults(func=cmd_action)
+    command = commands.add_parser("top", help="live view, busiest torrents first")
+    command.add_argument("--interval", type=float, default=2.0)
+    command.add_argument(
+        "--iterations", type=int, help="polls before exiting, forever by default"
+    )
+    command.add_argument(
+        "--limit", type=int, help="rows, the terminal height by default"
+    )
+    command.add_argument(
+        "--full-every",
+        type=int,
+        default=30,
+        help="read every torrent once per this many polls, "
+        'the others only ask for "recently-active" ones',
+    )
+    command.set_defaults(func=cmd_top)
+    command = commands.add_parser("refresh", help="update the cached lists")
+    command.set_defaults(func=cmd_refresh)
+    return root
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    root = parser()
+    args = root.parse_args(argv)
+    if not args.url:
+        env = os.environ.get("AIOTR_URL")
+        args.url = env.split(",") if env else [DEFAULT_HOST]
+    try:
+        return args.func(args)
+    except ValueError as e:
+        root.error(str(e))
+    except KeyboardInterrupt:
+        return 130
+    return 0  # pragma: no cover
+
+
+if __name__ == "__main__":
+    sys.exit(main())
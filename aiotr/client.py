@@ -2,28 +2,98 @@
 Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
 """
 
-from typing import List, NoReturn, Optional, Union
-from urllib.parse import quote, urlparse, urlunparse
+import asyncio
+import logging
+import warnings
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    List,
+    NoReturn,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from urllib.parse import parse_qs, quote, urlparse, urlunparse
 
-import aiohttp
 from typing_extensions import Literal
 
+from aiotr.capabilities import HANDSHAKE_FIELDS, PROFILES, Capabilities
+from aiotr.codec import DEFAULT_CODEC, Codec, get_codec
+from aiotr.deadline import DEADLINE, effective, remaining
 from aiotr.exception import (
     TransmissionConnectException,
     TransmissionException,
     TransmissionMisdirectedException,
+    TransmissionTimeoutException,
     TransmissionUnauthorizedException,
 )
-from aiotr.typing import Request, Response, TagFactory
+from aiotr.metrics import RequestHooks, RequestRecord
+from aiotr.pool import PoolSettings, make_connector
+from aiotr.retry import BREAKERS, CircuitBreaker, RetryPolicy
+from aiotr.scheduler import PRIORITY, Scheduler
+from aiotr.spec import METHODS, compile_method
+from aiotr.typing import (
+    JsonRpcRequest,
+    JsonRpcResponse,
+    Request,
+    Response,
+    TagFactory,
+)
 from aiotr.utils import (
+    DEFAULT_COMPRESS_THRESHOLD,
     DEFAULT_HOST,
     DEFAULT_JSON_DECODER,
     DEFAULT_JSON_ENCODER,
+    DEFAULT_RPC_PATH,
     DEFAULT_TIMEOUT,
     TagGen,
+    compress,
+    table_to_objects,
 )
 
+if TYPE_CHECKING:
+    import aiohttp
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+def default_accept_encoding() -> str:
+    """
+    Every content-coding the installed aiohttp can decode, best ratio first
+    """
+    try:
+        from aiohttp import compression_utils
+    except ImportError:  # aiohttp < 3.9
+        compression_utils = None  # type: ignore
+    encodings = ["gzip", "deflate"]
+    if getattr(compression_utils, "HAS_BROTLI", False):
+        encodings.insert(0, "br")
+    if getattr(compression_utils, "HAS_ZSTD", False):
+        encodings.insert(0, "zstd")
+    return ", ".join(encodings)
 
+
+def with_rpc_methods(cls):
+    """
+    Attach one ``async`` method per entry of ``aiotr.spec.METHODS``
+    """
+    for spec in METHODS:
+        method = compile_method(spec)
+        method.__qualname__ = "{}.{}".format(cls.__qualname__, spec.name)
+        method.__module__ = cls.__module__
+        setattr(cls, spec.name, method)
+    return cls
+
+
+@with_rpc_methods
 class _BaseTransmissionClient:
     def __init__(
         self,
@@ -31,6 +101,7 @@ class _BaseTransmissionClient:
         password: Optional[str] = None,
         url: Optional[str] = DEFAULT_HOST,
         tag: Optional[TagFactory] = None,
+        negotiate: bool = False,
     ):
         self.username = (
             quote(username or "", safe="$-_.+!*'(),;&=", encoding="utf8")
@@ -48,7 +119,16 @@ class _BaseTransmissionClient:
             else ""
         )
         parsed = urlparse(url)
-
+        self.unix_socket: Optional[str] = None
+        if parsed.scheme == "unix":
+            # unix:///path/to/socket[?path=/transmission/rpc]
+            # the socket path is carried in the url path, the rpc endpoint in the query
+            self.unix_socket = parsed.path
+            rpc_path = parse_qs(parsed.query).get("path", [DEFAULT_RPC_PATH])[0]
+            parsed = urlparse("http://localhost" + rpc_path)
+
+        # the url without credentials, or the unix socket, used to label metrics
+        self.daemon: str = self.unix_socket or urlunparse(parsed)
         self.url: str = (
             urlunparse(parsed)
             if not auth
@@ -64,893 +144,61 @@ class _BaseTransmissionClient:
             )
         )  # type: ignore
         self.tag = tag if tag is not None else TagGen()
+        self.negotiate = negotiate
 
-    # 3. Torrent Requests
-    # 3.1 Torrent Action Requests
-    async def torrent_start(
-        self,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-    ):
-        """
-        "ids", which specifies which torrents to use.
-                  All torrents are used if the "ids" argument is omitted.
-                  "ids" should be one of the following:
-
-        :param ids:
-                  (1) an integer referring to a torrent id
-                  (2) a list of torrent id numbers, sha1 hash strings, or both
-                  (3) a string, "recently-active", for recently-active torrents
-        :return: Response arguments: none
-        """
-        arguments = {"ids": ids} if ids else {}
-        return await self.rpc("torrent-start", arguments)
-
-    async def torrent_start_now(
-        self,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-    ):
-        arguments = {"ids": ids} if ids else {}
-        return await self.rpc("torrent-start-now", arguments)
-
-    async def torrent_stop(
-        self,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-    ):
-        arguments = {"ids": ids} if ids else {}
-        return await self.rpc("torrent-stop", arguments)
-
-    async def torrent_verify(
-        self,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-    ):
-        arguments = {"ids": ids} if ids else {}
-        return await self.rpc("torrent-verify", arguments)
-
-    async def torrent_reannounce(
-        self,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-    ):
-        arguments = {"ids": ids} if ids else {}
-        return await self.rpc("torrent-reannounce", arguments)
-
-    # 3.2 Torrent Mutators
-    async def torrent_set(
-        self,
-        bandwidthPriority: Optional[int] = None,
-        downloadLimit: Optional[int] = None,
-        downloadLimited: Optional[bool] = None,
-        files_wanted: Optional[List[str]] = None,
-        files_unwanted: Optional[List[str]] = None,
-        group: Optional[str] = None,
-        honorsSessionLimits: Optional[bool] = None,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-        labels: Optional[List[str]] = None,
-        location: Optional[str] = None,
-        peer_limit: Optional[int] = None,
-        priority_high: Optional[List[str]] = None,
-        priority_low: Optional[List[str]] = None,
-        priority_normal: Optional[List[str]] = None,
-        queuePosition: Optional[int] = None,
-        seedIdleLimit: Optional[int] = None,
-        seedIdleMode: Optional[int] = None,
-        seedRatioLimit: Optional[float] = None,
-        seedRatioMode: Optional[int] = None,
-        sequentialDownload: Optional[bool] = None,
-        trackerAdd: Optional[List[str]] = None,
-        trackerList: Optional[str] = None,
-        trackerRemove: Optional[List[str]] = None,
-        trackerReplace: Optional[List[str]] = None,
-        uploadLimit: Optional[int] = None,
-        uploadLimited: Optional[bool] = None,
-    ):
-        """
-             Just as an empty "ids" value is shorthand for "all ids", using an empty array
-        for "files-wanted", "files-unwanted", "priority-high", "priority-low", or
-        "priority-normal" is shorthand for saying "all files".
-
-         :param bandwidthPriority:             this torrent's bandwidth tr_priority_t
-         :param downloadLimit:                 maximum download speed (KBps)
-         :param downloadLimited:               true if "downloadLimit" is honored
-         :param files_wanted:                  indices of file(s) to download
-         :param files_unwanted:                indices of file(s) to not download
-         :param group:                         The name of this torrent's bandwidth group
-         :param honorsSessionLimits:           true if session upload limits are honored
-         :param ids:                           torrent list, as described in 3.1
-         :param labels:                        array of string labels
-         :param location:                      new location of the torrent's content
-         :param peer_limit:                    maximum number of peers
-         :param priority_high:                 indices of high-priority file(s)
-         :param priority_low:                  indices of low-priority file(s)
-         :param priority_normal:               indices of normal-priority file(s)
-         :param queuePosition:                 position of this torrent in its queue [0...n)
-         :param seedIdleLimit:                 torrent-level number of minutes of seeding inactivity
-         :param seedIdleMode:                  which seeding inactivity to use.  See tr_idlelimit
-         :param seedRatioLimit:                torrent-level seeding ratio
-         :param seedRatioMode:                 which ratio to use.  See tr_ratiolimit
-         :param sequentialDownload:            download torrent pieces sequentially
-         :param trackerAdd:                    strings of announce URLs to add
-         :param trackerList:                   string of announce URLs, one per line, and a blank line between tiers.
-         :param trackerRemove:                 ids of trackers to remove
-         :param trackerReplace:                pairs of <trackerId/new announce URLs>
-         :param uploadLimit:                   maximum upload speed (KBps)
-         :param uploadLimited:                 true if "uploadLimit" is honored
-         :return: Response arguments: none
-        """
-        arguments = {
-            "bandwidthPriority": bandwidthPriority,
-            "downloadLimit": downloadLimit,
-            "downloadLimited": downloadLimited,
-            "files-wanted": files_wanted,
-            "files-unwanted": files_unwanted,
-            "group": group,
-            "honorsSessionLimits": honorsSessionLimits,
-            "ids": ids,
-            "labels": labels,
-            "location": location,
-            "peer-limit": peer_limit,
-            "priority-high": priority_high,
-            "priority-low": priority_low,
-            "priority-normal": priority_normal,
-            "queuePosition": queuePosition,
-            "seedIdleLimit": seedIdleLimit,
-            "seedIdleMode": seedIdleMode,
-            "seedRatioLimit": seedRatioLimit,
-            "seedRatioMode": seedRatioMode,
-            "sequentialDownload": sequentialDownload,
-            "trackerAdd": trackerAdd,
-            "trackerList": trackerList,
-            "trackerRemove": trackerRemove,
-            "trackerReplace": trackerReplace,
-            "uploadLimit": uploadLimit,
-            "uploadLimited": uploadLimited,
-        }
-        return await self.rpc("torrent-set", arguments)
-
-    # 3.5 Torrent Accessors
-    async def torrent_get(
-        self,
-        fields: List[str],
-        format: Optional[str] = None,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-    ):
-        """
-
-         :param fields:A required "fields" array of keys. (see list below)
-         :param format: An optional "format" string specifying how to format the
-        "torrents" response field. Allowed values are "objects" (default)
-        and "table". (see "Response arguments" below)
-         :param ids:An optional "ids" array as described in 3.1.
-         :return:
-         Response arguments:
-
-            (1) A "torrents" array.
-
-                If the "format" request was "objects" (default), "torrents" will
-                be an array of objects, each of which contains the key/value
-                pairs matching the request's "fields" arg. This was the only
-                format before Transmission 3 and has some obvious programmer
-                conveniences, such as parsing directly into Javascript objects.
-
-                If the format was "table", then "torrents" will be an array of
-                arrays. The first row holds the keys and each remaining row holds
-                a torrent's values for those keys. This format is more efficient
-                in terms of JSON generation and JSON parsing.
-
-            (2) If the request's "ids" field was "recently-active",
-                a "removed" array of torrent-id numbers of recently-removed
-                torrents.
-
-            Note: For more information on what these fields mean, see the comments
-            in libtransmission/transmission.h.  The "source" column here
-            corresponds to the data structure there.
-
-
-
-          key                         | type                        | source
-        ----------------------------+-----------------------------+---------
-        activityDate                | number                      | tr_stat
-        addedDate                   | number                      | tr_stat
-        bandwidthPriority           | number                      | tr_priority_t
-        comment                     | string                      | tr_info
-        corruptEver                 | number                      | tr_stat
-        creator                     | string                      | tr_info
-        dateCreated                 | number                      | tr_info
-        desiredAvailable            | number                      | tr_stat
-        doneDate                    | number                      | tr_stat
-        downloadDir                 | string                      | tr_torrent
-        downloadedEver              | number                      | tr_stat
-        downloadLimit               | number                      | tr_torrent
-        downloadLimited             | boolean                     | tr_torrent
-        editDate                    | number                      | tr_stat
-        error                       | number                      | tr_stat
-        errorString                 | string                      | tr_stat
-        eta                         | number                      | tr_stat
-        etaIdle                     | number                      | tr_stat
-        file-count                  | number                      | tr_info
-        files                       | array (see below)           | n/a
-        fileStats                   | array (see below)           | n/a
-        hashString                  | string                      | tr_info
-        haveUnchecked               | number                      | tr_stat
-        haveValid                   | number                      | tr_stat
-        honorsSessionLimits         | boolean                     | tr_torrent
-        id                          | number                      | tr_torrent
-        isFinished                  | boolean                     | tr_stat
-        isPrivate                   | boolean                     | tr_torrent
-        isStalled                   | boolean                     | tr_stat
-        labels                      | array (see below)           | tr_torrent
-        leftUntilDone               | number                      | tr_stat
-        magnetLink                  | string                      | n/a
-        manualAnnounceTime          | number                      | tr_stat
-        maxConnectedPeers           | number                      | tr_torrent
-        metadataPercentComplete     | double                      | tr_stat
-        name                        | string                      | tr_info
-        peer-limit                  | number                      | tr_torrent
-        peers                       | array (see below)           | n/a
-        peersConnected              | number                      | tr_stat
-        peersFrom                   | object (see below)          | n/a
-        peersGettingFromUs          | number                      | tr_stat
-        peersSendingToUs            | number                      | tr_stat
-        percentDone                 | double                      | tr_stat
-        pieces                      | string (see below)          | tr_torrent
-        pieceCount                  | number                      | tr_info
-        pieceSize                   | number                      | tr_info
-        priorities                  | array (see below)           | n/a
-        primary-mime-type           | string                      | tr_torrent
-        queuePosition               | number                      | tr_stat
-        rateDownload (B/s)          | number                      | tr_stat
-        rateUpload (B/s)            | number                      | tr_stat
-        recheckProgress             | double                      | tr_stat
-        secondsDownloading          | number                      | tr_stat
-        secondsSeeding              | number                      | tr_stat
-        seedIdleLimit               | number                      | tr_torrent
-        seedIdleMode                | number                      | tr_inactvelimit
-        seedRatioLimit              | double                      | tr_torrent
-        seedRatioMode               | number                      | tr_ratiolimit
-        sizeWhenDone                | number                      | tr_stat
-        startDate                   | number                      | tr_stat
-        status                      | number                      | tr_stat
-        trackers                    | array (see below)           | n/a
-        trackerStats                | array (see below)           | n/a
-        totalSize                   | number                      | tr_info
-        torrentFile                 | string                      | tr_info
-        uploadedEver                | number                      | tr_stat
-        uploadLimit                 | number                      | tr_torrent
-        uploadLimited               | boolean                     | tr_torrent
-        uploadRatio                 | double                      | tr_stat
-        wanted                      | array (see below)           | n/a
-        webseeds                    | array (see below)           | n/a
-        webseedsSendingToUs         | number                      | tr_stat
-                                    |                             |
-                                    |                             |
-        -------------------+--------+-----------------------------+
-        files              | array of objects, each containing:   |
-                           +-------------------------+------------+
-                           | bytesCompleted          | number     | tr_torrent
-                           | length                  | number     | tr_info
-                           | name                    | string     | tr_info
-        -------------------+--------------------------------------+
-        fileStats          | a file's non-constant properties.    |
-                           | array of tr_info.filecount objects,  |
-                           | each containing:                     |
-                           +-------------------------+------------+
-                           | bytesCompleted          | number     | tr_torrent
-                           | wanted                  | boolean    | tr_info
-                           | priority                | number     | tr_info
-        -------------------+--------------------------------------+
-        labels             | an array of strings:                 |
-                           +-------------------------+------------+
-                           | label                   | string     | tr_torrent
-        -------------------+--------------------------------------+
-        peers              | array of objects, each containing:   |
-                           +-------------------------+------------+
-                           | address                 | string     | tr_peer_stat
-                           | clientName              | string     | tr_peer_stat
-                           | clientIsChoked          | boolean    | tr_peer_stat
-                           | clientIsInterested      | boolean    | tr_peer_stat
-                           | flagStr                 | string     | tr_peer_stat
-                           | isDownloadingFrom       | boolean    | tr_peer_stat
-                           | isEncrypted             | boolean    | tr_peer_stat
-                           | isIncoming              | boolean    | tr_peer_stat
-                           | isUploadingTo           | boolean    | tr_peer_stat
-                           | isUTP                   | boolean    | tr_peer_stat
-                           | peerIsChoked            | boolean    | tr_peer_stat
-                           | peerIsInterested        | boolean    | tr_peer_stat
-                           | port                    | number     | tr_peer_stat
-                           | progress                | double     | tr_peer_stat
-                           | rateToClient (B/s)      | number     | tr_peer_stat
-                           | rateToPeer (B/s)        | number     | tr_peer_stat
-        -------------------+--------------------------------------+
-        peersFrom          | an object containing:                |
-                           +-------------------------+------------+
-                           | fromCache               | number     | tr_stat
-                           | fromDht                 | number     | tr_stat
-                           | fromIncoming            | number     | tr_stat
-                           | fromLpd                 | number     | tr_stat
-                           | fromLtep                | number     | tr_stat
-                           | fromPex                 | number     | tr_stat
-                           | fromTracker             | number     | tr_stat
-        -------------------+--------------------------------------+
-        pieces             | A bitfield holding pieceCount flags  | tr_torrent
-                           | which are set to 'true' if we have   |
-                           | the piece matching that position.    |
-                           | JSON doesn't allow raw binary data,  |
-                           | so this is a base64-encoded string.  |
-        -------------------+--------------------------------------+
-        priorities         | an array of tr_info.filecount        | tr_info
-                           | numbers. each is the tr_priority_t   |
-                           | mode for the corresponding file.     |
-        -------------------+--------------------------------------+
-        trackers           | array of objects, each containing:   |
-                           +-------------------------+------------+
-                           | announce                | string     | tr_tracker_info
-                           | id                      | number     | tr_tracker_info
-                           | scrape                  | string     | tr_tracker_info
-                           | tier                    | number     | tr_tracker_info
-        -------------------+--------------------------------------+
-        trackerStats       | array of objects, each containing:   |
-                           +-------------------------+------------+
-                           | announce                | string     | tr_tracker_stat
-                           | announceState           | number     | tr_tracker_stat
-                           | downloadCount           | number     | tr_tracker_stat
-                           | hasAnnounced            | boolean    | tr_tracker_stat
-                           | hasScraped              | boolean    | tr_tracker_stat
-                           | host                    | string     | tr_tracker_stat
-                           | id                      | number     | tr_tracker_stat
-                           | isBackup                | boolean    | tr_tracker_stat
-                           | lastAnnouncePeerCount   | number     | tr_tracker_stat
-                           | lastAnnounceResult      | string     | tr_tracker_stat
-                           | lastAnnounceStartTime   | number     | tr_tracker_stat
-                           | lastAnnounceSucceeded   | boolean    | tr_tracker_stat
-                           | lastAnnounceTime        | number     | tr_tracker_stat
-                           | lastAnnounceTimedOut    | boolean    | tr_tracker_stat
-                           | lastScrapeResult        | string     | tr_tracker_stat
-                           | lastScrapeStartTime     | number     | tr_tracker_stat
-                           | lastScrapeSucceeded     | boolean    | tr_tracker_stat
-                           | lastScrapeTime          | number     | tr_tracker_stat
-                           | lastScrapeTimedOut      | boolean    | tr_tracker_stat
-                           | leecherCount            | number     | tr_tracker_stat
-                           | nextAnnounceTime        | number     | tr_tracker_stat
-                           | nextScrapeTime          | number     | tr_tracker_stat
-                           | scrape                  | string     | tr_tracker_stat
-                           | scrapeState             | number     | tr_tracker_stat
-                           | seederCount             | number     | tr_tracker_stat
-                           | tier                    | number     | tr_tracker_stat
-        -------------------+-------------------------+------------+
-        wanted             | an array of tr_info.fileCount        | tr_info
-                           | 'booleans' true if the corresponding |
-                           | file is to be downloaded.            |
-        -------------------+--------------------------------------+
-        webseeds           | an array of strings:                 |
-                           +-------------------------+------------+
-                           | webseed                 | string     | tr_info
-                           +-------------------------+------------+
-
-
-
-        """
-
-        arguments = {"fields": fields, "format": format, "ids": ids}
-        return await self.rpc("torrent-get", arguments)
-
-    # 3.4 Adding a Torrent
-    async def torrent_add(
-        self,
-        cookies: Optional[str] = None,
-        download_dir: Optional[str] = None,
-        filename: Optional[str] = None,
-        labels: Optional[List[str]] = None,
-        metainfo: Optional[str] = None,
-        paused: Optional[bool] = None,
-        peer_limit: Optional[int] = None,
-        bandwidthPriority: Optional[int] = None,
-        files_wanted: Optional[List[str]] = None,
-        files_unwanted: Optional[List[str]] = None,
-        priority_high: Optional[List[str]] = None,
-        priority_low: Optional[List[str]] = None,
-        priority_normal: Optional[List[str]] = None,
-    ):
-        """
-
-        :param cookies:               pointer to a string of one or more cookies.
-        :param download_dir:          path to download the torrent to
-        :param filename:              filename or URL of the .torrent file
-        :param labels:                array of string labels
-        :param metainfo:              base64-encoded .torrent content
-        :param paused:                if true, don't start the torrent
-        :param peer_limit:            maximum number of peers
-        :param bandwidthPriority:     torrent's bandwidth tr_priority_t
-        :param files_wanted:          indices of file(s) to download
-        :param files_unwanted:        indices of file(s) to not download
-        :param priority_high:         indices of high-priority file(s)
-        :param priority_low:          indices of low-priority file(s)
-        :param priority_normal:       indices of normal-priority file(s)
-        :return:
-        Response arguments: On success, a "torrent-added" object in the
-                       form of one of 3.3's tr_info objects with the
-                       fields for id, name, and hashString.
+    # 3. Torrent Requests - 4.8 Bandwidth groups are compiled from aiotr.spec
 
-                       On failure due to a duplicate torrent existing,
-                       a "torrent-duplicate" object in the same form.
-        """
-        arguments = {
-            "cookies": cookies,
-            "download-dir": download_dir,
-            "filename": filename,
-            "labels": labels,
-            "metainfo": metainfo,
-            "paused": paused,
-            "peer-limit": peer_limit,
-            "bandwidthPriority": bandwidthPriority,
-            "files-wanted": files_wanted,
-            "files-unwanted": files_unwanted,
-            "priority-high": priority_high,
-            "priority-low": priority_low,
-            "priority-normal": priority_normal,
-        }
-        return await self.rpc("torrent-add", arguments)
-
-    # 3.5 Removing a Torrent
-    async def torrent_remove(
-        self,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-        delete_local_data: Optional[bool] = False,
-    ):
-        """
-
-        :param ids: torrent list, as described in 3.1
-        :param delete_local_data: delete local data. (default: false)
-        :return:  Response arguments: none
-        """
-        arguments = {"ids": ids, "delete-local-data": delete_local_data}
-        return await self.rpc("torrent-remove", arguments)
-
-    # 3.6 Moving a Torrent
-    async def torrent_set_location(
-        self,
-        location: str,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-        move: Optional[bool] = False,
-    ):
-        """
-
-        :param location: the new torrent location
-        :param ids: torrent list, as described in 3.1
-        :param move: if true, move from previous location. otherwise, search "location" for files (default: false)
-        :return:   Response arguments: none
-        """
-        arguments = {"ids": ids, "location": location, "move": move}
-        return await self.rpc("torrent-set-location", arguments)
-
-    #  3.7.  Renaming a Torrent's Path
-    async def torrent_rename_path(
-        self,
-        path: str,
-        name: str,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-    ):
-        """
-                 For more information on the use of this function, see the transmission.h
-           documentation of tr_torrentRenamePath(). In particular, note that if this
-           call succeeds you'll want to update the torrent's "files" and "name" field
-           with torrent-get.
-        :param path: the path to the file or folder that will be renamed
-        :param name: the file or folder's new name
-        :param ids:  the torrent torrent list, as described in 3.1 (must only be 1 torrent)
-        :return:  Response arguments: "path", "name", and "id", holding the torrent ID integer
-        """
-
-        arguments = {"ids": ids, "name": name, "path": path}
-        return await self.rpc("torrent-rename-path", arguments)
-
-    # 4.  Session Requests
-    # 4.1 Session Arguments
-    # string                           | value type | description
-    #    ---------------------------------+------------+-------------------------------------
-    #    "alt-speed-down"                 | number     | max global download speed (KBps)
-    #    "alt-speed-enabled"              | boolean    | true means use the alt speeds
-    #    "alt-speed-time-begin"           | number     | when to turn on alt speeds (units: minutes after midnight)
-    #    "alt-speed-time-enabled"         | boolean    | true means the scheduled on/off times are used
-    #    "alt-speed-time-end"             | number     | when to turn off alt speeds (units: same)
-    #    "alt-speed-time-day"             | number     | what day(s) to turn on alt speeds (look at tr_sched_day)
-    #    "alt-speed-up"                   | number     | max global upload speed (KBps)
-    #    "blocklist-url"                  | string     | location of the blocklist to use for "blocklist-update"
-    #    "blocklist-enabled"              | boolean    | true means enabled
-    #    "blocklist-size"                 | number     | number of rules in the blocklist
-    #    "cache-size-mb"                  | number     | maximum size of the disk cache (MB)
-    #    "config-dir"                     | string     | location of transmission's configuration directory
-    #    "download-dir"                   | string     | default path to download torrents
-    #    "download-queue-size"            | number     | max number of torrents to download at once (see download-queue-enabled)
-    #    "download-queue-enabled"         | boolean    | if true, limit how many torrents can be downloaded at once
-    #    "dht-enabled"                    | boolean    | true means allow dht in public torrents
-    #    "encryption"                     | string     | "required", "preferred", "tolerated"
-    #    "idle-seeding-limit"             | number     | torrents we're seeding will be stopped if they're idle for this long
-    #    "idle-seeding-limit-enabled"     | boolean    | true if the seeding inactivity limit is honored by default
-    #    "incomplete-dir"                 | string     | path for incomplete torrents, when enabled
-    #    "incomplete-dir-enabled"         | boolean    | true means keep torrents in incomplete-dir until done
-    #    "lpd-enabled"                    | boolean    | true means allow Local Peer Discovery in public torrents
-    #    "peer-limit-global"              | number     | maximum global number of peers
-    #    "peer-limit-per-torrent"         | number     | maximum global number of peers
-    #    "pex-enabled"                    | boolean    | true means allow pex in public torrents
-    #    "peer-port"                      | number     | port number
-    #    "peer-port-random-on-start"      | boolean    | true means pick a random peer port on launch
-    #    "port-forwarding-enabled"        | boolean    | true means enabled
-    #    "queue-stalled-enabled"          | boolean    | whether or not to consider idle torrents as stalled
-    #    "queue-stalled-minutes"          | number     | torrents that are idle for N minuets aren't counted toward seed-queue-size or download-queue-size
-    #    "rename-partial-files"           | boolean    | true means append ".part" to incomplete files
-    #    "rpc-version"                    | number     | the current RPC API version
-    #    "rpc-version-minimum"            | number     | the minimum RPC API version supported
-    #    "script-torrent-done-filename"   | string     | filename of the script to run
-    #    "script-torrent-done-enabled"    | boolean    | whether or not to call the "done" script
-    #    "seedRatioLimit"                 | double     | the default seed ratio for torrents to use
-    #    "seedRatioLimited"               | boolean    | true if seedRatioLimit is honored by default
-    #    "seed-queue-size"                | number     | max number of torrents to uploaded at once (see seed-queue-enabled)
-    #    "seed-queue-enabled"             | boolean    | if true, limit how many torrents can be uploaded at once
-    #    "speed-limit-down"               | number     | max global download speed (KBps)
-    #    "speed-limit-down-enabled"       | boolean    | true means enabled
-    #    "speed-limit-up"                 | number     | max global upload speed (KBps)
-    #    "speed-limit-up-enabled"         | boolean    | true means enabled
-    #    "start-added-torrents"           | boolean    | true means added torrents will be started right away
-    #    "trash-original-torrent-files"   | boolean    | true means the .torrent file of added torrents will be deleted
-    #    "units"                          | object     | see below
-    #    "utp-enabled"                    | boolean    | true means allow utp
-    #    "version"                        | string     | long version string "$version ($revision)"
-    #    ---------------------------------+------------+-----------------------------+
-    #    units                            | object containing:                       |
-    #                                     +--------------+--------+------------------+
-    #                                     | speed-units  | array  | 4 strings: KB/s, MB/s, GB/s, TB/s
-    #                                     | speed-bytes  | number | number of bytes in a KB (1000 for kB; 1024 for KiB)
-    #                                     | size-units   | array  | 4 strings: KB/s, MB/s, GB/s, TB/s
-    #                                     | size-bytes   | number | number of bytes in a KB (1000 for kB; 1024 for KiB)
-    #                                     | memory-units | array  | 4 strings: KB/s, MB/s, GB/s, TB/s
-    #                                     | memory-bytes | number | number of bytes in a KB (1000 for kB; 1024 for KiB)
-    #                                     +--------------+--------+------------------+
-    #
-    #    "rpc-version" indicates the RPC interface version supported by the RPC server.
-    #    It is incremented when a new version of Transmission changes the RPC interface.
-    #
-    #    "rpc-version-minimum" indicates the oldest API supported by the RPC server.
-    #    It is changes when a new version of Transmission changes the RPC interface
-    #    in a way that is not backwards compatible.  There are no plans for this
-    #    to be common behavior.
-    # 4.1.1.  Mutators
-    async def session_set(
-        self,
-        alt_speed_down: Optional[int] = None,
-        alt_speed_enabled: Optional[bool] = None,
-        alt_speed_time_begin: Optional[int] = None,
-        alt_speed_time_enabled: Optional[bool] = None,
-        alt_speed_time_end: Optional[int] = None,
-        alt_speed_time_day: Optional[int] = None,
-        alt_speed_up: Optional[int] = None,
-        blocklist_url: Optional[str] = None,
-        blocklist_enabled: Optional[bool] = None,
-        cache_size_mb: Optional[int] = None,
-        default_trackers: Optional[int] = None,
-        download_dir: Optional[str] = None,
-        download_queue_size: Optional[int] = None,
-        download_queue_enabled: Optional[bool] = None,
-        dht_enabled: Optional[bool] = None,
-        encryption: Optional[Literal["required", "preferred", "tolerated"]] = None,
-        idle_seeding_limit: Optional[int] = None,
-        idle_seeding_limit_enabled: Optional[bool] = None,
-        incomplete_dir: Optional[str] = None,
-        incomplete_dir_enabled: Optional[bool] = None,
-        lpd_enabled: Optional[bool] = None,
-        peer_limit_global: Optional[int] = None,
-        peer_limit_per_torrent: Optional[int] = None,
-        pex_enabled: Optional[bool] = None,
-        peer_port: Optional[int] = None,
-        peer_port_random_on_start: Optional[bool] = None,
-        port_forwarding_enabled: Optional[bool] = None,
-        queue_stalled_enabled: Optional[bool] = None,
-        queue_stalled_minutes: Optional[int] = None,
-        rename_partial_files: Optional[bool] = None,
-        script_torrent_added_filename: Optional[str] = None,
-        script_torrent_added_enabled: Optional[bool] = None,
-        script_torrent_done_filename: Optional[str] = None,
-        script_torrent_done_enabled: Optional[bool] = None,
-        script_torrent_done_seeding_filename: Optional[str] = None,
-        script_torrent_done_seeding_enabled: Optional[bool] = None,
-        seedRatioLimit: Optional[float] = None,
-        seedRatioLimited: Optional[bool] = None,
-        seed_queue_size: Optional[int] = None,
-        seed_queue_enabled: Optional[bool] = None,
-        speed_limit_down: Optional[int] = None,
-        speed_limit_down_enabled: Optional[bool] = None,
-        speed_limit_up: Optional[int] = None,
-        speed_limit_up_enabled: Optional[bool] = None,
-        start_added_torrents: Optional[bool] = None,
-        trash_original_torrent_files: Optional[bool] = None,
-        units: Optional[dict] = None,
-        utp_enabled: Optional[bool] = None,
-    ):
-        """
-
-        :param alt_speed_down:
-        :param alt_speed_enabled:
-        :param alt_speed_time_begin:
-        :param alt_speed_time_enabled:
-        :param alt_speed_time_end:
-        :param alt_speed_time_day:
-        :param alt_speed_up:
-        :param blocklist_url:
-        :param blocklist_enabled:
-        :param cache_size_mb:
-        :param default_trackers: announce URLs, one per line, and a blank line between tiers.
-        :param download_dir:
-        :param download_queue_size:
-        :param download_queue_enabled:
-        :param dht_enabled:
-        :param encryption:
-        :param idle_seeding_limit:
-        :param idle_seeding_limit_enabled:
-        :param incomplete_dir:
-        :param incomplete_dir_enabled:
-        :param lpd_enabled:
-        :param peer_limit_global:
-        :param peer_limit_per_torrent:
-        :param pex_enabled:
-        :param peer_port:
-        :param peer_port_random_on_start:
-        :param port_forwarding_enabled:
-        :param queue_stalled_enabled:
-        :param queue_stalled_minutes:
-        :param rename_partial_files:
-        :param script_torrent_added_filename: whether or not to call the added script
-        :param script_torrent_added_enabled: filename of the script to run
-        :param script_torrent_done_filename:
-        :param script_torrent_done_enabled:
-        :param script_torrent_done_seeding_filename: filename of the script to run
-        :param script_torrent_done_seeding_enabled: whether or not to call the seeding-done script
-        :param seedRatioLimit:
-        :param seedRatioLimited:
-        :param seed_queue_size:
-        :param seed_queue_enabled:
-        :param speed_limit_down:
-        :param speed_limit_down_enabled:
-        :param speed_limit_up:
-        :param speed_limit_up_enabled:
-        :param start_added_torrents:
-        :param trash_original_torrent_files:
-        :param units:
-        :param utp_enabled:
-        :return: Response arguments: none
-        """
-        arguments = {
-            "alt-speed-down": alt_speed_down,
-            "alt-speed-enabled": alt_speed_enabled,
-            "alt-speed-time-begin": alt_speed_time_begin,
-            "alt-speed-time-enabled": alt_speed_time_enabled,
-            "alt-speed-time-end": alt_speed_time_end,
-            "alt-speed-time-day": alt_speed_time_day,
-            "alt-speed-up": alt_speed_up,
-            "blocklist-url": blocklist_url,
-            "blocklist-enabled": blocklist_enabled,
-            "cache-size-mb": cache_size_mb,
-            "default-trackers": default_trackers,
-            "download-dir": download_dir,
-            "download-queue-size": download_queue_size,
-            "download-queue-enabled": download_queue_enabled,
-            "dht-enabled": dht_enabled,
-            "encryption": encryption,
-            "idle-seeding-limit": idle_seeding_limit,
-            "idle-seeding-limit-enabled": idle_seeding_limit_enabled,
-            "incomplete-dir": incomplete_dir,
-            "incomplete-dir-enabled": incomplete_dir_enabled,
-            "lpd-enabled": lpd_enabled,
-            "peer-limit-global": peer_limit_global,
-            "peer-limit-per-torrent": peer_limit_per_torrent,
-            "pex-enabled": pex_enabled,
-            "peer-port": peer_port,
-            "peer-port-random-on-start": peer_port_random_on_start,
-            "port-forwarding-enabled": port_forwarding_enabled,
-            "queue-stalled-enabled": queue_stalled_enabled,
-            "queue-stalled-minutes": queue_stalled_minutes,
-            "rename-partial-files": rename_partial_files,
-            "script-torrent-added-filename": script_torrent_added_filename,
-            "script-torrent-added-enabled": script_torrent_added_enabled,
-            "script-torrent-done-filename": script_torrent_done_filename,
-            "script-torrent-done-enabled": script_torrent_done_enabled,
-            "script-torrent-done-seeding-filename": script_torrent_done_seeding_filename,
-            "script-torrent-done-seeding-enabled": script_torrent_done_seeding_enabled,
-            "seedRatioLimit": seedRatioLimit,
-            "seedRatioLimited": seedRatioLimited,
-            "seed-queue-size": seed_queue_size,
-            "seed-queue-enabled": seed_queue_enabled,
-            "speed-limit-down": speed_limit_down,
-            "speed-limit-down-enabled": speed_limit_down_enabled,
-            "speed-limit-up": speed_limit_up,
-            "speed-limit-up-enabled": speed_limit_up_enabled,
-            "start-added-torrents": start_added_torrents,
-            "trash-original-torrent-files": trash_original_torrent_files,
-            "units": units,
-            "utp-enabled": utp_enabled,
-        }
-        return await self.rpc("session-set", arguments)
-
-    # 4.1.2.  Accessors
-    async def session_get(self, fields: Optional[List[str]] = None):
-        """
-
-         :param fields: an optional "fields" array of keys (see 4.1)
-         :return: Response arguments: key/value pairs matching the request's "fields"
-        argument if present, or all supported fields (see 4.1) otherwise.
-        """
-        arguments = {"fields": fields}
-        return await self.rpc("session-get", arguments)
-
-    # 4.2.  Session Statistics
-    async def session_stats(self):
-        """
-
-        :return:
-        Response arguments:
-
-           string                     | value type
-           ---------------------------+-------------------------------------------------
-           "activeTorrentCount"       | number
-           "downloadSpeed"            | number
-           "pausedTorrentCount"       | number
-           "torrentCount"             | number
-           "uploadSpeed"              | number
-           ---------------------------+-------------------------------+
-           "cumulative-stats"         | object, containing:           |
-                                      +------------------+------------+
-                                      | uploadedBytes    | number     | tr_session_stats
-                                      | downloadedBytes  | number     | tr_session_stats
-                                      | filesAdded       | number     | tr_session_stats
-                                      | sessionCount     | number     | tr_session_stats
-                                      | secondsActive    | number     | tr_session_stats
-           ---------------------------+-------------------------------+
-           "current-stats"            | object, containing:           |
-                                      +------------------+------------+
-                                      | uploadedBytes    | number     | tr_session_stats
-                                      | downloadedBytes  | number     | tr_session_stats
-                                      | filesAdded       | number     | tr_session_stats
-                                      | sessionCount     | number     | tr_session_stats
-                                      | secondsActive    | number     | tr_session_stats
-        """
-        arguments = {}
-        return await self.rpc("session-stats", arguments)
-
-    # 4.3.  Blocklist
-    async def blocklist_update(self):
-        """
-
-        :return:  Response arguments: a number "blocklist-size"
-        """
-        arguments = {}
-        return await self.rpc("blocklist-update", arguments)
-
-    # 4.4.  Port Checking
-    async def port_test(self, ipProtocol: Optional[Literal["ipv4", "ipv6"]] = None):
-        """
-            This method tests to see if your incoming peer port is accessible
-         from the outside world.
-        :return: Response arguments:  "port-is-open" ipProtocol	string
-        """
-        arguments = {"ipProtocol": ipProtocol}
-        return await self.rpc("port-test", arguments)
-
-    # 4.5.  Session shutdown
-    async def session_close(self):
-        """
-         This method tells the transmission session to shut down.
-        :return:  Response arguments: none
-        """
-        arguments = {}
-        return await self.rpc("session-close", arguments)
-
-    # 4.6.  Queue Movement Requests
-    async def queue_move_top(
-        self,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-    ):
-        """
-        :param ids:  array   torrent list, as described in 3.1.
-        :return:  Response arguments: none
+    # 5.0.  Protocol Versions
 
+    async def capabilities(self) -> Capabilities:
         """
-        arguments = {"ids": ids}
-        return await self.rpc("queue-move-top", arguments)
-
-    async def queue_move_up(
-        self,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-    ):
-        arguments = {"ids": ids}
-        return await self.rpc("queue-move-up", arguments)
-
-    async def queue_move_down(
-        self,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-    ):
-        arguments = {"ids": ids}
-        return await self.rpc("queue-move-down", arguments)
-
-    async def queue_move_bottom(
-        self,
-        ids: Optional[
-            Union[int, List[Union[int, str]], Literal["recently-active"]]
-        ] = None,
-    ):
-        arguments = {"ids": ids}
-        return await self.rpc("queue-move-bottom", arguments)
-
-    # 4.7.  Free Space
-    async def free_space(self, path: str):
+        The daemon's capability profile, read once per daemon with a session-get
+        handshake
         """
+        profile = PROFILES.get(self.daemon)
+        if profile is None:
+            data = await self.send_request(
+                Request(
+                    method="session-get",
+                    arguments={"fields": HANDSHAKE_FIELDS},
+                    tag=self.tag(),
+                )  # type: ignore
+            )
+            profile = PROFILES[self.daemon] = Capabilities.from_session(data)
+        return profile
 
-             :param path: string  the directory to query
-             :return: Response arguments:
-
-        string      | value type & description
-        ------------+----------------------------------------------------------
-        "path"      | string  same as the Request argument
-        "size-bytes"| number  the size, in bytes, of the free space in that directory
-
-        """
-        arguments = {"path": path}
-        return await self.rpc("free-space", arguments)
-
-    # 4.8.  Bandwidth groups
-    async def group_set(
+    async def rpc(
         self,
-        honorsSessionLimits: Optional[bool] = None,
-        name: Optional[str] = None,
-        speed_limit_down_enabled: Optional[bool] = None,
-        speed_limit_down: Optional[int] = None,
-        speed_limit_up_enabled: Optional[bool] = None,
-        speed_limit_up: Optional[int] = None,
+        method: str,
+        arguments: dict,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        priority: Optional[str] = None,
     ):
-        arguments = {
-            "honorsSessionLimits": honorsSessionLimits,
-            "name": name,
-            "speed_limit_down_enabled": speed_limit_down_enabled,
-            "speedlimit-down": speed_limit_down,
-            "speed-limit-up-enabled": speed_limit_up_enabled,
-            "speed-limit-up": speed_limit_up,
-        }
-        return await self.rpc("group-set", arguments)
-
-    async def group_get(self, group: Optional[Union[str, List[str]]] = None):
-        """
-        :param group: either a string naming the bandwidth group, or a list of such strings.
-         If group is omitted, all bandwidth groups are used.
         """
-        arguments = {"group": group}
-        return await self.rpc("group-get", arguments)
-
-    # 5.0.  Protocol Versions
-
-    async def rpc(self, method: str, arguments: dict):
-        arguments = {k: v for k, v in arguments.items() if v}
+        :param method: rpc method name
+        :param arguments: request arguments, sent as they are. Unlike earlier
+         releases, falsy values are not dropped: ``False``, ``0`` and ``[]`` reach the
+         daemon, so ``ids=[]`` selects no torrent where a missing ``ids`` selects
+         all of them. The generated methods leave out parameters that are None.
+        :param timeout: seconds this call may take, on top of the ambient deadline
+        :param deadline: absolute ``time.monotonic()`` by which it must complete
+        :param priority: scheduler lane, instead of the ambient one
+        """
+        if timeout is None and deadline is None and priority is None:
+            return await self.call(method, arguments)
+        token = DEADLINE.set(effective(timeout, deadline))
+        lane = PRIORITY.set(priority) if priority is not None else None
+        try:
+            return await self.call(method, arguments)
+        finally:
+            if lane is not None:
+                PRIORITY.reset(lane)
+            DEADLINE.reset(token)
+
+    async def call(self, method: str, arguments: dict):
+        if self.negotiate:
+            arguments = (await self.capabilities()).adapt(method, arguments)
         request = Request(
             method=method, arguments=arguments, tag=self.tag()
         )  # type: ignore
@@ -974,27 +222,136 @@ class TransmissionClient(_BaseTransmissionClient):
         password: Optional[str] = None,
         url: Optional[str] = DEFAULT_HOST,
         tag: Optional[TagFactory] = None,
-        timeout: Union[int, float, aiohttp.ClientTimeout] = DEFAULT_TIMEOUT,
+        timeout: Union[int, float, "aiohttp.ClientTimeout"] = DEFAULT_TIMEOUT,
+        negotiate: bool = False,
+        accept_encoding: Optional[str] = None,
+        compress_requests: Optional[Literal["gzip", "deflate"]] = None,
+        compress_threshold: int = DEFAULT_COMPRESS_THRESHOLD,
+        metrics: Optional[RequestHooks] = None,
+        codec: Union[str, Codec, None] = None,
+        session: Optional["aiohttp.ClientSession"] = None,
+        pool: Optional[PoolSettings] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Union[bool, CircuitBreaker] = False,
+        scheduler: Optional[Scheduler] = None,
         **kwargs,
     ):
-        super().__init__(username, password, url, tag)
-        self.timeout = (
-            aiohttp.ClientTimeout(total=timeout)
-            if isinstance(timeout, (int, float))
-            else timeout
-        )
+        """
+        :param negotiate: read the daemon's capabilities once, then drop unsupported
+         arguments before sending and use the table format for torrent-get
+        :param accept_encoding: response encodings to offer, defaults to every one
+         aiohttp can decode (zstd and br when their modules are importable)
+        :param compress_requests: compress request bodies with this encoding,
+         the daemon must accept compressed bodies, e.g. behind a reverse proxy
+        :param compress_threshold: only compress bodies at least this many bytes long,
+         in practice large torrent-add metainfo
+        :param metrics: receives timings and sizes of every exchange,
+         e.g. ``aiotr.metrics.MetricsRecorder``
+        :param codec: json codec or its name, see ``aiotr.codec``; defaults to the
+         fastest installed one, or to the ``loads``/``dumps`` keyword arguments
+        :param session: share this ``aiohttp.ClientSession`` instead of creating one
+         on the first request, ``close()`` leaves it open; unix sockets and
+         metrics tracing then need to be configured on it by the caller
+        :param pool: connection pool size, keep-alive, pre-warming and idle checks
+        :param retry: when to resend after connection failures and timeouts,
+         by default idempotent methods are tried up to 3 times
+        :param breaker: fail fast while the daemon is down, True shares one
+         ``CircuitBreaker`` per daemon between clients
+        :param scheduler: queue requests in weighted priority lanes, see
+         ``aiotr.scheduler``
+        """
+        super().__init__(username, password, url, tag, negotiate)
+        self.timeout = timeout  # a ClientTimeout once the session exists
         self.headers = {
             "X-Transmission-Session-Id": "",
             "Host": "localhost",
+            "Content-Type": "application/json",
         }  # todo need update and verify
+        self.accept_encoding = accept_encoding
+        self.compress_requests = compress_requests
+        self.compress_threshold = compress_threshold
         self.kwargs = kwargs  # 用于session.post
-        self.loads = (
-            self.kwargs.pop("loads") if "loads" in self.kwargs else DEFAULT_JSON_DECODER
-        )  # json serialize
-        self.dumps = (
-            self.kwargs.pop("dumps") if "dumps" in self.kwargs else DEFAULT_JSON_ENCODER
+        if isinstance(codec, str):
+            codec = get_codec(codec)
+        elif codec is None and ("loads" in kwargs or "dumps" in kwargs):
+            codec = Codec(
+                "custom",
+                kwargs.pop("dumps", DEFAULT_JSON_ENCODER),
+                kwargs.pop("loads", DEFAULT_JSON_DECODER),
+                text=True,  # user functions got str before codecs existed
+            )
+        self.codec = codec or DEFAULT_CODEC
+        self.jsonrpc: Optional[bool] = None  # None means not detected yet
+        self.metrics = metrics
+        self.external_session = session
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self.pool = pool or PoolSettings()
+        self.retry = retry or RetryPolicy()
+        if breaker is True:
+            breaker = BREAKERS.setdefault(self.daemon, CircuitBreaker())
+        self.breaker: Optional[CircuitBreaker] = breaker or None
+        self.scheduler = scheduler
+        self.last_used = 0.0
+        self._idle_task: Optional[asyncio.Task] = None
+        self.inflight: Set["asyncio.Future[bytes]"] = set()
+
+    @property
+    def client_session(self) -> "aiohttp.ClientSession":
+        """
+        The ``aiohttp.ClientSession``, set up on first use so that clients which
+        never send a request do not import aiohttp at all
+        """
+        if self._session is None:
+            self._session = self.create_session()
+        return self._session
+
+    def create_session(self) -> "aiohttp.ClientSession":
+        import aiohttp
+
+        if isinstance(self.timeout, (int, float)):
+            self.timeout = aiohttp.ClientTimeout(total=self.timeout)
+        self.headers["Accept-Encoding"] = (
+            self.accept_encoding or default_accept_encoding()
         )
-        self.client_session = aiohttp.ClientSession(json_serialize=self.dumps)
+        if self.pool.idle_check:
+            self._idle_task = asyncio.ensure_future(self.check_idle())
+        if self.external_session is not None:
+            return self.external_session
+        connector = make_connector(self.pool, self.unix_socket)
+        metrics = self.metrics
+        trace_config = metrics.trace_config() if metrics is not None else None
+        return aiohttp.ClientSession(
+            connector=connector,
+            trace_configs=[trace_config] if trace_config is not None else None,
+        )
+
+    async def ping(self) -> None:
+        await self.rpc("session-get", {"fields": ["rpc-version"]})
+
+    async def prewarm(self, connections: Optional[int] = None) -> None:
+        """
+        Do the session-id handshake and open ``connections`` pooled connections
+        (``pool.prewarm`` by default) with concurrent cheap requests
+        """
+        count = connections if connections is not None else self.pool.prewarm
+        await asyncio.gather(*(self.ping() for _ in range(max(count, 1))))
+
+    async def check_idle(self) -> None:
+        interval = self.pool.idle_check
+        assert interval
+        while True:
+            idle = perf_counter() - self.last_used
+            if idle < interval:
+                await asyncio.sleep(interval - idle)
+                continue
+            # counts as use even when the ping fails fast, e.g. while the
+            # circuit breaker is open, so that the loop sleeps before retrying
+            self.last_used = perf_counter()
+            try:
+                await self.ping()
+            except Exception:
+                # a broken connection is dropped by aiohttp, the next one is fresh
+                logger.debug("idle check of %s failed", self.daemon, exc_info=True)
 
     @property
     def host(self):
@@ -1012,47 +369,432 @@ class TransmissionClient(_BaseTransmissionClient):
     def session_id(self, session_id: str):
         self.headers.update({"X-Transmission-Session-Id": session_id})
 
-    async def send_request(self, request: Request) -> Union[dict, NoReturn, None]:
+    @property
+    def loads(self) -> Callable[[Any], Any]:
+        """
+        Deprecated, the ``loads`` of ``self.codec``
         """
+        warnings.warn(
+            "client.loads is deprecated, use client.codec.loads",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return self.codec.loads
+
+    @loads.setter
+    def loads(self, loads: Callable[[str], Any]):
+        warnings.warn(
+            "setting client.loads is deprecated, pass codec= instead",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        self.codec = Codec("custom", self.codec._dumps, loads, text=True)
 
-        :param request:
-        :return:
+    @property
+    def dumps(self) -> Callable[[Any], bytes]:
         """
-        while True:
+        Deprecated, the ``dumps`` of ``self.codec``, which returns bytes
+        """
+        warnings.warn(
+            "client.dumps is deprecated, use client.codec.dumps",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return self.codec.dumps
+
+    @dumps.setter
+    def dumps(self, dumps: Callable[[Any], Union[str, bytes]]):
+        warnings.warn(
+            "setting client.dumps is deprecated, pass codec= instead",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        self.codec = Codec("custom", dumps, self.codec._loads, text=True)
+
+    async def supports_jsonrpc(self) -> bool:
+        """
+        Whether the daemon accepts JSON-RPC 2.0 payloads, detected once through
+        session-get's "rpc-version" unless ``self.jsonrpc`` is set explicitly.
+        """
+        if self.jsonrpc is None:
+            self.jsonrpc = (await self.capabilities()).jsonrpc
+        return self.jsonrpc
+
+    async def call(self, method: str, arguments: dict):
+        if (
+            method == "torrent-get"
+            and self.negotiate
+            and not arguments.get("format")
+            and not self.codec.typed
+            and (await self.capabilities()).table_format
+        ):
+            # smaller on the wire and cheaper for the daemon to generate
+            data = await super().call(method, {**arguments, "format": "table"})
+            return table_to_objects(data)
+        return await super().call(method, arguments)
+
+    async def post(
+        self, payload: Union[str, bytes], record: Optional[RequestRecord] = None
+    ) -> bytes:
+        """
+        ``_post`` in its own task, bounded by the ambient deadline. A caller which
+        is cancelled or runs out of time stops waiting while the exchange finishes
+        in the background, so the connection returns to the pool instead of being
+        closed half-read.
+
+        :raise TransmissionTimeoutException: the deadline passed before sending
+         or before the response arrived
+        """
+        left = remaining()
+        if left is not None and left <= 0:
+            raise TransmissionTimeoutException(
+                "deadline passed before sending to {}".format(self.daemon)
+            )
+        task = asyncio.ensure_future(self._post(payload, record))
+        self.inflight.add(task)
+        task.add_done_callback(self._forget)
+        if left is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), left)
+        except asyncio.TimeoutError:
+            raise TransmissionTimeoutException(
+                "deadline passed waiting for {}".format(self.daemon)
+            ) from None
+
+    def _forget(self, task: "asyncio.Future[bytes]") -> None:
+        self.inflight.discard(task)
+        if not task.cancelled():
+            task.exception()  # retrieved even when nobody waits any more
+
+    async def _post(
+        self, payload: Union[str, bytes], record: Optional[RequestRecord] = None
+    ) -> bytes:
+        """
+        POST a serialized payload, redoing the session-id handshake on 409 up to
+        ``retry.session_retries`` times
+
+        :param payload: serialized request body
+        :param record: filled with wire timings and sizes when metrics are enabled
+        :return: the raw response body, decompressed while streaming by aiohttp
+        """
+        import aiohttp
+
+        client_session = self.client_session
+        self.last_used = perf_counter()
+        encoding = None
+        if self.compress_requests and len(payload) >= self.compress_threshold:
+            encoding = self.compress_requests
+            payload = compress(payload, encoding)
+        if record is not None:
+            record.request_bytes = len(payload)
+        for _ in range(self.retry.session_retries + 1):
+            headers = (
+                {**self.headers, "Content-Encoding": encoding}
+                if encoding
+                else self.headers
+            )
+            start = perf_counter() if record is not None else 0.0
             try:
-                async with self.client_session.post(
+                async with client_session.post(
                     self.url,
-                    json=request,
-                    headers=self.headers,
+                    data=payload,
+                    headers=headers,
                     timeout=self.timeout,
+                    trace_request_ctx=record,
                     **self.kwargs,
                 ) as resp:
+                    if record is not None:
+                        record.wire += perf_counter() - start
                     if "X-Transmission-Session-Id" in resp.headers:
                         self.session_id = resp.headers["X-Transmission-Session-Id"]
                     if resp.status == 409:
+                        if record is not None:
+                            record.retries += 1
                         continue
                     elif resp.status == 421:
                         raise TransmissionMisdirectedException(await resp.text())
                     elif resp.status == 401:
                         raise TransmissionUnauthorizedException(await resp.text())
-                    try:
-                        data: Response = self.loads(await resp.text())
-                        if data["tag"] != request["tag"]:
-                            raise TransmissionException(
-                                "unexpected tag: {}".format(data["tag"])
-                            )
-                        if data["result"] != "success":
-                            raise TransmissionException(
-                                "unexpected result: {}".format(data)
-                            )
-                        return data["arguments"]
-                    # 没有result就是异常
-                    except KeyError:
-                        raise TransmissionException(
-                            "unexpected result: {}".format(data)
-                        )
+                    if record is None:
+                        return await resp.read()
+                    start = perf_counter()
+                    body = await resp.read()
+                    record.read = perf_counter() - start
+                    record.response_bytes = len(body)
+                    return body
+            except asyncio.TimeoutError as err:
+                raise TransmissionTimeoutException(
+                    "no response from {} in time".format(self.daemon)
+                ) from err
             except aiohttp.ClientConnectionError as err:
                 raise TransmissionConnectException(str(err)) from err
+        raise TransmissionException(
+            "session id still rejected after {} renewals".format(
+                self.retry.session_retries
+            )
+        )
+
+    async def exchange(
+        self,
+        payload: Union[str, bytes],
+        methods: Sequence[str],
+        record: Optional[RequestRecord] = None,
+    ) -> bytes:
+        """
+        ``post`` guarded by the circuit breaker, retried per ``self.retry`` when
+        every method in the payload is idempotent
+
+        :param methods: the rpc methods carried by ``payload``
+        """
+        retry, breaker = self.retry, self.breaker
+        retryable = retry.retryable(methods)
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.before(self.daemon)
+            try:
+                body = await self.post(payload, record)
+            except TransmissionConnectException:
+                left = remaining()
+                if breaker is None:
+                    pass
+                elif left is None or left > 0:
+                    breaker.failure()
+                else:
+                    # running out of the caller's own budget is not the daemon's fault
+                    breaker.release()
+                attempt += 1
+                if not retryable or attempt >= retry.attempts:
+                    raise
+                delay = retry.backoff(attempt - 1)
+                if left is not None and left <= delay:
+                    raise
+            except asyncio.CancelledError:
+                if breaker is not None:
+                    breaker.release()
+                raise
+            except BaseException:
+                # the daemon answered, e.g. with 401
+                if breaker is not None:
+                    breaker.success()
+                raise
+            else:
+                if breaker is not None:
+                    breaker.success()
+                return body
+            await asyncio.sleep(delay)
+
+    async def roundtrip(
+        self,
+        method: str,
+        message,
+        check: Callable[[Any], T],
+        methods: Optional[Sequence[str]] = None,
+        scheduled: float = 0.0,
+    ) -> T:
+        """
+        Serialize ``message``, post it and hand the decoded response to ``check``,
+        reporting a ``RequestRecord`` to ``self.metrics`` when set
+
+        :param method: rpc method name, "batch" for JSON-RPC batches
+        :param methods: the rpc methods in ``message``, ``(method,)`` by default
+        :param scheduled: seconds spent waiting for a ``self.scheduler`` slot
+        """
+        codec = self.codec
+        methods = methods or (method,)
+        if self.metrics is None:
+            body = await self.exchange(codec.dumps(message), methods)
+            return check(codec.decoder(method)(body))
+        record = RequestRecord(self.daemon, method)
+        record.schedule = scheduled
+        try:
+            start = perf_counter()
+            payload = codec.dumps(message)
+            record.serialize = perf_counter() - start
+            body = await self.exchange(payload, methods, record)
+            start = perf_counter()
+            result = check(codec.decoder(method)(body))
+            record.parse = perf_counter() - start
+            return result
+        except BaseException as err:
+            record.result = type(err).__name__
+            raise
+        finally:
+            self.metrics.on_request(record)
+
+    @staticmethod
+    def check_response(request: Request, data: Response) -> Optional[dict]:
+        try:
+            if data["tag"] != request["tag"]:
+                raise TransmissionException("unexpected tag: {}".format(data["tag"]))
+            if data["result"] != "success":
+                raise TransmissionException("unexpected result: {}".format(data))
+            return data["arguments"]
+        # 没有result就是异常
+        except KeyError:
+            raise TransmissionException("unexpected result: {}".format(data))
+
+    @staticmethod
+    def check_batch(
+        requests: List[Request], data: List[JsonRpcResponse]
+    ) -> List[Union[dict, None, BaseException]]:
+        if not isinstance(data, list):
+            # the whole batch was rejected, e.g. a parse error
+            raise TransmissionException("unexpected result: {}".format(data))
+        responses = {item.get("id"): item for item in data}
+        results: List[Union[dict, None, BaseException]] = []
+        for request in requests:
+            item = responses.get(request["tag"])
+            if item is None:
+                results.append(
+                    TransmissionException(
+                        "missing response for tag: {}".format(request["tag"])
+                    )
+                )
+            elif "error" in item:
+                results.append(
+                    TransmissionException("unexpected result: {}".format(item["error"]))
+                )
+            else:
+                results.append(item.get("result"))
+        return results
+
+    async def send_request(self, request: Request) -> Union[dict, NoReturn, None]:
+        """
+
+        :param request:
+        :return:
+        """
+        scheduler = self.scheduler
+        if scheduler is None:
+            return await self.roundtrip(
+                request["method"],
+                request,
+                lambda data: self.check_response(request, data),
+            )
+        start = perf_counter()
+        await scheduler.acquire()
+        try:
+            return await self.roundtrip(
+                request["method"],
+                request,
+                lambda data: self.check_response(request, data),
+                scheduled=perf_counter() - start,
+            )
+        finally:
+            scheduler.release()
+
+    async def send_batch(
+        self, requests: List[Request]
+    ) -> List[Union[dict, None, BaseException]]:
+        """
+        Send several requests at once. Daemons speaking JSON-RPC 2.0 get a single
+        batch POST, older ones get the requests concurrently.
+
+        :param requests:
+        :return: the response arguments, or the exception raised, of each request in order
+        """
+        if not requests:
+            return []
+        if not await self.supports_jsonrpc():
+            return await asyncio.gather(
+                *(self.send_request(request) for request in requests),
+                return_exceptions=True,
+            )
+        payload = [
+            JsonRpcRequest(
+                jsonrpc="2.0",
+                method=request["method"],
+                params=request["arguments"],
+                id=request["tag"],
+            )
+            for request in requests
+        ]
+        start = perf_counter()
+        if self.scheduler is not None:
+            await self.scheduler.acquire()
+        try:
+            return await self.roundtrip(
+                "batch",
+                payload,
+                lambda data: self.check_batch(requests, data),
+                [request["method"] for request in requests],
+                perf_counter() - start,
+            )
+        finally:
+            if self.scheduler is not None:
+                self.scheduler.release()
+
+    def batch(self) -> "TransmissionBatch":
+        """
+        Collect rpc calls and send them together on exit::
+
+            async with client.batch() as batch:
+                stats = await batch.session_stats()
+                torrents = await batch.torrent_get(["id", "name"])
+            print(stats.result(), torrents.result())
+        """
+        return TransmissionBatch(self)
+
+    async def __aenter__(self):
+        if self.pool.prewarm:
+            await self.prewarm()
+        return self
+
+    async def close(self) -> None:
+        if self._idle_task is not None:
+            self._idle_task.cancel()
+            self._idle_task = None
+        for task in list(self.inflight):
+            task.cancel()
+        if self._session is not None and self.external_session is None:
+            await self._session.close()
+        self._session = None
+
+
+class TransmissionBatch(_BaseTransmissionClient):
+    """
+    Every rpc method returns an ``asyncio.Future`` instead of the response,
+    resolved once the batch is sent when leaving the ``async with`` block.
+    """
+
+    def __init__(self, client: TransmissionClient):
+        self.client = client
+        self.tag = client.tag
+        self.negotiate = client.negotiate
+        self.pending: List[Tuple[Request, asyncio.Future]] = []
+
+    async def send_request(self, request: Request) -> asyncio.Future:  # type: ignore
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((request, future))
+        return future
+
+    async def capabilities(self) -> Capabilities:
+        return await self.client.capabilities()
+
+    async def flush(self) -> None:
+        pending, self.pending = self.pending, []
+        try:
+            results = await self.client.send_batch([request for request, _ in pending])
+        except BaseException as err:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(err)
+            raise
+        for (_, future), result in zip(pending, results):
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
 
     async def close(self) -> None:
-        await self.client_session.close()  # type: ignore
+        for _, future in self.pending:
+            future.cancel()
+        self.pending = []
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            await self.flush()
+        else:
+            await self.close()
@@ -0,0 +1,171 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Bytes-in/bytes-out json codecs. The fastest installed one of orjson, msgspec,
+simdjson and ujson is picked at import, stdlib json otherwise; set
+``AIOTR_JSON=<name>`` to force one.
+"""
+
+import os
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from aiotr.utils import DEFAULT_JSON_DECODER, DEFAULT_JSON_ENCODER
+
+PREFERENCE = ("orjson", "msgspec", "simdjson", "ujson", "json")
+
+
+class Codec:
+    """
+    :param name: shown in metrics and benchmarks
+    :param dumps: object to bytes, a str result is utf-8 encoded
+    :param loads: bytes to object
+    :param binary: ``dumps`` already returns bytes
+    :param text: ``loads`` takes str, bodies are decoded from utf-8 for it
+    """
+
+    def __init__(
+        self,
+        name: str,
+        dumps: Callable[[Any], Union[str, bytes]],
+        loads: Callable[[Any], Any],
+        binary: bool = False,
+        text: bool = False,
+    ):
+        self.name = name
+        self.loads = loads
+        self._dumps = dumps
+        self._loads = loads
+        if binary:
+            self.dumps = dumps  # type: ignore
+        if text:
+            self.loads = self._loads_text
+
+    def _loads_text(self, data: Union[str, bytes]) -> Any:
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode("utf-8")
+        return self._loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        data = self._dumps(obj)
+        return data.encode() if isinstance(data, str) else data
+
+    def decoder(self, method: str) -> Callable[[bytes], Any]:
+        """
+        The decoder for responses to ``method``
+        """
+        return self.loads
+
+    @property
+    def typed(self) -> bool:
+        """
+        Whether torrent-get responses decode into typed objects, which needs the
+        "objects" format
+        """
+        return False
+
+    def __repr__(self) -> str:
+        return "<{} {}>".format(self.__class__.__name__, self.name)
+
+
+class MsgspecCodec(Codec):
+    """
+    :param torrent_type: decode each torrent of torrent-get responses into this
+     type, e.g. a ``msgspec.Struct`` with the requested fields
+    """
+
+    def __init__(self, torrent_type: Optional[type] = None):
+        import msgspec
+
+        encoder = msgspec.json.Encoder()
+        super().__init__("msgspec", encoder.encode, msgspec.json.decode, binary=True)
+        self.torrent_type = torrent_type
+        self.torrent_get = None
+        if torrent_type is not None:
+            from typing_extensions import TypedDict
+
+            arguments = TypedDict(  # type: ignore
+                "TorrentGetArguments",
+                {"torrents": List[torrent_type], "removed": List[int]},  # type: ignore
+                total=False,
+            )
+            response = TypedDict(  # type: ignore
+                "TorrentGetResponse",
+                {"result": str, "tag": Any, "arguments": arguments},
+                total=False,
+            )
+            self.torrent_get = msgspec.json.Decoder(response).decode
+
+    def decoder(self, method: str) -> Callable[[bytes], Any]:
+        if method == "torrent-get" and self.torrent_get is not None:
+            return self.torrent_get
+        return self.loads
+
+    @property
+    def typed(self) -> bool:
+        return self.torrent_get is not None
+
+
+def _orjson() -> Codec:
+    import orjson
+
+    return Codec("orjson", orjson.dumps, orjson.loads, binary=True)
+
+
+def _simdjson() -> Codec:
+    import simdjson
+
+    return Codec("simdjson", DEFAULT_JSON_ENCODER, simdjson.loads)
+
+
+def _ujson() -> Codec:
+    import ujson
+
+    return Codec("ujson", ujson.dumps, ujson.loads)
+
+
+def _json() -> Codec:
+    return Codec("json", DEFAULT_JSON_ENCODER, DEFAULT_JSON_DECODER)
+
+
+FACTORIES: Dict[str, Callable[[], Codec]] = {
+    "orjson": _orjson,
+    "msgspec": MsgspecCodec,
+    "simdjson": _simdjson,
+    "ujson": _ujson,
+    "json": _json,
+}
+
+
+def get_codec(name: str) -> Codec:
+    """
+    :raise ImportError: when the library is not installed
+    """
+    return FACTORIES[name]()
+
+
+def available() -> List[str]:
+    names = []
+    for name in PREFERENCE:
+        try:
+            get_codec(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def detect() -> Codec:
+    """
+    The fastest installed codec, honouring ``AIOTR_JSON``
+    """
+    forced = os.environ.get("AIOTR_JSON")
+    names = (forced,) + PREFERENCE if forced in FACTORIES else PREFERENCE
+    for name in names:
+        try:
+            return get_codec(name)  # type: ignore
+        except ImportError:
+            continue
+    raise AssertionError("stdlib json is always importable")
+
+
+DEFAULT_CODEC = detect()
@@ -0,0 +1,59 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Ambient request deadlines. Every rpc sent inside ``with deadline(2.0):`` must
+complete within 2 seconds from entering the block, nested blocks can only
+shorten it::
+
+    with deadline(2.0):
+        await client.torrent_get(["id"])
+        await client.session_stats(timeout=0.5)
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# absolute time.monotonic() by which the current request must be answered
+DEADLINE: ContextVar[Optional[float]] = ContextVar("aiotr_deadline", default=None)
+
+
+def effective(
+    timeout: Optional[float] = None, at: Optional[float] = None
+) -> Optional[float]:
+    """
+    The earliest of the ambient deadline, ``at`` and ``timeout`` seconds from now
+    """
+    result = DEADLINE.get()
+    if at is not None and (result is None or at < result):
+        result = at
+    if timeout is not None:
+        at = time.monotonic() + timeout
+        if result is None or at < result:
+            result = at
+    return result
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left before the ambient deadline, None without one
+    """
+    at = DEADLINE.get()
+    return None if at is None else at - time.monotonic()
+
+
+@contextmanager
+def deadline(
+    timeout: Optional[float] = None, at: Optional[float] = None
+) -> Iterator[Optional[float]]:
+    """
+    :param timeout: seconds from now
+    :param at: absolute ``time.monotonic()`` value
+    :return: the deadline in effect inside the block
+    """
+    token = DEADLINE.set(effective(timeout, at))
+    try:
+        yield DEADLINE.get()
+    finally:
+        DEADLINE.reset(token)
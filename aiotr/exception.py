@@ -45,3 +45,19 @@ class TransmissionUnauthorizedException(BaseTransmissionException):
 
     def __str__(self):
         return self.msg
+
+
+class TransmissionTimeoutException(TransmissionConnectException):
+    """
+    the daemon did not answer in time
+    """
+
+    pass
+
+
+class TransmissionCircuitOpenException(TransmissionConnectException):
+    """
+    the daemon failed too often recently, the request was not sent
+    """
+
+    pass
@@ -0,0 +1,361 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Stream torrents to CSV, JSON Lines, Arrow IPC or Parquet in record batches.
+The ids are listed once, then every ``batch_size`` torrents are fetched with
+their own torrent-get and written while the next batch is on the wire, so at
+most two batches are held in memory whatever the number of torrents::
+
+    rows = await export(client, "fleet.jsonl.gz", ["id", "name", "trackerStats"])
+    rows = await export(client, "fleet.parquet", FIELDS, compression="zstd")
+
+Arrow and Parquet need pyarrow, and compress inside the file ("zstd", "lz4",
+parquet also "snappy", "gzip"...). CSV and JSON Lines are compressed as a
+whole with "gzip", "bz2", "xz" or "zstd" (with zstandard installed), taken
+from the file suffix by default.
+"""
+
+import asyncio
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import os
+from typing import IO, Any, Callable, Dict, List, Optional, Sequence, Union
+
+from aiotr.codec import DEFAULT_CODEC, Codec
+
+FORMATS = ("csv", "jsonl", "arrow", "parquet")
+
+# compression -> opener of a binary file for writing
+COMPRESSORS: Dict[str, Callable[[str], IO[bytes]]] = {
+    "gzip": lambda path: gzip.open(path, "wb"),
+    "bz2": lambda path: bz2.open(path, "wb"),
+    "xz": lambda path: lzma.open(path, "wb"),
+}
+
+SUFFIXES = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".zst": "zstd",
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".parquet": "parquet",
+}
+
+
+# arrow types of torrent-get fields, so that a first batch of empty "labels" or
+# null "errorString" does not fix their column to the null type. Other fields
+# are inferred from the first batch, null types then become strings.
+ARROW_TYPES = {
+    "id": "int64",
+    "hashString": "string",
+    "name": "string",
+    "status": "int64",
+    "error": "int64",
+    "errorString": "string",
+    "labels": "list<string>",
+    "group": "string",
+    "downloadDir": "string",
+    "addedDate": "int64",
+    "activityDate": "int64",
+    "doneDate": "int64",
+    "totalSize": "int64",
+    "sizeWhenDone": "int64",
+    "leftUntilDone": "int64",
+    "haveValid": "int64",
+    "percentDone": "double",
+    "rateDownload": "int64",
+    "rateUpload": "int64",
+    "uploadedEver": "int64",
+    "downloadedEver": "int64",
+    "uploadRatio": "double",
+    "secondsSeeding": "int64",
+    "secondsDownloading": "int64",
+    "peersConnected": "int64",
+    "queuePosition": "int64",
+    "isPrivate": "bool_",
+}
+
+
+def _zstd(path: str) -> IO[bytes]:
+    import zstandard
+
+    return zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+
+
+COMPRESSORS["zstd"] = _zstd
+
+
+def as_dicts(rows: List[Any]) -> List[dict]:
+    """
+    ``rows`` with typed torrents, e.g. the ``msgspec.Struct`` of a ``MsgspecCodec``,
+    turned into dicts keyed by their rpc field names
+    """
+    if all(isinstance(row, dict) for row in rows):
+        return rows
+    import msgspec
+
+    return [row if isinstance(row, dict) else msgspec.to_builtins(row) for row in rows]
+
+
+def guess(path: str) -> tuple:
+    """
+    (format, compression) from the suffixes of ``path``, e.g. "x.csv.gz"
+    """
+    root, ext = os.path.splitext(path)
+    compression = None
+    if SUFFIXES.get(ext) in COMPRESSORS:
+        compression = SUFFIXES[ext]
+        root, ext = os.path.splitext(root)
+    return SUFFIXES.get(ext), compression
+
+
+class Writer:
+    """
+    :param stream: closed by ``close`` only when ``owned``
+    """
+
+    def __init__(
+        self, stream: IO[bytes], fields: Sequence[str], codec: Codec, owned: bool
+    ):
+        self.stream = stream
+        self.fields = fields
+        self.codec = codec
+        self.owned = owned
+
+    def write(self, rows: List[dict]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+
+class CsvWriter(Writer):
+    """
+    Lists and objects (e.g. "labels", "trackerStats") are written as json
+    """
+
+    def __init__(
+        self, stream: IO[bytes], fields: Sequence[str], codec: Codec, owned: bool
+    ):
+        super().__init__(stream, fields, codec, owned)
+        self.text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        self.writer = csv.writer(self.text)
+        self.writer.writerow(fields)
+
+    def write(self, rows: List[dict]) -> None:
+        dumps = self.codec.dumps
+        self.writer.writerows(
+            [
+                (
+                    dumps(v).decode() if isinstance(v, (list, dict)) else v
+                    for v in map(row.get, self.fields)
+                )
+                for row in rows
+            ]
+        )
+
+    def close(self) -> None:
+        if self.owned:
+            self.text.close()
+        else:
+            self.text.flush()
+            self.text.detach()
+
+
+class JsonlWriter(Writer):
+    def write(self, rows: List[dict]) -> None:
+        dumps = self.codec.dumps
+        self.stream.write(b"".join(dumps(row) + b"\n" for row in rows))
+
+    def close(self) -> None:
+        if self.owned:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+class ArrowWriter:
+    """
+    Arrow IPC file, or Parquet with ``parquet=True``. Column types come from
+    ``ARROW_TYPES``, other fields are inferred from the first batch. The file is
+    opened right away when every field is in ``ARROW_TYPES``, else on the first
+    batch; ``close`` leaves a valid file even without any row, unknown fields
+    then typed as strings.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fields: Sequence[str],
+        compression: Optional[str] = None,
+        parquet: bool = False,
+    ):
+        import pyarrow
+
+        self.pa = pyarrow
+        self.path = path
+        self.fields = list(fields)
+        self.compression = compression
+        self.parquet = parquet
+        self.writer: Any = None
+        self.schema: Any = None
+        if all(name in ARROW_TYPES for name in self.fields):
+            self._open([])
+
+    def _type(self, spec: str):
+        if spec.startswith("list<"):
+            return self.pa.list_(self._type(spec[5:-1]))
+        return getattr(self.pa, spec)()
+
+    def _promote(self, type_):
+        """
+        ``type_`` with null types, also nested ones, replaced by strings
+        """
+        pa = self.pa
+        if pa.types.is_null(type_):
+            return pa.string()
+        if pa.types.is_list(type_):
+            return pa.list_(self._promote(type_.value_type))
+        if pa.types.is_struct(type_):
+            return pa.struct([f.with_type(self._promote(f.type)) for f in type_])
+        return type_
+
+    def _schema(self, rows: List[dict]):
+        pa = self.pa
+        inferred = pa.RecordBatch.from_pylist(rows).schema if rows else pa.schema([])
+        columns = []
+        for name in self.fields:
+            if name in ARROW_TYPES:
+                type_ = self._type(ARROW_TYPES[name])
+            elif name in inferred.names:
+                type_ = self._promote(inferred.field(name).type)
+            else:
+                type_ = pa.string()
+            columns.append((name, type_))
+        return pa.schema(columns)
+
+    def _open(self, rows: List[dict]) -> None:
+        pa = self.pa
+        self.schema = self._schema(rows)
+        if self.parquet:
+            import pyarrow.parquet as pq
+
+            self.writer = pq.ParquetWriter(
+                self.path, self.schema, compression=self.compression or "snappy"
+            )
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            self.writer = pa.ipc.new_file(self.path, self.schema, options=options)
+
+    def write(self, rows: List[dict]) -> None:
+        if self.writer is None:
+            self._open(rows)
+        self.writer.write_batch(
+            self.pa.RecordBatch.from_pylist(rows, schema=self.schema)
+        )
+
+    def close(self) -> None:
+        if self.writer is None:
+            self._open([])
+        self.writer.close()
+
+
+def open_writer(
+    target: Union[str, IO[bytes]],
+    fields: Sequence[str],
+    format: Optional[str] = None,
+    compression: Optional[str] = None,
+    codec: Codec = DEFAULT_CODEC,
+) -> Union[Writer, ArrowWriter]:
+    """
+    :param target: a path, or a binary stream for csv and jsonl
+    :param format: one of ``FORMATS``, guessed from the path by default
+    :param compression: guessed from the path by default
+    """
+    if isinstance(target, str):
+        guessed_format, guessed_compression = guess(target)
+        format = format or guessed_format
+        if compression is None and format in ("csv", "jsonl"):
+            compression = guessed_compression
+    if format not in FORMATS:
+        raise ValueError("unknown export format: {}".format(format))
+    if format in ("arrow", "parquet"):
+        if not isinstance(target, str):
+            raise ValueError("{} export needs a path".format(format))
+        return ArrowWriter(target, fields, compression, format == "parquet")
+    if isinstance(target, str):
+        if compression is None:
+            stream = open(target, "wb")
+        elif compression in COMPRESSORS:
+            stream = COMPRESSORS[compression](target)
+        else:
+            raise ValueError("unknown compression: {}".format(compression))
+    else:
+        stream = target
+    factory = CsvWriter if format == "csv" else JsonlWriter
+    return factory(stream, fields, codec, owned=isinstance(target, str))
+
+
+async def export(
+    client,
+    target: Union[str, IO[bytes]],
+    fields: Sequence[str],
+    ids: Optional[Union[Sequence[Union[int, str]], str]] = None,
+    format: Optional[str] = None,
+    compression: Optional[str] = None,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Write ``fields`` of the torrents to ``target``
+
+    :param client: a ``TransmissionClient``
+    :param ids: torrents to export, all by default
+    :return: the number of torrents written
+    """
+    writer = open_writer(target, fields, format, compression, client.codec)
+
+    def write(rows: List[Any]) -> None:
+        writer.write(as_dicts(rows))
+
+    loop = asyncio.get_running_loop()
+    fields = list(fields)
+    written = 0
+    pending: Optional[asyncio.Future] = None
+    try:
+        listing = await client.torrent_get(["id"], ids=ids)
+        all_ids = [t["id"] for t in as_dicts(listing.get("torrents") or [])]
+        del listing
+
+        async def fetch(start: int) -> List[dict]:
+            data = await client.torrent_get(
+                fields, ids=all_ids[start : start + batch_size]
+            )
+            return data.get("torrents") or []
+
+        pending = asyncio.ensure_future(fetch(0)) if all_ids else None
+        for start in range(0, len(all_ids), batch_size):
+            rows = await pending
+            following = start + batch_size
+            pending = (
+                asyncio.ensure_future(fetch(following))
+                if following < len(all_ids)
+                else None
+            )
+            # compressing and writing runs in a thread while the next batch loads
+            await loop.run_in_executor(None, write, rows)
+            written += len(rows)
+            del rows
+    except BaseException:
+        if pending is not None:
+            pending.cancel()
+        raise
+    finally:
+        writer.close()
+    return written
@@ -0,0 +1,346 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Prometheus text exposition rendered from cached snapshots. ``SnapshotCache``
+polls a daemon on its own schedule and keeps aggregates up to date
+incrementally, scrapes only read them and never cause an rpc.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from aiotr.metrics import MetricsRecorder
+from aiotr.utils import tracker_host
+
+logger = logging.getLogger(__name__)
+
+STATUS = {
+    0: "stopped",
+    1: "check_pending",
+    2: "checking",
+    3: "download_pending",
+    4: "downloading",
+    5: "seed_pending",
+    6: "seeding",
+}
+
+TORRENT_FIELDS = ["id", "status", "labels", "trackers", "rateDownload", "rateUpload"]
+
+CUMULATIVE_STATS = {
+    "uploadedBytes": "transmission_uploaded_bytes_total",
+    "downloadedBytes": "transmission_downloaded_bytes_total",
+    "filesAdded": "transmission_files_added_total",
+    "sessionCount": "transmission_sessions_total",
+    "secondsActive": "transmission_active_seconds_total",
+}
+
+SESSION_STATS = {
+    "downloadSpeed": "transmission_download_speed_bytes",
+    "uploadSpeed": "transmission_upload_speed_bytes",
+    "activeTorrentCount": "transmission_active_torrents",
+    "pausedTorrentCount": "transmission_paused_torrents",
+    "torrentCount": "transmission_torrent_count",
+}
+
+# every transmission_* family in output order, with its type
+FAMILIES = dict(
+    [(name, "gauge") for name in SESSION_STATS.values()]
+    + [(name, "counter") for name in CUMULATIVE_STATS.values()]
+    + [("transmission_torrents", "gauge")]
+    + [
+        ("transmission_{}_{}".format(kind, suffix), "gauge")
+        for kind in ("label", "tracker")
+        for suffix in ("torrents", "download_rate_bytes", "upload_rate_bytes")
+    ]
+)
+
+# status, labels, tracker hosts, rateDownload, rateUpload
+Contribution = Tuple[int, Tuple[str, ...], Tuple[str, ...], int, int]
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Aggregate:
+    __slots__ = ("torrents", "rate_download", "rate_upload")
+
+    def __init__(self):
+        self.torrents = 0
+        self.rate_download = 0
+        self.rate_upload = 0
+
+    def add(self, sign: int, rate_download: int, rate_upload: int) -> None:
+        self.torrents += sign
+        self.rate_download += sign * rate_download
+        self.rate_upload += sign * rate_upload
+
+
+class SnapshotCache:
+    """
+    Cached session-stats and per status/label/tracker torrent aggregates of one daemon
+
+    :param client: a ``TransmissionClient``
+    :param interval: seconds between polls
+    :param full_every: refetch every torrent once per this many polls,
+     the others only ask for "recently-active" ones
+    """
+
+    def __init__(self, client, interval: float = 15.0, full_every: int = 20):
+        self.client = client
+        self.interval = interval
+        self.full_every = full_every
+        self.daemon: str = client.daemon
+        self.session_stats: dict = {}
+        self.torrents: Dict[int, Contribution] = {}
+        self.status: Dict[int, Aggregate] = defaultdict(Aggregate)
+        self.labels: Dict[str, Aggregate] = defaultdict(Aggregate)
+        self.trackers: Dict[str, Aggregate] = defaultdict(Aggregate)
+        self.polls = 0
+        self.version = 0  # bumped on every change, lets renderers cache their output
+
+    def _apply(self, contribution: Contribution, sign: int) -> None:
+        status, labels, trackers, rate_download, rate_upload = contribution
+        self.status[status].add(sign, rate_download, rate_upload)
+        for table, keys in ((self.labels, labels), (self.trackers, trackers)):
+            for key in keys:
+                aggregate = table[key]
+                aggregate.add(sign, rate_download, rate_upload)
+                if not aggregate.torrents:
+                    del table[key]  # keep series of vanished labels/trackers away
+
+    def update(
+        self, torrents: List[dict], removed: Iterable[int] = (), full: bool = False
+    ) -> None:
+        """
+        Fold torrent-get rows into the aggregates, touching only what changed
+        """
+        changed = False
+        seen = set()
+        for torrent in torrents:
+            tid = torrent["id"]
+            seen.add(tid)
+            contribution: Contribution = (
+                torrent.get("status", 0),
+                tuple(torrent.get("labels") or ()),
+                tuple(
+                    sorted(
+                        {
+                            tracker_host(t["announce"])
+                            for t in torrent.get("trackers") or ()
+                        }
+                    )
+                ),
+                torrent.get("rateDownload", 0),
+                torrent.get("rateUpload", 0),
+            )
+            old = self.torrents.get(tid)
+            if old == contribution:
+                continue
+            if old is not None:
+                self._apply(old, -1)
+            self._apply(contribution, 1)
+            self.torrents[tid] = contribution
+            changed = True
+        if full:
+            removed = [tid for tid in self.torrents if tid not in seen]
+        for tid in removed:
+            old = self.torrents.pop(tid, None)
+            if old is not None:
+                self._apply(old, -1)
+                changed = True
+        if changed:
+            self.version += 1
+
+    async def refresh(self) -> None:
+        full = self.polls % self.full_every == 0
+        self.session_stats = await self.client.session_stats() or {}
+        self.version += 1
+        data = await self.client.torrent_get(
+            TORRENT_FIELDS, ids=None if full else "recently-active"
+        )
+        data = data or {}
+        self.update(data.get("torrents", []), data.get("removed", ()), full)
+        self.polls += 1
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("polling %s failed", self.daemon)
+            await asyncio.sleep(self.interval)
+
+
+class PrometheusExporter:
+    """
+    :param caches: one ``SnapshotCache`` per daemon
+    :param metrics: the clients' ``MetricsRecorder``, exported as aiotr_rpc_* series
+    """
+
+    def __init__(
+        self,
+        caches: Iterable[SnapshotCache],
+        metrics: Optional[MetricsRecorder] = None,
+    ):
+        self.caches = list(caches)
+        self.metrics = metrics
+        # daemon -> (version, family -> sample lines)
+        self.rendered: Dict[str, Tuple[int, Dict[str, List[str]]]] = {}
+        self.tasks: List[asyncio.Task] = []
+
+    def render_cache(self, cache: SnapshotCache) -> Dict[str, List[str]]:
+        """
+        The sample lines of one daemon, by metric family
+        """
+        cached = self.rendered.get(cache.daemon)
+        if cached is not None and cached[0] == cache.version:
+            return cached[1]
+        daemon = 'daemon="{}"'.format(escape(cache.daemon))
+        stats = cache.session_stats
+        families: Dict[str, List[str]] = defaultdict(list)
+        for key, name in SESSION_STATS.items():
+            if key in stats:
+                families[name].append("{}{{{}}} {}".format(name, daemon, stats[key]))
+        for key, name in CUMULATIVE_STATS.items():
+            value = stats.get("cumulative-stats", {}).get(key)
+            if value is not None:
+                families[name].append("{}{{{}}} {}".format(name, daemon, value))
+        for status, aggregate in cache.status.items():
+            families["transmission_torrents"].append(
+                'transmission_torrents{{{},status="{}"}} {}'.format(
+                    daemon, STATUS.get(status, status), aggregate.torrents
+                )
+            )
+        for kind, table in (("label", cache.labels), ("tracker", cache.trackers)):
+            for value, aggregate in table.items():
+                series = '{},{}="{}"'.format(daemon, kind, escape(value))
+                for suffix, sample in (
+                    ("torrents", aggregate.torrents),
+                    ("download_rate_bytes", aggregate.rate_download),
+                    ("upload_rate_bytes", aggregate.rate_upload),
+                ):
+                    name = "transmission_{}_{}".format(kind, suffix)
+                    families[name].append("{}{{{}}} {}".format(name, series, sample))
+        self.rendered[cache.daemon] = (cache.version, families)
+        return families
+
+    def render_metrics(self) -> str:
+        metrics = self.metrics
+        if metrics is None:
+            return ""
+        lines = ["# TYPE aiotr_rpc_duration_seconds histogram"]
+        for (daemon, method, phase), histogram in metrics.latency.items():
+            series = 'daemon="{}",method="{}",phase="{}"'.format(
+                escape(daemon), method, phase
+            )
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(
+                    'aiotr_rpc_duration_seconds_bucket{{{},le="{:g}"}} {}'.format(
+                        series, bound, cumulative
+                    )
+                )
+            lines.append(
+                'aiotr_rpc_duration_seconds_bucket{{{},le="+Inf"}} {}'.format(
+                    series, histogram.count
+                )
+            )
+            lines.append(
+                "aiotr_rpc_duration_seconds_sum{{{}}} {}".format(series, histogram.sum)
+            )
+            lines.append(
+                "aiotr_rpc_duration_seconds_count{{{}}} {}".format(
+                    series, histogram.count
+                )
+            )
+        lines.append("# TYPE aiotr_rpc_bytes_total counter")
+        for (daemon, method, direction), histogram in metrics.size.items():
+            lines.append(
+                'aiotr_rpc_bytes_total{{daemon="{}",method="{}",direction="{}"}} {}'.format(
+                    escape(daemon), method, direction, histogram.sum
+                )
+            )
+        lines.append("# TYPE aiotr_rpc_requests_total counter")
+        for (daemon, method, result), count in metrics.results.items():
+            lines.append(
+                'aiotr_rpc_requests_total{{daemon="{}",method="{}",result="{}"}} {}'.format(
+                    escape(daemon), method, result, count
+                )
+            )
+        lines.append("# TYPE aiotr_rpc_session_retries_total counter")
+        for (daemon, method), count in metrics.retries.items():
+            lines.append(
+                'aiotr_rpc_session_retries_total{{daemon="{}",method="{}"}} {}'.format(
+                    escape(daemon), method, count
+                )
+            )
+        lines.append("# TYPE aiotr_connections_total counter")
+        for (daemon, state), count in metrics.connections.items():
+            lines.append(
+                'aiotr_connections_total{{daemon="{}",state="{}"}} {}'.format(
+                    escape(daemon), state, count
+                )
+            )
+        return "\n".join(lines) + "\n"
+
+    def render(self) -> str:
+        """
+        Every family once, its ``# TYPE`` line followed by the samples of all
+        daemons
+        """
+        rendered = [self.render_cache(cache) for cache in self.caches]
+        lines = []
+        for name, kind in FAMILIES.items():
+            samples = [line for families in rendered for line in families.get(name, ())]
+            if samples:
+                lines.append("# TYPE {} {}".format(name, kind))
+                lines.extend(samples)
+        text = "\n".join(lines) + "\n" if lines else ""
+        return text + self.render_metrics()
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # headers are not needed
+            parts = request_line.split()
+            if (
+                len(parts) >= 2
+                and parts[0] == b"GET"
+                and parts[1].split(b"?")[0] == b"/metrics"
+            ):
+                status, body = "200 OK", self.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                "HTTP/1.1 {}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                "Content-Length: {}\r\nConnection: close\r\n\r\n".format(
+                    status, len(body)
+                ).encode()
+                + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9190, poll: bool = True):
+        """
+        Serve /metrics, and poll every cache in the background unless ``poll`` is False
+
+        :return: the ``asyncio`` server
+        """
+        if poll:
+            self.tasks = [asyncio.ensure_future(cache.run()) for cache in self.caches]
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def close(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
@@ -0,0 +1,866 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+An in-process fake transmission daemon built on aiohttp.web, for tests and
+benchmarks. It speaks the session-id handshake (409), basic auth (401) and
+host checking (421), keeps torrents, queue and bandwidth groups in memory and
+can inject latency and faults.
+
+    async with FakeTransmission(torrents=10_000) as fake:
+        client = TransmissionClient(url=fake.url)
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import time
+import zlib
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Union
+
+from aiohttp import web
+
+from aiotr.capabilities import METHOD_SINCE, TABLE_FORMAT_RPC_VERSION
+from aiotr.utils import JSONRPC_RPC_VERSION
+
+# tr_torrent_activity
+STOPPED, CHECK_WAIT, CHECK, DOWNLOAD_WAIT, DOWNLOAD, SEED_WAIT, SEED = range(7)
+
+RECENTLY_ACTIVE_SECONDS = 60
+
+TRACKERS = (
+    "udp://tracker.opentrackr.org:1337/announce",
+    "udp://open.stealth.si:80/announce",
+    "http://tracker.example.org:8080/announce",
+)
+
+CLIENTS = (
+    "Transmission 4.0.5",
+    "qBittorrent 4.6.2",
+    "libtorrent 2.0.9",
+    "uTorrent 3.5.5",
+)
+
+# torrent-set keys which map straight onto torrent fields
+SETTABLE = (
+    "bandwidthPriority",
+    "downloadLimit",
+    "downloadLimited",
+    "group",
+    "honorsSessionLimits",
+    "labels",
+    "peer-limit",
+    "queuePosition",
+    "seedIdleLimit",
+    "seedIdleMode",
+    "seedRatioLimit",
+    "seedRatioMode",
+    "sequentialDownload",
+    "uploadLimit",
+    "uploadLimited",
+)
+
+DEFAULT_SESSION = {
+    "alt-speed-down": 50,
+    "alt-speed-enabled": False,
+    "alt-speed-up": 50,
+    "blocklist-enabled": False,
+    "blocklist-size": 0,
+    "cache-size-mb": 4,
+    "config-dir": "/var/lib/transmission",
+    "dht-enabled": True,
+    "download-dir": "/downloads",
+    "download-queue-enabled": True,
+    "download-queue-size": 5,
+    "encryption": "preferred",
+    "idle-seeding-limit": 30,
+    "idle-seeding-limit-enabled": False,
+    "incomplete-dir": "/downloads/incomplete",
+    "incomplete-dir-enabled": False,
+    "lpd-enabled": False,
+    "peer-limit-global": 200,
+    "peer-limit-per-torrent": 50,
+    "peer-port": 51413,
+    "pex-enabled": True,
+    "port-forwarding-enabled": False,
+    "rename-partial-files": True,
+    "rpc-version-minimum": 14,
+    "seed-queue-enabled": False,
+    "seed-queue-size": 10,
+    "seedRatioLimit": 2.0,
+    "seedRatioLimited": False,
+    "speed-limit-down": 100,
+    "speed-limit-down-enabled": False,
+    "speed-limit-up": 100,
+    "speed-limit-up-enabled": False,
+    "start-added-torrents": True,
+    "utp-enabled": True,
+}
+
+
+class Fault:
+    """
+    What to do instead of answering a request
+
+    :param status: answer with this http status
+    :param disconnect: drop the connection without answering
+    :param delay: sleep this many seconds first
+    :param result: answer with this "result" string instead of "success"
+    """
+
+    def __init__(
+        self,
+        status: Optional[int] = None,
+        disconnect: bool = False,
+        delay: float = 0.0,
+        result: Optional[str] = None,
+    ):
+        self.status = status
+        self.disconnect = disconnect
+        self.delay = delay
+        self.result = result
+
+
+class FakeTransmission:
+    """
+    :param torrents: number of synthetic torrents to create
+    :param files: files per synthetic torrent
+    :param rpc_version: reported "rpc-version", JSON-RPC 2.0 is served from
+     ``aiotr.utils.JSONRPC_RPC_VERSION`` on
+    :param username: require basic auth with this user
+    :param password: and this password
+    :param hosts: answer 421 unless the Host header is one of these
+    :param latency: seconds to wait before answering, or a callable returning them
+    :param seed: seed of the synthetic data
+    :param dumps: json encoder for responses
+    :param log: how many request bodies to keep in ``requests``
+    """
+
+    def __init__(
+        self,
+        torrents: int = 0,
+        files: int = 4,
+        rpc_version: int = 17,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        hosts: Optional[List[str]] = None,
+        latency: Union[float, Callable[[], float]] = 0.0,
+        seed: int = 0,
+        dumps: Callable[[Any], Union[str, bytes]] = json.dumps,
+        log: int = 1000,
+    ):
+        self.rpc_version = rpc_version
+        self.username = username
+        self.password = password
+        self.hosts = hosts
+        self.latency = latency
+        self.dumps = dumps
+        self.random = random.Random(seed)
+        self.session_id = self.new_session_id()
+        self.session: Dict[str, Any] = dict(DEFAULT_SESSION)
+        self.torrents: Dict[int, dict] = {}
+        self.by_hash: Dict[str, int] = {}
+        self.queue: List[int] = []  # torrent ids in queue order
+        self.removed: Deque[tuple] = deque()  # (time, id)
+        self.groups: Dict[str, dict] = {}
+        self.free_space: Dict[str, int] = {}
+        self.default_free_space = 1 << 40
+        # tracker hostname -> error reported as the last announce result
+        self.tracker_errors: Dict[str, str] = {}
+        self.faults: Dict[Optional[str], Deque[Fault]] = {}
+        self.calls: Counter = Counter()
+        self.requests: Deque[Any] = deque(maxlen=log)
+        # drop entries to emulate a daemon without some method
+        self.handlers = {
+            name: handler
+            for name, handler in HANDLERS.items()
+            if rpc_version >= METHOD_SINCE.get(name, 0)
+        }
+        self.stats = {
+            "uploadedBytes": 0,
+            "downloadedBytes": 0,
+            "filesAdded": 0,
+            "sessionCount": 1,
+            "secondsActive": 0,
+        }
+        self.started = time.time()
+        self.next_id = 1
+        self.files = files
+        for _ in range(torrents):
+            self.add_synthetic()
+        self.runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    # lifecycle
+    def application(self) -> web.Application:
+        app = web.Application(client_max_size=1 << 30)
+        app.router.add_post("/transmission/rpc", self.handle)
+        return app
+
+    async def start(
+        self, host: str = "127.0.0.1", port: int = 0, unix: Optional[str] = None
+    ) -> str:
+        """
+        Serve on ``host:port`` (or the unix socket ``unix``)
+
+        :return: the rpc url to give to ``TransmissionClient``
+        """
+        self.runner = web.AppRunner(self.application(), access_log=None)
+        await self.runner.setup()
+        if unix is not None:
+            await web.UnixSite(self.runner, unix).start()
+            self.url = "unix://{}".format(unix)
+        else:
+            await web.TCPSite(self.runner, host, port).start()
+            port = self.runner.addresses[0][1]
+            self.url = "http://{}:{}/transmission/rpc".format(host, port)
+        return self.url
+
+    async def close(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    # knobs
+    def new_session_id(self) -> str:
+        return "{:048x}".format(self.random.getrandbits(192))
+
+    def rotate_session(self) -> None:
+        """
+        Make the next request answer 409, as after a daemon restart
+        """
+        self.session_id = self.new_session_id()
+
+    def inject(self, fault: Fault, method: Optional[str] = None, times: int = 1):
+        """
+        Apply ``fault`` to the next ``times`` requests of ``method`` (any method if None)
+        """
+        self.faults.setdefault(method, deque()).extend([fault] * times)
+
+    def next_fault(self, method: Optional[str]) -> Optional[Fault]:
+        for key in (method, None):
+            queue = self.faults.get(key)
+            if queue:
+                return queue.popleft()
+        return None
+
+    # torrents
+    def add_synthetic(self, name: Optional[str] = None, **fields) -> dict:
+        rnd = self.random
+        tid = self.next_id
+        name = name or "synthetic-{:06d}".format(tid)
+        hash_string = hashlib.sha1(name.encode()).hexdigest()
+        piece_size = 1 << rnd.randint(15, 22)
+        file_lengths = [rnd.randint(1, 64) * piece_size for _ in range(self.files)]
+        total = sum(file_lengths)
+        done = rnd.random() < 0.7
+        left = 0 if done else rnd.randint(0, total)
+        status = rnd.choice((SEED, SEED, STOPPED, DOWNLOAD)) if done else DOWNLOAD
+        now = int(time.time())
+        added = now - rnd.randint(3600, 86400 * 365)
+        torrent = {
+            "id": tid,
+            "name": name,
+            "hashString": hash_string,
+            "status": status,
+            "error": 0,
+            "errorString": "",
+            "addedDate": added,
+            "activityDate": now - rnd.randint(0, 86400),
+            "doneDate": added + rnd.randint(60, 86400) if done else 0,
+            "downloadDir": self.session["download-dir"],
+            "totalSize": total,
+            "sizeWhenDone": total,
+            "leftUntilDone": left,
+            "haveValid": total - left,
+            "percentDone": (total - left) / total if total else 1.0,
+            "pieceSize": piece_size,
+            "pieceCount": total // piece_size,
+            "file-count": len(file_lengths),
+            "fileLengths": file_lengths,
+            "rateDownload": rnd.randint(0, 1 << 20) if status == DOWNLOAD else 0,
+            "rateUpload": rnd.randint(0, 1 << 18) if status != STOPPED else 0,
+            "uploadedEver": rnd.randint(0, 4 * total),
+            "downloadedEver": total - left,
+            "secondsSeeding": rnd.randint(0, 86400 * 90) if done else 0,
+            "secondsDownloading": rnd.randint(60, 86400),
+            "peersConnected": rnd.randint(0, 30) if status != STOPPED else 0,
+            "labels": rnd.sample(
+                ("tv", "movies", "music", "linux", "books"), rnd.randint(0, 2)
+            ),
+            "group": "",
+            "queuePosition": len(self.queue),
+            "bandwidthPriority": 0,
+            "downloadLimit": 100,
+            "downloadLimited": False,
+            "uploadLimit": 100,
+            "uploadLimited": False,
+            "honorsSessionLimits": True,
+            "peer-limit": 50,
+            "seedIdleLimit": 30,
+            "seedIdleMode": 0,
+            "seedRatioLimit": 2.0,
+            "seedRatioMode": 0,
+            "sequentialDownload": False,
+            "isPrivate": rnd.random() < 0.2,
+            "trackerUrls": list(rnd.sample(TRACKERS, rnd.randint(1, len(TRACKERS)))),
+            "wanted": [True] * len(file_lengths),
+            "priorities": [0] * len(file_lengths),
+            "changed": 0.0,
+        }
+        torrent["uploadRatio"] = (
+            torrent["uploadedEver"] / torrent["downloadedEver"]
+            if torrent["downloadedEver"]
+            else -1
+        )
+        torrent.update(fields)
+        self.torrents[tid] = torrent
+        self.by_hash[hash_string] = tid
+        self.queue.append(tid)
+        self.next_id += 1
+        return torrent
+
+    def touch(self, torrent: dict) -> None:
+        torrent["changed"] = time.time()
+
+    def resolve(self, ids) -> List[dict]:
+        if ids is None:
+            return list(self.torrents.values())
+        if ids == "recently-active":
+            since = time.time() - RECENTLY_ACTIVE_SECONDS
+            return [t for t in self.torrents.values() if t["changed"] >= since]
+        if not isinstance(ids, list):
+            ids = [ids]
+        result = []
+        for i in ids:
+            tid = self.by_hash.get(i.lower()) if isinstance(i, str) else i
+            torrent = self.torrents.get(tid)  # type: ignore
+            if torrent is not None:
+                result.append(torrent)
+        return result
+
+    def field(self, torrent: dict, key: str):
+        getter = DERIVED.get(key)
+        if getter is not None:
+            return getter(self, torrent)
+        return torrent.get(key, MISSING)
+
+    def reorder(self) -> None:
+        for position, tid in enumerate(self.queue):
+            torrent = self.torrents[tid]
+            if torrent["queuePosition"] != position:
+                torrent["queuePosition"] = position
+                self.touch(torrent)
+
+    # http
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        if self.hosts is not None and request.host.split(":")[0] not in self.hosts:
+            return web.Response(status=421, text="Misdirected Request")
+        if self.username is not None:
+            expected = (
+                "Basic "
+                + base64.b64encode(
+                    "{}:{}".format(self.username, self.password or "").encode()
+                ).decode()
+            )
+            if request.headers.get("Authorization") != expected:
+                return web.Response(status=401, text="Unauthorized User")
+        if request.headers.get("X-Transmission-Session-Id") != self.session_id:
+            return web.Response(
+                status=409,
+                text="<h1>409: Conflict</h1>",
+                headers={"X-Transmission-Session-Id": self.session_id},
+            )
+        body = json.loads(await request.read())
+        self.requests.append(body)
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            await asyncio.sleep(latency)
+        headers = {"X-Transmission-Session-Id": self.session_id}
+        method = body[0].get("method") if isinstance(body, list) and body else None
+        if isinstance(body, dict):
+            method = body.get("method")
+        fault = self.next_fault(method)
+        if fault is not None:
+            if fault.delay:
+                await asyncio.sleep(fault.delay)
+            if fault.disconnect:
+                assert request.transport is not None
+                request.transport.close()
+                return web.Response(status=500)
+            if fault.status is not None:
+                return web.Response(status=fault.status, text="injected fault")
+        if isinstance(body, list) or "jsonrpc" in body:
+            if self.rpc_version < JSONRPC_RPC_VERSION:
+                return web.Response(status=400, text="Bad Request")
+            items = body if isinstance(body, list) else [body]
+            responses = [self.jsonrpc(item, fault) for item in items]
+            payload = responses if isinstance(body, list) else responses[0]
+        else:
+            payload = self.legacy(body, fault)
+        data = self.dumps(payload)
+        return web.Response(
+            body=data.encode() if isinstance(data, str) else data,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    def legacy(self, body: dict, fault: Optional[Fault]) -> dict:
+        response: Dict[str, Any] = {"tag": body.get("tag")}
+        if fault is not None and fault.result is not None:
+            response["result"] = fault.result
+            return response
+        try:
+            response["arguments"] = self.call(
+                body["method"], body.get("arguments") or {}
+            )
+            response["result"] = "success"
+        except RpcError as err:
+            response["result"] = err.message
+        return response
+
+    def jsonrpc(self, item: dict, fault: Optional[Fault]) -> dict:
+        response: Dict[str, Any] = {"jsonrpc": "2.0", "id": item.get("id")}
+        if fault is not None and fault.result is not None:
+            response["error"] = {"code": -32000, "message": fault.result}
+            return response
+        try:
+            response["result"] = self.call(item["method"], item.get("params") or {})
+        except RpcError as err:
+            response["error"] = {"code": err.code, "message": err.message}
+        return response
+
+    def call(self, method: str, arguments: dict) -> dict:
+        self.calls[method] += 1
+        handler = self.handlers.get(method)
+        if handler is None:
+            raise RpcError("method name not recognized", -32601)
+        return handler(self, arguments)
+
+    # rpc methods
+    def torrent_action(self, arguments: dict, status: Optional[int]) -> dict:
+        for torrent in self.resolve(arguments.get("ids")):
+            if status is not None:
+                if status == DOWNLOAD and not torrent["leftUntilDone"]:
+                    torrent["status"] = SEED
+                else:
+                    torrent["status"] = status
+                if torrent["status"] == STOPPED:
+                    torrent["rateDownload"] = torrent["rateUpload"] = 0
+            self.touch(torrent)
+        return {}
+
+    def torrent_verify(self, arguments: dict) -> dict:
+        for torrent in self.resolve(arguments.get("ids")):
+            torrent["recheckProgress"] = 1.0
+            self.touch(torrent)
+        return {}
+
+    def torrent_set(self, arguments: dict) -> dict:
+        torrents = self.resolve(arguments.get("ids"))
+        for torrent in torrents:
+            for key in SETTABLE:
+                if key in arguments:
+                    torrent[key] = arguments[key]
+            if "location" in arguments:
+                torrent["downloadDir"] = arguments["location"]
+            if "trackerAdd" in arguments:
+                torrent["trackerUrls"].extend(arguments["trackerAdd"])
+            if "trackerList" in arguments:
+                torrent["trackerUrls"] = [
+                    url for url in arguments["trackerList"].split("\n") if url
+                ]
+            if "trackerRemove" in arguments:
+                remove = set(arguments["trackerRemove"])
+                torrent["trackerUrls"] = [
+                    url
+                    for i, url in enumerate(torrent["trackerUrls"])
+                    if i not in remove
+                ]
+            if "trackerReplace" in arguments:
+                pairs = arguments["trackerReplace"]
+                for i in range(0, len(pairs) - 1, 2):
+                    if 0 <= pairs[i] < len(torrent["trackerUrls"]):
+                        torrent["trackerUrls"][pairs[i]] = pairs[i + 1]
+            for key, value in (("files-wanted", True), ("files-unwanted", False)):
+                if key in arguments:
+                    indices = arguments[key] or range(torrent["file-count"])
+                    for i in indices:
+                        torrent["wanted"][int(i)] = value
+            for key, value in (
+                ("priority-low", -1),
+                ("priority-normal", 0),
+                ("priority-high", 1),
+            ):
+                if key in arguments:
+                    indices = arguments[key] or range(torrent["file-count"])
+                    for i in indices:
+                        torrent["priorities"][int(i)] = value
+            self.touch(torrent)
+        if "queuePosition" in arguments:
+            self.queue.sort(key=lambda tid: self.torrents[tid]["queuePosition"])
+            self.reorder()
+        return {}
+
+    def torrent_get(self, arguments: dict) -> dict:
+        fields = arguments.get("fields")
+        if not fields:
+            raise RpcError("no fields specified", -32602)
+        ids = arguments.get("ids")
+        torrents = self.resolve(ids)
+        field = self.field
+        if (
+            arguments.get("format") == "table"
+            and self.rpc_version >= TABLE_FORMAT_RPC_VERSION
+        ):
+            rows: List[list] = [list(fields)]
+            for t in torrents:
+                row = [field(t, key) for key in fields]
+                # the daemon fills cells without a value with null
+                rows.append([None if v is MISSING else v for v in row])
+            result: Dict[str, Any] = {"torrents": rows}
+        else:
+            objects = []
+            for t in torrents:
+                obj = {}
+                for key in fields:
+                    value = field(t, key)
+                    if value is not MISSING:
+                        obj[key] = value
+                objects.append(obj)
+            result = {"torrents": objects}
+        if ids == "recently-active":
+            since = time.time() - RECENTLY_ACTIVE_SECONDS
+            while self.removed and self.removed[0][0] < since:
+                self.removed.popleft()
+            result["removed"] = [tid for _, tid in self.removed]
+        return result
+
+    def torrent_add(self, arguments: dict) -> dict:
+        source = arguments.get("metainfo") or arguments.get("filename")
+        if not source:
+            raise RpcError("no filename or metainfo specified", -32602)
+        hash_string = hashlib.sha1(source.encode()).hexdigest()
+        if hash_string in self.by_hash:
+            torrent = self.torrents[self.by_hash[hash_string]]
+            key = "torrent-duplicate"
+        else:
+            paused = arguments.get("paused", not self.session["start-added-torrents"])
+            torrent = self.add_synthetic(
+                name="added-{}".format(hash_string[:12]),
+                hashString=hash_string,
+                status=STOPPED if paused else DOWNLOAD,
+                downloadDir=arguments.get("download-dir", self.session["download-dir"]),
+                labels=list(arguments.get("labels") or ()),
+                leftUntilDone=0,
+                addedDate=int(time.time()),
+                rateDownload=0,
+                rateUpload=0,
+            )
+            torrent["leftUntilDone"] = torrent["sizeWhenDone"]
+            torrent["percentDone"] = 0.0
+            torrent["haveValid"] = torrent["downloadedEver"] = 0
+            self.by_hash[hash_string] = torrent["id"]
+            self.stats["filesAdded"] += 1
+            self.touch(torrent)
+            key = "torrent-added"
+        return {
+            key: {
+                "id": torrent["id"],
+                "name": torrent["name"],
+                "hashString": torrent["hashString"],
+            }
+        }
+
+    def torrent_remove(self, arguments: dict) -> dict:
+        now = time.time()
+        for torrent in self.resolve(arguments.get("ids")):
+            del self.torrents[torrent["id"]]
+            self.by_hash.pop(torrent["hashString"], None)
+            self.queue.remove(torrent["id"])
+            self.removed.append((now, torrent["id"]))
+        self.reorder()
+        return {}
+
+    def torrent_set_location(self, arguments: dict) -> dict:
+        for torrent in self.resolve(arguments.get("ids")):
+            torrent["downloadDir"] = arguments["location"]
+            if not arguments.get("move"):
+                torrent["recheckProgress"] = 1.0
+            self.touch(torrent)
+        return {}
+
+    def torrent_rename_path(self, arguments: dict) -> dict:
+        torrents = self.resolve(arguments.get("ids"))
+        if len(torrents) != 1:
+            raise RpcError("torrent-rename-path requires 1 torrent", -32602)
+        torrent = torrents[0]
+        if arguments.get("path") == torrent["name"]:
+            torrent["name"] = arguments["name"]
+        self.touch(torrent)
+        return {
+            "id": torrent["id"],
+            "path": arguments.get("path"),
+            "name": arguments.get("name"),
+        }
+
+    def session_get(self, arguments: dict) -> dict:
+        session = dict(self.session)
+        session["rpc-version"] = self.rpc_version
+        session["version"] = "4.0.5 (fake)"
+        session["session-id"] = self.session_id
+        fields = arguments.get("fields")
+        if fields:
+            return {k: session[k] for k in fields if k in session}
+        return session
+
+    def session_set(self, arguments: dict) -> dict:
+        for key, value in arguments.items():
+            if key not in ("rpc-version", "rpc-version-minimum", "version"):
+                self.session[key] = value
+        return {}
+
+    def session_stats(self, arguments: dict) -> dict:
+        active = paused = download = upload = 0
+        for torrent in self.torrents.values():
+            if torrent["status"] == STOPPED:
+                paused += 1
+            else:
+                active += 1
+            download += torrent["rateDownload"]
+            upload += torrent["rateUpload"]
+        seconds = int(time.time() - self.started)
+        current = dict(self.stats, secondsActive=seconds)
+        return {
+            "activeTorrentCount": active,
+            "pausedTorrentCount": paused,
+            "torrentCount": len(self.torrents),
+            "downloadSpeed": download,
+            "uploadSpeed": upload,
+            "cumulative-stats": current,
+            "current-stats": current,
+        }
+
+    def queue_move(self, arguments: dict, where: str) -> dict:
+        selected = [t["id"] for t in self.resolve(arguments.get("ids"))]
+        chosen = set(selected)
+        if where == "top":
+            self.queue = selected + [tid for tid in self.queue if tid not in chosen]
+        elif where == "bottom":
+            self.queue = [tid for tid in self.queue if tid not in chosen] + selected
+        elif where == "up":
+            for i in range(1, len(self.queue)):
+                if self.queue[i] in chosen and self.queue[i - 1] not in chosen:
+                    self.queue[i - 1], self.queue[i] = self.queue[i], self.queue[i - 1]
+        else:
+            for i in range(len(self.queue) - 2, -1, -1):
+                if self.queue[i] in chosen and self.queue[i + 1] not in chosen:
+                    self.queue[i + 1], self.queue[i] = self.queue[i], self.queue[i + 1]
+        self.reorder()
+        return {}
+
+    def free_space_of(self, arguments: dict) -> dict:
+        path = arguments.get("path")
+        if not path:
+            raise RpcError("directory path argument is missing", -32602)
+        return {
+            "path": path,
+            "size-bytes": self.free_space.get(path, self.default_free_space),
+            "total_size": 1 << 42,
+        }
+
+    def group_get(self, arguments: dict) -> dict:
+        names = arguments.get("group")
+        if names is None:
+            groups = list(self.groups.values())
+        else:
+            if isinstance(names, str):
+                names = [names]
+            groups = [self.groups[name] for name in names if name in self.groups]
+        return {"group": [dict(group) for group in groups]}
+
+    def group_set(self, arguments: dict) -> dict:
+        name = arguments.get("name")
+        if not name:
+            raise RpcError("No group name given", -32602)
+        group = self.groups.setdefault(
+            name,
+            {
+                "name": name,
+                "honorsSessionLimits": True,
+                "speed-limit-down-enabled": False,
+                "speed-limit-down": 0,
+                "speed-limit-up-enabled": False,
+                "speed-limit-up": 0,
+            },
+        )
+        for key in group:
+            if key != "name" and key in arguments:
+                group[key] = arguments[key]
+        return {}
+
+
+class RpcError(Exception):
+    def __init__(self, message: str, code: int = -32000):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+MISSING: Any = object()
+
+
+def _files(fake: FakeTransmission, t: dict) -> list:
+    done = 1.0 - (t["leftUntilDone"] / t["sizeWhenDone"] if t["sizeWhenDone"] else 0)
+    return [
+        {
+            "name": "{}/file-{:03d}.bin".format(t["name"], i),
+            "length": length,
+            "bytesCompleted": int(length * done),
+        }
+        for i, length in enumerate(t["fileLengths"])
+    ]
+
+
+def _file_stats(fake: FakeTransmission, t: dict) -> list:
+    return [
+        {"bytesCompleted": f["bytesCompleted"], "wanted": w, "priority": p}
+        for f, w, p in zip(_files(fake, t), t["wanted"], t["priorities"])
+    ]
+
+
+def _trackers(fake: FakeTransmission, t: dict) -> list:
+    return [
+        {
+            "id": i,
+            "tier": i,
+            "announce": url,
+            "scrape": url.replace("announce", "scrape"),
+            "sitename": "",
+        }
+        for i, url in enumerate(t["trackerUrls"])
+    ]
+
+
+def _tracker_stats(fake: FakeTransmission, t: dict) -> list:
+    stats = []
+    for tracker in _trackers(fake, t):
+        # stable across processes, unlike hash() of str
+        seed = zlib.crc32("{}:{}".format(t["id"], tracker["announce"]).encode())
+        host = tracker["announce"].split("/")[2]
+        error = fake.tracker_errors.get(host.rsplit(":", 1)[0])
+        stats.append(
+            {
+                **tracker,
+                "host": "{}://{}".format(tracker["announce"].split(":")[0], host),
+                "announceState": 0,
+                "downloadCount": seed % 1000,
+                "hasAnnounced": True,
+                "hasScraped": True,
+                "isBackup": False,
+                "lastAnnouncePeerCount": seed % 50,
+                "lastAnnounceResult": error or "Success",
+                "lastAnnounceStartTime": t["activityDate"],
+                "lastAnnounceSucceeded": error is None,
+                "lastAnnounceTime": t["activityDate"],
+                "lastAnnounceTimedOut": False,
+                "lastScrapeResult": "",
+                "lastScrapeStartTime": t["activityDate"],
+                "lastScrapeSucceeded": True,
+                "lastScrapeTime": t["activityDate"],
+                "lastScrapeTimedOut": False,
+                "leecherCount": seed % 40,
+                "nextAnnounceTime": t["activityDate"] + 1800,
+                "nextScrapeTime": t["activityDate"] + 1800,
+                "scrapeState": 1,
+                "seederCount": seed % 400,
+            }
+        )
+    return stats
+
+
+def _peers(fake: FakeTransmission, t: dict) -> list:
+    peers = []
+    for i in range(t["peersConnected"]):
+        seed = t["id"] * 7919 + i
+        peers.append(
+            {
+                "address": "10.{}.{}.{}".format(seed % 251, seed // 251 % 251, i + 1),
+                "clientName": CLIENTS[seed % len(CLIENTS)],
+                "clientIsChoked": bool(seed & 1),
+                "clientIsInterested": bool(seed & 2),
+                "flagStr": "TDEI"[: seed % 4 + 1],
+                "isDownloadingFrom": bool(seed & 4),
+                "isEncrypted": bool(seed & 8),
+                "isIncoming": bool(seed & 16),
+                "isUploadingTo": bool(seed & 32),
+                "isUTP": bool(seed & 64),
+                "peerIsChoked": bool(seed & 128),
+                "peerIsInterested": bool(seed & 256),
+                "port": 1024 + seed % 60000,
+                "progress": (seed % 101) / 100,
+                "rateToClient": seed % 100000,
+                "rateToPeer": seed % 50000,
+            }
+        )
+    return peers
+
+
+DERIVED: Dict[str, Callable[[FakeTransmission, dict], Any]] = {
+    "files": _files,
+    "fileStats": _file_stats,
+    "trackers": _trackers,
+    "trackerStats": _tracker_stats,
+    "trackerList": lambda fake, t: "\n\n".join(t["trackerUrls"]),
+    "peers": _peers,
+    "magnetLink": lambda fake, t: "magnet:?xt=urn:btih:{}&dn={}".format(
+        t["hashString"], t["name"]
+    ),
+    "isFinished": lambda fake, t: t["leftUntilDone"] == 0 and t["status"] == STOPPED,
+    "isStalled": lambda fake, t: False,
+    "eta": lambda fake, t: (
+        t["leftUntilDone"] // t["rateDownload"] if t["rateDownload"] else -1
+    ),
+    "fileLengths": lambda fake, t: MISSING,
+    "trackerUrls": lambda fake, t: MISSING,
+    "changed": lambda fake, t: MISSING,
+}
+
+HANDLERS: Dict[str, Callable[[FakeTransmission, dict], dict]] = {
+    "torrent-start": lambda fake, a: fake.torrent_action(a, DOWNLOAD),
+    "torrent-start-now": lambda fake, a: fake.torrent_action(a, DOWNLOAD),
+    "torrent-stop": lambda fake, a: fake.torrent_action(a, STOPPED),
+    "torrent-verify": FakeTransmission.torrent_verify,
+    "torrent-reannounce": lambda fake, a: fake.torrent_action(a, None),
+    "torrent-set": FakeTransmission.torrent_set,
+    "torrent-get": FakeTransmission.torrent_get,
+    "torrent-add": FakeTransmission.torrent_add,
+    "torrent-remove": FakeTransmission.torrent_remove,
+    "torrent-set-location": FakeTransmission.torrent_set_location,
+    "torrent-rename-path": FakeTransmission.torrent_rename_path,
+    "session-get": FakeTransmission.session_get,
+    "session-set": FakeTransmission.session_set,
+    "session-stats": FakeTransmission.session_stats,
+    "blocklist-update": lambda fake, a: {"blocklist-size": 0},
+    "port-test": lambda fake, a: {
+        "port-is-open": True,
+        "ipProtocol": a.get("ipProtocol", "ipv4"),
+    },
+    "session-close": lambda fake, a: {},
+    "queue-move-top": lambda fake, a: fake.queue_move(a, "top"),
+    "queue-move-up": lambda fake, a: fake.queue_move(a, "up"),
+    "queue-move-down": lambda fake, a: fake.queue_move(a, "down"),
+    "queue-move-bottom": lambda fake, a: fake.queue_move(a, "bottom"),
+    "free-space": FakeTransmission.free_space_of,
+    "group-get": FakeTransmission.group_get,
+    "group-set": FakeTransmission.group_set,
+}
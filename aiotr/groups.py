@@ -0,0 +1,166 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Keep bandwidth groups in line with a declared config. ``GroupManager`` caches
+group-get, sends group-set only for the groups whose settings differ, all of
+them in one batch, and moves torrents between groups with one torrent-set per
+target group::
+
+    desired = {
+        "slow": {"speed_limit_up_enabled": True, "speed_limit_up": 100},
+        "fast": {"speed_limit_up_enabled": False},
+    }
+    manager = GroupManager(client)
+    changed = await manager.sync(desired)
+    await manager.assign({1: "slow", 2: "slow", 3: "fast"})
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+
+from aiotr.exception import TransmissionException
+from aiotr.spec import GROUP_SET
+
+# group_set keyword -> group-get / group-set key
+KEYS: Dict[str, str] = {
+    arg.name: arg.key for arg in GROUP_SET.args if arg.name != "name"
+}
+
+# group name -> group_set keywords, only the listed settings are enforced
+Desired = Mapping[str, Mapping[str, Any]]
+
+
+class GroupManager:
+    """
+    :param client: a ``TransmissionClient``
+    :param ttl: seconds a group-get result is reused
+    """
+
+    def __init__(self, client, ttl: float = 60.0):
+        self.client = client
+        self.ttl = ttl
+        self.groups: Dict[str, dict] = {}  # name -> group as returned by group-get
+        self.fetched: Optional[float] = None  # time.monotonic() of the last group-get
+
+    async def fetch(self, force: bool = False) -> Dict[str, dict]:
+        if force or self.fetched is None or time.monotonic() - self.fetched >= self.ttl:
+            data = await self.client.group_get()
+            self.groups = {group["name"]: group for group in data.get("group") or ()}
+            self.fetched = time.monotonic()
+        return self.groups
+
+    def invalidate(self) -> None:
+        self.fetched = None
+
+    def diff(self, desired: Desired) -> Dict[str, Dict[str, Any]]:
+        """
+        group_set keywords needed per group to reach ``desired`` from the cache
+        """
+        changes = {}
+        for name, settings in desired.items():
+            unknown = set(settings) - KEYS.keys()
+            if unknown:
+                raise ValueError(
+                    "unknown settings of group {}: {}".format(name, sorted(unknown))
+                )
+            current = self.groups.get(name)
+            if current is None:
+                changed = dict(settings)
+            else:
+                changed = {
+                    k: v for k, v in settings.items() if current.get(KEYS[k]) != v
+                }
+            if changed or current is None:
+                changes[name] = changed
+        return changes
+
+    async def sync(
+        self, desired: Desired, force: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Send the group-set calls ``diff`` finds, in one batch
+
+        :param force: refetch groups instead of trusting the cache
+        :return: the changes sent, by group
+        :raise TransmissionException: a group-set failed, the others are applied
+        """
+        await self.fetch(force)
+        changes = self.diff(desired)
+        if not changes:
+            return changes
+        async with self.client.batch() as batch:
+            futures = [
+                (name, settings, await batch.group_set(name=name, **settings))
+                for name, settings in changes.items()
+            ]
+        failed = []
+        for name, settings, future in futures:
+            err = future.exception()
+            if err is not None:
+                failed.append((name, err))
+                continue
+            group = self.groups.setdefault(name, {"name": name})
+            group.update({KEYS[k]: v for k, v in settings.items()})
+        if failed:
+            self.invalidate()
+            raise TransmissionException(
+                "group-set failed on {}: {}".format(
+                    self.client.daemon,
+                    ", ".join("{} ({})".format(name, err) for name, err in failed),
+                )
+            )
+        return changes
+
+    async def assign(
+        self,
+        assignments: Mapping[Union[int, str], str],
+        check: bool = True,
+    ) -> Dict[str, List[Union[int, str]]]:
+        """
+        Move torrents into groups with one torrent-set per group, "" for no group
+
+        :param assignments: torrent id or hash -> group name
+        :param check: read the torrents' current group first and skip those
+         already in place, costs one torrent-get
+        :return: the torrents moved, by group
+        """
+        pending = dict(assignments)
+        if check and pending:
+            data = await self.client.torrent_get(
+                ["id", "hashString", "group"], ids=list(pending)
+            )
+            for torrent in data.get("torrents") or ():
+                for key in (torrent["id"], torrent["hashString"]):
+                    if pending.get(key) == torrent["group"]:
+                        del pending[key]
+        by_group: Dict[str, List[Union[int, str]]] = {}
+        for tid, name in pending.items():
+            by_group.setdefault(name, []).append(tid)
+        if by_group:
+            async with self.client.batch() as batch:
+                futures = [
+                    (name, await batch.torrent_set(ids=ids, group=name))
+                    for name, ids in by_group.items()
+                ]
+            failed = [(name, f.exception()) for name, f in futures if f.exception()]
+            if failed:
+                raise TransmissionException(
+                    "moving torrents failed on {}: {}".format(
+                        self.client.daemon,
+                        ", ".join("{} ({})".format(name, err) for name, err in failed),
+                    )
+                )
+        return by_group
+
+
+async def sync_fleet(
+    managers: Iterable[GroupManager], desired: Desired, force: bool = False
+) -> List[Union[Dict[str, Dict[str, Any]], BaseException]]:
+    """
+    ``GroupManager.sync`` on every daemon concurrently, a daemon which fails
+    yields its exception in place of the changes
+    """
+    return await asyncio.gather(
+        *(manager.sync(desired, force) for manager in managers), return_exceptions=True
+    )
@@ -0,0 +1,347 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Find which candidate directory holds a torrent's data by hashing a sample of
+its pieces locally, then point the daemon there with
+``torrent_set_location(move=False)`` instead of letting it verify every guess::
+
+    match = await relocate(client, tid, "/var/lib/transmission/torrents/x.torrent",
+                           ["/mnt/old", "/mnt/new", "/srv/media"])
+"""
+
+import asyncio
+import hashlib
+import mmap
+import os
+import random
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    FrozenSet,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from aiotr.exception import TransmissionException
+
+PIECE_HASH_SIZE = 20
+
+
+def bdecode(data: bytes) -> Any:
+    """
+    Decode bencoded ``data``, dict keys become ``str``, strings stay ``bytes``
+    """
+    value, end = _decode(data, 0)
+    if end != len(data):
+        raise ValueError("trailing data after offset {}".format(end))
+    return value
+
+
+def _decode(data: bytes, i: int) -> Tuple[Any, int]:
+    c = data[i : i + 1]
+    if c == b"i":
+        end = data.index(b"e", i)
+        return int(data[i + 1 : end]), end + 1
+    if c == b"l":
+        i += 1
+        items = []
+        while data[i : i + 1] != b"e":
+            item, i = _decode(data, i)
+            items.append(item)
+        return items, i + 1
+    if c == b"d":
+        i += 1
+        result = {}
+        while data[i : i + 1] != b"e":
+            key, i = _decode(data, i)
+            result[key.decode("utf-8", "surrogateescape")], i = _decode(data, i)
+        return result, i + 1
+    if c.isdigit():
+        colon = data.index(b":", i)
+        start = colon + 1
+        end = start + int(data[i:colon])
+        if end > len(data):
+            raise ValueError("string at offset {} runs past the end".format(i))
+        return data[start:end], end
+    raise ValueError("invalid bencode at offset {}".format(i))
+
+
+def bencode(value: Any) -> bytes:
+    if isinstance(value, int):
+        return b"i%de" % value
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        return b"%d:%s" % (len(value), value)
+    if isinstance(value, list):
+        return b"l" + b"".join(bencode(v) for v in value) + b"e"
+    if isinstance(value, dict):
+        items = sorted(
+            (k.encode() if isinstance(k, str) else k, v) for k, v in value.items()
+        )
+        return b"d" + b"".join(bencode(k) + bencode(v) for k, v in items) + b"e"
+    raise TypeError("cannot bencode {}".format(type(value).__name__))
+
+
+class Metainfo(NamedTuple):
+    name: str
+    piece_length: int
+    pieces: bytes  # concatenated sha1 digests
+    files: Tuple[Tuple[str, int], ...]  # (path relative to the location, length)
+    # indices in ``files`` of BEP 47 padding files, zeros never written to disk
+    padding: FrozenSet[int] = frozenset()
+
+    @classmethod
+    def parse(cls, data: bytes) -> "Metainfo":
+        """
+        :param data: content of a v1 or hybrid .torrent file
+        :raise ValueError: for v2-only metainfo, which has no v1 piece hashes
+        """
+        info = bdecode(data)["info"]
+        name = info["name"].decode("utf-8", "surrogateescape")
+        if "pieces" not in info:
+            raise ValueError(
+                "{} is v2-only metainfo, only v1 piece hashes are supported".format(
+                    name
+                )
+            )
+        padding: FrozenSet[int] = frozenset()
+        if "files" in info:
+            files = tuple(
+                (
+                    os.path.join(
+                        name, *(p.decode("utf-8", "surrogateescape") for p in f["path"])
+                    ),
+                    f["length"],
+                )
+                for f in info["files"]
+            )
+            padding = frozenset(
+                i for i, f in enumerate(info["files"]) if b"p" in f.get("attr", b"")
+            )
+        else:
+            files = ((name, info["length"]),)
+        return cls(name, info["piece length"], info["pieces"], files, padding)
+
+    @property
+    def piece_count(self) -> int:
+        return len(self.pieces) // PIECE_HASH_SIZE
+
+    @property
+    def total_size(self) -> int:
+        return sum(length for _, length in self.files)
+
+    def digest(self, index: int) -> bytes:
+        return self.pieces[index * PIECE_HASH_SIZE : (index + 1) * PIECE_HASH_SIZE]
+
+    def sample(self, count: int, seed: int = 0) -> List[int]:
+        """
+        ``count`` piece indices spread over the torrent, the last piece included
+        """
+        total = self.piece_count
+        if count >= total:
+            return list(range(total))
+        rnd = random.Random(seed)
+        stride = total / count
+        picked = {int(i * stride + rnd.random() * stride) for i in range(count - 1)}
+        picked.add(total - 1)
+        return sorted(picked)
+
+
+class Match(NamedTuple):
+    location: str
+    score: float  # matching share of the sampled pieces
+    present: int  # bytes found on disk with the expected length
+
+
+def _hash_pieces(
+    location: str,
+    files: Sequence[Tuple[str, int]],
+    piece_length: int,
+    pieces: Sequence[Tuple[int, bytes]],
+    padding: Collection[int] = (),
+) -> int:
+    """
+    Worker: how many of ``pieces`` (index, sha1) match the data under ``location``,
+    the files at ``padding`` indices hashed as zeros
+    """
+    maps: Dict[int, Optional[mmap.mmap]] = {}
+    handles = []
+    offsets = []
+    offset = 0
+    for _, length in files:
+        offsets.append(offset)
+        offset += length
+    total = offset
+
+    def view(i: int) -> Optional[mmap.mmap]:
+        if i not in maps:
+            maps[i] = None
+            path, length = files[i]
+            try:
+                f = open(os.path.join(location, path), "rb")
+            except OSError:
+                return None
+            handles.append(f)
+            if length and os.fstat(f.fileno()).st_size >= length:
+                maps[i] = mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ)
+        return maps[i]
+
+    matched = 0
+    try:
+        for index, expected in pieces:
+            start = index * piece_length
+            end = min(start + piece_length, total)
+            sha1 = hashlib.sha1()
+            ok = True
+            for i, (_, length) in enumerate(files):
+                lo, hi = offsets[i], offsets[i] + length
+                if hi <= start or lo >= end or not length:
+                    continue
+                if i in padding:
+                    sha1.update(bytes(min(end, hi) - max(start, lo)))
+                    continue
+                data = view(i)
+                if data is None:
+                    ok = False
+                    break
+                sha1.update(data[max(start, lo) - lo : min(end, hi) - lo])
+            if ok and sha1.digest() == expected:
+                matched += 1
+    finally:
+        for m in maps.values():
+            if m is not None:
+                m.close()
+        for f in handles:
+            f.close()
+    return matched
+
+
+def present_bytes(
+    location: str, files: Sequence[Tuple[str, int]], padding: Collection[int] = ()
+) -> int:
+    """
+    Bytes of the files found under ``location`` with at least their expected size,
+    padding files always count
+    """
+    total = 0
+    for i, (path, length) in enumerate(files):
+        if i in padding:
+            total += length
+            continue
+        try:
+            if os.stat(os.path.join(location, path)).st_size >= length:
+                total += length
+        except OSError:
+            pass
+    return total
+
+
+async def match_locations(
+    metainfo: Metainfo,
+    candidates: Sequence[str],
+    samples: int = 16,
+    executor: Optional[Executor] = None,
+    chunk: int = 4,
+) -> List[Match]:
+    """
+    Score every candidate directory, best first. Candidates without any file of
+    the right size are scored 0 without hashing. The file checks and the hashing
+    both run in the executor.
+
+    :param samples: pieces to hash per candidate
+    :param executor: runs the hashing, a ``ProcessPoolExecutor`` by default
+    :param chunk: pieces hashed per executor task
+    """
+    loop = asyncio.get_running_loop()
+    indices = metainfo.sample(samples)
+    pieces = [(i, metainfo.digest(i)) for i in indices]
+    owned = executor is None
+    pool = executor or ProcessPoolExecutor()
+    try:
+        padding = metainfo.padding
+        padded = sum(metainfo.files[i][1] for i in padding)
+        found = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    pool, present_bytes, location, metainfo.files, padding
+                )
+                for location in candidates
+            )
+        )
+        present = dict(zip(candidates, found))
+        jobs = []
+        for location in candidates:
+            if present[location] <= padded:
+                continue
+            for start in range(0, len(pieces), chunk):
+                future = loop.run_in_executor(
+                    pool,
+                    _hash_pieces,
+                    location,
+                    metainfo.files,
+                    metainfo.piece_length,
+                    pieces[start : start + chunk],
+                    padding,
+                )
+                jobs.append((location, future))
+        counts = dict.fromkeys(candidates, 0)
+        for location, future in jobs:
+            counts[location] += await future
+    finally:
+        if owned:
+            pool.shutdown(wait=False)
+    matches = [
+        Match(
+            location,
+            counts[location] / len(pieces) if pieces else 0.0,
+            present[location],
+        )
+        for location in candidates
+    ]
+    matches.sort(key=lambda m: (m.score, m.present), reverse=True)
+    return matches
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def relocate(
+    client,
+    tid: Union[int, str],
+    metainfo: Union[Metainfo, bytes, str],
+    candidates: Sequence[str],
+    samples: int = 16,
+    min_score: float = 0.5,
+    executor: Optional[Executor] = None,
+) -> Match:
+    """
+    Point torrent ``tid`` at the candidate holding its data, without moving files
+
+    :param client: a ``TransmissionClient``
+    :param metainfo: parsed metainfo, .torrent content or the path of a .torrent file
+    :param min_score: lowest share of matching sampled pieces to accept
+    :raise TransmissionException: when no candidate reaches ``min_score``
+    """
+    if isinstance(metainfo, str):
+        metainfo = await asyncio.get_running_loop().run_in_executor(
+            executor, _read, metainfo
+        )
+    if isinstance(metainfo, bytes):
+        metainfo = Metainfo.parse(metainfo)
+    matches = await match_locations(metainfo, candidates, samples, executor)
+    best = matches[0] if matches else None
+    if best is None or best.score < min_score or not best.score:
+        raise TransmissionException(
+            "no candidate holds the data of {}: {}".format(metainfo.name, matches)
+        )
+    await client.torrent_set_location(best.location, ids=[tid], move=False)
+    return best
@@ -0,0 +1,190 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# seconds, 10us to ~84s
+LATENCY_BOUNDS: Tuple[float, ...] = tuple(1e-5 * 2**i for i in range(24))
+# bytes, 64B to 1GiB
+SIZE_BOUNDS: Tuple[float, ...] = tuple(64 * 4**i for i in range(13))
+
+PHASES = ("schedule", "queue", "serialize", "wire", "read", "parse")
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram, ``counts[i]`` holds the observations ``<= bounds[i]``
+    and the last slot the ones above every bound
+
+    :param integer: keep ``sum`` an exact ``int``, e.g. for byte counts
+    """
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BOUNDS, integer: bool = False):
+        self.bounds = bounds
+        self.counts = array("Q", bytes(8 * (len(bounds) + 1)))
+        self.count = 0
+        self.sum: Union[int, float] = 0 if integer else 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the ``q`` quantile
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return self.bounds[i] if i < len(self.bounds) else float("inf")
+        return float("inf")
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class RequestRecord:
+    """
+    Timings (seconds) and sizes (bytes) of one rpc exchange
+    """
+
+    __slots__ = (
+        "daemon",
+        "method",
+        "schedule",
+        "queue",
+        "serialize",
+        "wire",
+        "read",
+        "parse",
+        "request_bytes",
+        "response_bytes",
+        "retries",
+        "result",
+        "new_connection",
+    )
+
+    def __init__(self, daemon: str, method: str):
+        self.daemon = daemon
+        self.method = method
+        self.schedule = 0.0  # waiting in the priority lanes of a ``Scheduler``
+        self.queue = 0.0  # waiting for a pooled connection, timed with ``trace``
+        self.serialize = 0.0
+        self.wire = 0.0  # sending the request until the response headers arrive
+        self.read = 0.0
+        self.parse = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0  # 409 session-id handshakes
+        self.result = "success"  # or the exception class name
+        self.new_connection = False
+
+
+class RequestHooks:
+    """
+    Receives a ``RequestRecord`` per rpc exchange, pass an instance as
+    ``TransmissionClient(metrics=...)``. Without one the client skips every timing call.
+    """
+
+    def on_request(self, record: RequestRecord) -> None:
+        pass
+
+    def trace_config(self) -> "Optional[aiohttp.TraceConfig]":
+        """
+        An aiohttp TraceConfig to install on the client session, if any
+        """
+        return None
+
+
+class MetricsRecorder(RequestHooks):
+    """
+    Aggregates ``RequestRecord`` into histograms per (daemon, method)
+
+    :param trace: install an aiohttp TraceConfig to time connection-pool queueing
+     and count new and reused connections
+    """
+
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+        # (daemon, method, phase) -> Histogram
+        self.latency: Dict[Tuple[str, str, str], Histogram] = {}
+        # (daemon, method, "request" | "response") -> Histogram
+        self.size: Dict[Tuple[str, str, str], Histogram] = {}
+        # (daemon, method, result) -> count
+        self.results: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        # (daemon, method) -> 409 retries
+        self.retries: Dict[Tuple[str, str], int] = defaultdict(int)
+        # (daemon, "created" | "reused") -> count
+        self.connections: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def _histogram(
+        self, table: dict, key: tuple, bounds: Sequence[float], integer: bool = False
+    ) -> Histogram:
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(bounds, integer)
+        return histogram
+
+    def on_request(self, record: RequestRecord) -> None:
+        daemon, method = record.daemon, record.method
+        for phase in PHASES:
+            self._histogram(
+                self.latency, (daemon, method, phase), LATENCY_BOUNDS
+            ).observe(getattr(record, phase))
+        self._histogram(
+            self.size, (daemon, method, "request"), SIZE_BOUNDS, True
+        ).observe(record.request_bytes)
+        self._histogram(
+            self.size, (daemon, method, "response"), SIZE_BOUNDS, True
+        ).observe(record.response_bytes)
+        self.results[(daemon, method, record.result)] += 1
+        if record.retries:
+            self.retries[(daemon, method)] += record.retries
+        if self.trace:
+            self.connections[
+                (daemon, "created" if record.new_connection else "reused")
+            ] += 1
+
+    def trace_config(self) -> "Optional[aiohttp.TraceConfig]":
+        if not self.trace:
+            return None
+        import aiohttp
+
+        def record_of(ctx) -> Optional[RequestRecord]:
+            record = ctx.trace_request_ctx
+            return record if isinstance(record, RequestRecord) else None
+
+        async def on_queued_start(session, ctx, params):
+            ctx.queued = time.perf_counter()
+
+        async def on_queued_end(session, ctx, params):
+            record = record_of(ctx)
+            if record is not None and getattr(ctx, "queued", None):
+                record.queue += time.perf_counter() - ctx.queued
+
+        async def on_connection_create_end(session, ctx, params):
+            record = record_of(ctx)
+            if record is not None:
+                record.new_connection = True
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        return trace_config
@@ -0,0 +1,303 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Swarm analytics over the "peers" of many torrents. Peers are fetched a bounded
+chunk of torrents at a time and appended to ``PeerTable``, which keeps one
+typed array per attribute: addresses packed in 16 bytes (IPv4 as IPv4-mapped
+IPv6), client names and flag strings interned to small integers, booleans in a
+bit field. Aggregates run on numpy views of those arrays when numpy is
+importable and fall back to plain python otherwise::
+
+    table = await PeerCollector(client, chunk=200).collect()
+    table.top_clients(10)
+    table.subnets(24)
+"""
+
+import ipaddress
+import socket
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None  # type: ignore
+
+PEER_FIELDS = ("id", "peers")
+
+# bits of PeerTable.flags
+ENCRYPTED = 1
+INCOMING = 2
+UTP = 4
+DOWNLOADING_FROM = 8
+UPLOADING_TO = 16
+
+FLAGS = (
+    ("isEncrypted", ENCRYPTED),
+    ("isIncoming", INCOMING),
+    ("isUTP", UTP),
+    ("isDownloadingFrom", DOWNLOADING_FROM),
+    ("isUploadingTo", UPLOADING_TO),
+)
+
+V4_PREFIX = b"\x00" * 10 + b"\xff\xff"
+
+
+def pack_address(address: str) -> bytes:
+    """
+    16 bytes, IPv4 addresses mapped into ::ffff:0:0/96
+    """
+    if ":" in address:
+        return socket.inet_pton(socket.AF_INET6, address.split("%", 1)[0])
+    return V4_PREFIX + socket.inet_aton(address)
+
+
+def unpack_address(packed: bytes) -> str:
+    if packed[:12] == V4_PREFIX:
+        return socket.inet_ntoa(packed[12:])
+    return socket.inet_ntop(socket.AF_INET6, packed)
+
+
+class Interner:
+    """
+    Strings to dense integer codes and back
+    """
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def __call__(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class PeerTable:
+    """
+    Peers of many torrents, one array per attribute
+    """
+
+    def __init__(self):
+        self.torrent = array("q")  # torrent id
+        self.address = bytearray()  # 16 bytes per peer
+        self.port = array("H")
+        self.client = array("I")  # code in ``clients``
+        self.flag_str = array("I")  # code in ``flag_strs``
+        self.flags = array("B")  # ENCRYPTED | INCOMING | ...
+        self.progress = array("f")
+        self.rate_to_client = array("q")
+        self.rate_to_peer = array("q")
+        self.clients = Interner()
+        self.flag_strs = Interner()
+
+    def __len__(self) -> int:
+        return len(self.port)
+
+    def extend(self, tid: int, peers: Iterable[dict]) -> None:
+        """
+        Append the "peers" of torrent ``tid``
+        """
+        client = self.clients
+        flag_str = self.flag_strs
+        for peer in peers:
+            self.torrent.append(tid)
+            self.address += pack_address(peer["address"])
+            self.port.append(peer["port"])
+            self.client.append(client(peer.get("clientName", "")))
+            self.flag_str.append(flag_str(peer.get("flagStr", "")))
+            bits = 0
+            for key, bit in FLAGS:
+                if peer.get(key):
+                    bits |= bit
+            self.flags.append(bits)
+            self.progress.append(peer.get("progress", 0.0))
+            self.rate_to_client.append(peer.get("rateToClient", 0))
+            self.rate_to_peer.append(peer.get("rateToPeer", 0))
+
+    def row(self, i: int) -> dict:
+        """
+        One peer back as a dict, for display
+        """
+        return {
+            "torrent": self.torrent[i],
+            "address": unpack_address(bytes(self.address[16 * i : 16 * i + 16])),
+            "port": self.port[i],
+            "clientName": self.clients.values[self.client[i]],
+            "flagStr": self.flag_strs.values[self.flag_str[i]],
+            "isEncrypted": bool(self.flags[i] & ENCRYPTED),
+            "isIncoming": bool(self.flags[i] & INCOMING),
+            "isUTP": bool(self.flags[i] & UTP),
+            "progress": self.progress[i],
+            "rateToClient": self.rate_to_client[i],
+            "rateToPeer": self.rate_to_peer[i],
+        }
+
+    def nbytes(self) -> int:
+        columns = (
+            self.torrent,
+            self.port,
+            self.client,
+            self.flag_str,
+            self.flags,
+            self.progress,
+            self.rate_to_client,
+            self.rate_to_peer,
+        )
+        return len(self.address) + sum(c.itemsize * len(c) for c in columns)
+
+    # aggregates
+    def _count_flag(self, bit: int) -> int:
+        if np is not None:
+            flags = np.frombuffer(self.flags, dtype=np.uint8)
+            return int(np.count_nonzero(flags & bit))
+        return sum(1 for f in self.flags if f & bit)
+
+    def flag_ratio(self, bit: int) -> float:
+        """
+        Share of the peers with ``bit`` set, e.g. ``ENCRYPTED``
+        """
+        return self._count_flag(bit) / len(self) if len(self) else 0.0
+
+    def encrypted_ratio(self) -> float:
+        return self.flag_ratio(ENCRYPTED)
+
+    def directions(self) -> Dict[str, int]:
+        incoming = self._count_flag(INCOMING)
+        return {"incoming": incoming, "outgoing": len(self) - incoming}
+
+    def top_clients(self, n: int = 10) -> List[Tuple[str, int]]:
+        """
+        The ``n`` most common client names with their peer counts
+        """
+        if np is not None:
+            counts = np.bincount(
+                np.frombuffer(self.client, dtype=np.uint32), minlength=len(self.clients)
+            )
+            order = np.argsort(-counts, kind="stable")[:n]
+            return [
+                (self.clients.values[i], int(counts[i])) for i in order if counts[i]
+            ]
+        counts = Counter(self.client)
+        return [(self.clients.values[c], k) for c, k in counts.most_common(n)]
+
+    def client_rates(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Client name -> (summed rateToClient, summed rateToPeer)
+        """
+        size = len(self.clients)
+        if np is not None:
+            codes = np.frombuffer(self.client, dtype=np.uint32)
+            down = np.bincount(
+                codes, np.frombuffer(self.rate_to_client, dtype=np.int64), size
+            )
+            up = np.bincount(
+                codes, np.frombuffer(self.rate_to_peer, dtype=np.int64), size
+            )
+            return {
+                name: (int(down[i]), int(up[i]))
+                for i, name in enumerate(self.clients.values)
+            }
+        result = [[0, 0] for _ in range(size)]
+        for code, down, up in zip(self.client, self.rate_to_client, self.rate_to_peer):
+            result[code][0] += down
+            result[code][1] += up
+        return {
+            name: (result[i][0], result[i][1])
+            for i, name in enumerate(self.clients.values)
+        }
+
+    def subnets(
+        self, prefix: int = 24, n: int = 10, v6_prefix: int = 48
+    ) -> List[Tuple[str, int, float]]:
+        """
+        The ``n`` networks holding the most peers, IPv4 grouped by ``prefix`` bits
+        and IPv6 by ``v6_prefix`` bits
+
+        :return: (network, peers, share of all peers)
+        """
+        total = len(self)
+        if not total:
+            return []
+        v4_mask = (0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF
+        v6_mask = ((1 << 128) - 1) ^ ((1 << (128 - v6_prefix)) - 1)
+        if np is not None:
+            raw = np.frombuffer(self.address, dtype=np.uint8).reshape(-1, 16)
+            is_v4 = (raw[:, :12] == np.frombuffer(V4_PREFIX, dtype=np.uint8)).all(1)
+            v4 = raw[is_v4, 12:].copy().view(">u4").ravel() & np.uint32(v4_mask)
+            networks, counts = np.unique(v4, return_counts=True)
+            found = [
+                (str(ipaddress.IPv4Network((int(net), prefix))), int(count))
+                for net, count in zip(networks, counts)
+            ]
+            v6_rows = raw[~is_v4]
+        else:
+            counter: Counter = Counter()
+            v6_rows = []
+            for i in range(total):
+                packed = bytes(self.address[16 * i : 16 * i + 16])
+                if packed[:12] == V4_PREFIX:
+                    counter[int.from_bytes(packed[12:], "big") & v4_mask] += 1
+                else:
+                    v6_rows.append(packed)
+            found = [
+                (str(ipaddress.IPv4Network((net, prefix))), count)
+                for net, count in counter.items()
+            ]
+        v6: Counter = Counter(
+            int.from_bytes(bytes(packed), "big") & v6_mask for packed in v6_rows
+        )
+        found.extend(
+            (str(ipaddress.IPv6Network((net, v6_prefix))), count)
+            for net, count in v6.items()
+        )
+        found.sort(key=lambda item: item[1], reverse=True)
+        return [(net, count, count / total) for net, count in found[:n]]
+
+
+class PeerCollector:
+    """
+    :param client: a ``TransmissionClient``
+    :param chunk: torrents whose peers are fetched per torrent-get, bounds the
+     decoded response held in memory at once
+    """
+
+    def __init__(self, client, chunk: int = 200):
+        self.client = client
+        self.chunk = chunk
+
+    async def active(self) -> List[int]:
+        """
+        Ids of the torrents with connected peers
+        """
+        data = await self.client.torrent_get(["id", "peersConnected"])
+        return [t["id"] for t in data.get("torrents") or () if t["peersConnected"] > 0]
+
+    async def collect(
+        self,
+        ids: Optional[Sequence[Union[int, str]]] = None,
+        table: Optional[PeerTable] = None,
+    ) -> PeerTable:
+        """
+        :param ids: torrents to read, the ``active`` ones by default
+        :param table: append to this table instead of a new one
+        """
+        if ids is None:
+            ids = await self.active()
+        table = PeerTable() if table is None else table
+        for start in range(0, len(ids), self.chunk):
+            data = await self.client.torrent_get(
+                list(PEER_FIELDS), ids=list(ids[start : start + self.chunk])
+            )
+            for torrent in data.get("torrents") or ():
+                table.extend(torrent["id"], torrent["peers"])
+            del data
+        return table
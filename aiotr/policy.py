@@ -0,0 +1,538 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Declarative cleanup and limit rules run against one or many daemons. A run
+fetches the union of the fields the rules read with a single torrent-get,
+evaluates every rule over whole columns at once (numpy arrays when numpy is
+importable) and sends the resulting actions in one batch, one request per
+distinct (method, arguments) pair::
+
+    policy = Policy([
+        Rule("ratio", (Field("uploadRatio") > 2) & (Field("secondsSeeding") > 7 * DAY),
+             "remove", {"delete_local_data": True}),
+        Rule("idle", Now() - Field("activityDate") > 30 * DAY, "stop"),
+        Rule("tv", Field("labels").contains("tv"), "set", {"uploadLimit": 200,
+                                                           "uploadLimited": True}),
+        Rule("disk", FreeSpace() < 10 * GIB, "stop"),
+    ])
+    print((await policy.run(client, dry_run=True)).format())
+"""
+
+import asyncio
+import logging
+import operator
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+GIB = 1 << 30
+
+# rule action -> client method
+ACTIONS = {
+    "remove": "torrent_remove",
+    "stop": "torrent_stop",
+    "start": "torrent_start",
+    "set": "torrent_set",
+}
+
+
+def _column(values: List[Any]) -> Any:
+    """
+    A numpy array for numeric columns when numpy is available, the list otherwise
+    """
+    if np is None:
+        return values
+    try:
+        array = np.asarray(values)
+    except ValueError:  # ragged, e.g. "labels"
+        return values
+    return array if array.ndim == 1 and array.dtype.kind in "biuf" else values
+
+
+COMPARISONS = frozenset(
+    (operator.gt, operator.ge, operator.lt, operator.le, operator.eq, operator.ne)
+)
+
+
+def _apply(op: Callable, a: Any, b: Any) -> Any:
+    """
+    ``op(a, b)`` where a missing value (None) matches no comparison, counts as
+    false for ``&`` and ``|`` and stays missing through arithmetic
+    """
+    if a is None or b is None:
+        if op is operator.and_ or op is operator.or_:
+            return op(bool(a), bool(b))
+        return False if op in COMPARISONS else None
+    return op(a, b)
+
+
+def _elementwise(op: Callable, left: Any, right: Any) -> Any:
+    """
+    ``op`` over columns and scalars, numpy broadcasting when no operand is a
+    plain list, a python loop otherwise
+    """
+    if not isinstance(left, list) and not isinstance(right, list):
+        return op(left, right)
+    if np is not None:
+        left = left.tolist() if isinstance(left, np.ndarray) else left
+        right = right.tolist() if isinstance(right, np.ndarray) else right
+    if not isinstance(left, list):
+        return _column([_apply(op, left, b) for b in right])
+    if not isinstance(right, list):
+        return _column([_apply(op, a, right) for a in left])
+    return _column([_apply(op, a, b) for a, b in zip(left, right)])
+
+
+class Expr:
+    """
+    A column expression, build them from ``Field``, ``Now`` and ``FreeSpace``
+    with comparison, arithmetic, ``&``, ``|`` and ``~``
+    """
+
+    fields: FrozenSet[str] = frozenset()
+    free_space = False  # whether evaluating needs free-space of download dirs
+
+    def evaluate(self, snapshot: "Snapshot") -> Any:
+        raise NotImplementedError
+
+    def _binary(self, other, op: Callable, symbol: str) -> "Expr":
+        return Binary(
+            self, other if isinstance(other, Expr) else Const(other), op, symbol
+        )
+
+    def __gt__(self, other):
+        return self._binary(other, operator.gt, ">")
+
+    def __ge__(self, other):
+        return self._binary(other, operator.ge, ">=")
+
+    def __lt__(self, other):
+        return self._binary(other, operator.lt, "<")
+
+    def __le__(self, other):
+        return self._binary(other, operator.le, "<=")
+
+    def __eq__(self, other):  # type: ignore[override]
+        return self._binary(other, operator.eq, "==")
+
+    def __ne__(self, other):  # type: ignore[override]
+        return self._binary(other, operator.ne, "!=")
+
+    __hash__ = object.__hash__
+
+    def __add__(self, other):
+        return self._binary(other, operator.add, "+")
+
+    def __sub__(self, other):
+        return self._binary(other, operator.sub, "-")
+
+    def __mul__(self, other):
+        return self._binary(other, operator.mul, "*")
+
+    def __truediv__(self, other):
+        return self._binary(other, operator.truediv, "/")
+
+    def __and__(self, other):
+        return self._binary(other, operator.and_, "&")
+
+    def __or__(self, other):
+        return self._binary(other, operator.or_, "|")
+
+    def __invert__(self):
+        return Not(self)
+
+    def __bool__(self):
+        raise TypeError("use & | ~ instead of and/or/not to combine rule expressions")
+
+    def contains(self, value: Any) -> "Expr":
+        """
+        Whether a list column (e.g. "labels") holds ``value``
+        """
+        return Contains(self, value)
+
+    def isin(self, values: Iterable[Any]) -> "Expr":
+        return IsIn(self, frozenset(values))
+
+
+class Const(Expr):
+    def __init__(self, value: Any):
+        self.value = value
+
+    def evaluate(self, snapshot: "Snapshot") -> Any:
+        return self.value
+
+    def __repr__(self) -> str:
+        return repr(self.value)
+
+
+class Field(Expr):
+    def __init__(self, name: str):
+        self.name = name
+        self.fields = frozenset((name,))
+
+    def evaluate(self, snapshot: "Snapshot") -> Any:
+        return snapshot.column(self.name)
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+class Now(Expr):
+    """
+    Unix time of the snapshot, for date fields such as "activityDate"
+    """
+
+    def evaluate(self, snapshot: "Snapshot") -> Any:
+        return snapshot.taken
+
+    def __repr__(self) -> str:
+        return "now"
+
+
+class FreeSpace(Expr):
+    """
+    Free bytes in each torrent's download directory, one free-space rpc per
+    distinct directory
+    """
+
+    fields = frozenset(("downloadDir",))
+    free_space = True
+
+    def evaluate(self, snapshot: "Snapshot") -> Any:
+        return _column([snapshot.free.get(d) for d in snapshot.column("downloadDir")])
+
+    def __repr__(self) -> str:
+        return "free_space"
+
+
+class Binary(Expr):
+    def __init__(self, left: Expr, right: Expr, op: Callable, symbol: str):
+        self.left = left
+        self.right = right
+        self.op = op
+        self.symbol = symbol
+        self.fields = left.fields | right.fields
+        self.free_space = left.free_space or right.free_space
+
+    def evaluate(self, snapshot: "Snapshot") -> Any:
+        return _elementwise(
+            self.op, self.left.evaluate(snapshot), self.right.evaluate(snapshot)
+        )
+
+    def __repr__(self) -> str:
+        return "({!r} {} {!r})".format(self.left, self.symbol, self.right)
+
+
+class Not(Expr):
+    def __init__(self, operand: Expr):
+        self.operand = operand
+        self.fields = operand.fields
+        self.free_space = operand.free_space
+
+    def evaluate(self, snapshot: "Snapshot") -> Any:
+        value = self.operand.evaluate(snapshot)
+        if isinstance(value, list):
+            return _column([not v for v in value])
+        return ~value if np is not None and isinstance(value, np.ndarray) else not value
+
+    def __repr__(self) -> str:
+        return "~{!r}".format(self.operand)
+
+
+class Contains(Expr):
+    def __init__(self, operand: Expr, value: Any):
+        self.operand = operand
+        self.value = value
+        self.fields = operand.fields
+        self.free_space = operand.free_space
+
+    def evaluate(self, snapshot: "Snapshot") -> Any:
+        value = self.value
+        return _column([value in (v or ()) for v in self.operand.evaluate(snapshot)])
+
+    def __repr__(self) -> str:
+        return "({!r} contains {!r})".format(self.operand, self.value)
+
+
+class IsIn(Contains):
+    def evaluate(self, snapshot: "Snapshot") -> Any:
+        values = self.value
+        column = self.operand.evaluate(snapshot)
+        if np is not None and isinstance(column, np.ndarray):
+            return np.isin(column, list(values))
+        return _column([v in values for v in column])
+
+    def __repr__(self) -> str:
+        return "({!r} in {!r})".format(self.operand, sorted(self.value))
+
+
+class Snapshot:
+    """
+    The fields of every torrent of one daemon, stored by column
+
+    :param columns: field -> one value per torrent, in the order of "id", None
+     where the daemon did not return the field
+    :param free: download dir -> free bytes
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, list],
+        free: Optional[Dict[str, int]] = None,
+        taken: Optional[float] = None,
+    ):
+        self.raw = columns
+        self.free = free or {}
+        self.taken = time.time() if taken is None else taken
+        self.columns: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.raw["id"])
+
+    @property
+    def ids(self) -> list:
+        return self.raw["id"]
+
+    def column(self, name: str) -> Any:
+        if name not in self.columns:
+            self.columns[name] = _column(self.raw[name])
+        return self.columns[name]
+
+
+class Rule(NamedTuple):
+    name: str
+    when: Expr
+    action: str  # a key of ACTIONS
+    arguments: Mapping[str, Any] = {}  # keyword arguments of the client method
+
+
+class Action(NamedTuple):
+    method: str
+    arguments: Dict[str, Any]
+    ids: List[Union[int, str]]
+    rules: Tuple[str, ...]  # rules which selected at least one of ``ids``
+
+
+class Report:
+    """
+    Outcome of one policy run against one daemon
+    """
+
+    def __init__(self, daemon: str, dry_run: bool):
+        self.daemon = daemon
+        self.dry_run = dry_run
+        self.torrents = 0
+        self.matched: Dict[str, int] = {}  # rule -> matching torrents
+        self.actions: List[Action] = []
+        self.errors: List[Tuple[Action, BaseException]] = []
+        # stage -> seconds, stages are fetch, free_space, evaluate and apply
+        self.timings: Dict[str, float] = {}
+
+    def format(self) -> str:
+        lines = [
+            "{}{}: {} torrents, {} actions in {:.3f}s".format(
+                "[dry run] " if self.dry_run else "",
+                self.daemon,
+                self.torrents,
+                len(self.actions),
+                sum(self.timings.values()),
+            )
+        ]
+        for rule, count in self.matched.items():
+            lines.append("  rule {}: {} matched".format(rule, count))
+        for action in self.actions:
+            lines.append(
+                "  {}({}) ids={} by {}".format(
+                    action.method,
+                    ", ".join(
+                        "{}={!r}".format(k, v) for k, v in action.arguments.items()
+                    ),
+                    action.ids,
+                    ",".join(action.rules),
+                )
+            )
+        for action, err in self.errors:
+            lines.append("  failed {} {}: {}".format(action.method, action.ids, err))
+        lines.append(
+            "  timings: "
+            + ", ".join("{}={:.3f}s".format(k, v) for k, v in self.timings.items())
+        )
+        return "\n".join(lines)
+
+
+class Policy:
+    """
+    :param rules: evaluated in order. A torrent selected by a "remove" rule gets
+     no other action; otherwise the last matching "stop"/"start" wins and
+     "set" arguments of every matching rule are merged, later rules overriding.
+    """
+
+    def __init__(self, rules: Sequence[Rule]):
+        for rule in rules:
+            if rule.action not in ACTIONS:
+                raise ValueError(
+                    "unknown action {!r} of rule {}".format(rule.action, rule.name)
+                )
+        self.rules = list(rules)
+        self.fields = sorted(
+            frozenset(("id",)).union(*(rule.when.fields for rule in self.rules))
+        )
+        self.free_space = any(rule.when.free_space for rule in self.rules)
+
+    async def snapshot(
+        self, client, timings: Optional[Dict[str, float]] = None
+    ) -> Snapshot:
+        """
+        Fetch every field the rules read with one torrent-get, plus free space
+        of each distinct download dir when a rule needs it
+        """
+        timings = {} if timings is None else timings
+        start = time.perf_counter()
+        if (
+            client.negotiate
+            and not client.codec.typed
+            and (await client.capabilities()).table_format
+        ):
+            data = await client.torrent_get(self.fields, format="table")
+            keys, *rows = data.get("torrents") or [self.fields]
+            count = len(rows)
+            columns = {k: list(v) for k, v in zip(keys, zip(*rows))}
+        else:
+            data = await client.torrent_get(self.fields)
+            torrents = data.get("torrents") or []
+            count = len(torrents)
+            columns = {
+                k: [
+                    t.get(k) if isinstance(t, dict) else getattr(t, k, None)
+                    for t in torrents
+                ]
+                for k in self.fields
+            }
+        # fields left out by the daemon, e.g. an older one, are missing everywhere
+        for name in self.fields:
+            columns.setdefault(name, [None] * count)
+        timings["fetch"] = time.perf_counter() - start
+        free: Dict[str, int] = {}
+        if self.free_space:
+            start = time.perf_counter()
+            dirs = set(columns["downloadDir"]) - {None}
+            async with client.batch() as batch:
+                futures = {d: await batch.free_space(d) for d in dirs}
+            free = {d: f.result()["size-bytes"] for d, f in futures.items()}
+            timings["free_space"] = time.perf_counter() - start
+        return Snapshot(columns, free)
+
+    def plan(self, snapshot: Snapshot) -> Tuple[List[Action], Dict[str, int]]:
+        """
+        The actions the rules call for, grouped by identical method and arguments
+
+        :return: actions and the number of torrents each rule matched
+        """
+        ids = snapshot.ids
+        matched: Dict[str, int] = {}
+        removing: Dict[int, Tuple[Dict[str, Any], List[str]]] = {}
+        running: Dict[int, Tuple[str, str]] = {}  # row -> (action, rule)
+        setting: Dict[int, Tuple[Dict[str, Any], List[str]]] = {}
+        for rule in self.rules:
+            mask = rule.when.evaluate(snapshot) if len(snapshot) else []
+            if np is not None and isinstance(mask, np.ndarray):
+                if mask.ndim == 0:
+                    mask = np.full(len(snapshot), bool(mask))
+                rows = np.flatnonzero(mask).tolist()
+            elif isinstance(mask, list):
+                rows = [i for i, hit in enumerate(mask) if hit]
+            else:
+                rows = list(range(len(snapshot))) if mask else []
+            matched[rule.name] = len(rows)
+            for row in rows:
+                if rule.action == "remove":
+                    entry = removing.setdefault(row, ({}, []))
+                    entry[0].update(rule.arguments)
+                    entry[1].append(rule.name)
+                elif rule.action == "set":
+                    entry = setting.setdefault(row, ({}, []))
+                    entry[0].update(rule.arguments)
+                    entry[1].append(rule.name)
+                else:
+                    running[row] = (rule.action, rule.name)
+        groups: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], Action] = {}
+
+        def add(action: str, row: int, arguments: Mapping[str, Any], rules) -> None:
+            key = (ACTIONS[action], tuple(sorted(arguments.items(), key=repr)))
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = Action(key[0], dict(arguments), [], ())
+            group.ids.append(ids[row])
+            names = tuple(r for r in rules if r not in group.rules)
+            if names:
+                groups[key] = group._replace(rules=group.rules + names)
+
+        for row, (arguments, rules) in removing.items():
+            add("remove", row, arguments, rules)
+        for row, (action, rule) in running.items():
+            if row not in removing:
+                add(action, row, {}, (rule,))
+        for row, (arguments, rules) in setting.items():
+            if row not in removing:
+                add("set", row, arguments, rules)
+        return list(groups.values()), matched
+
+    async def run(self, client, dry_run: bool = False) -> Report:
+        report = Report(client.daemon, dry_run)
+        snapshot = await self.snapshot(client, report.timings)
+        start = time.perf_counter()
+        report.torrents = len(snapshot)
+        report.actions, report.matched = self.plan(snapshot)
+        report.timings["evaluate"] = time.perf_counter() - start
+        if dry_run or not report.actions:
+            return report
+        start = time.perf_counter()
+        async with client.batch() as batch:
+            futures = [
+                await getattr(batch, action.method)(ids=action.ids, **action.arguments)
+                for action in report.actions
+            ]
+        for action, future in zip(report.actions, futures):
+            err = future.exception()
+            if err is not None:
+                logger.warning(
+                    "%s %s failed on %s: %s",
+                    action.method,
+                    action.ids,
+                    client.daemon,
+                    err,
+                )
+                report.errors.append((action, err))
+        report.timings["apply"] = time.perf_counter() - start
+        return report
+
+    async def run_fleet(
+        self, clients: Iterable, dry_run: bool = False
+    ) -> List[Union[Report, BaseException]]:
+        """
+        Run against every daemon concurrently, a daemon which fails yields its
+        exception in place of a report
+        """
+        return await asyncio.gather(
+            *(self.run(client, dry_run) for client in clients), return_exceptions=True
+        )
@@ -0,0 +1,46 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Connection pool settings of ``TransmissionClient``.
+"""
+
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+class PoolSettings(NamedTuple):
+    limit: int = 100  # simultaneous connections, 0 for no limit
+    limit_per_host: int = 0  # simultaneous connections to one daemon, 0 for no limit
+    # seconds an idle connection stays pooled, keep it below the daemon's own idle
+    # timeout so the pool never hands out a connection the daemon already dropped
+    keepalive_timeout: float = 15.0
+    ttl_dns_cache: Optional[int] = 10  # seconds, None caches forever
+    force_close: bool = False  # never reuse connections
+    prewarm: int = 0  # connections to open when entering ``async with``
+    # ping the daemon after this many idle seconds so pooled connections are
+    # either kept alive or found dead before a real request needs them
+    idle_check: Optional[float] = None
+
+
+def make_connector(
+    settings: PoolSettings, unix_socket: Optional[str] = None
+) -> "aiohttp.BaseConnector":
+    import aiohttp
+
+    # aiohttp already sets TCP_NODELAY on every connection it opens
+    common = dict(
+        limit=settings.limit,
+        limit_per_host=settings.limit_per_host,
+        force_close=settings.force_close,
+    )
+    if not settings.force_close:
+        common["keepalive_timeout"] = settings.keepalive_timeout
+    if unix_socket:
+        return aiohttp.UnixConnector(path=unix_socket, **common)
+    return aiohttp.TCPConnector(
+        ttl_dns_cache=settings.ttl_dns_cache,
+        use_dns_cache=True,
+        **common,
+    )
@@ -0,0 +1,120 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Retrying failed exchanges and failing fast while a daemon is down.
+"""
+
+import random
+import time
+from typing import Dict, FrozenSet, Iterable, Optional
+
+from aiotr.exception import TransmissionCircuitOpenException
+
+# methods which can be sent twice without changing the outcome
+IDEMPOTENT: FrozenSet[str] = frozenset(
+    {"torrent-get", "session-get", "session-stats", "free-space", "group-get"}
+)
+
+
+class RetryPolicy:
+    """
+    Retries connection failures and timeouts of idempotent methods with capped
+    exponential backoff and jitter. Anything else, e.g. a torrent-add whose
+    response was lost, is never sent again.
+
+    :param attempts: tries per request, including the first one
+    :param base: backoff of the first retry in seconds, doubled on each next one
+    :param cap: longest backoff in seconds
+    :param jitter: fraction of each backoff that is randomized, 1 for full jitter
+    :param idempotent: rpc methods safe to retry
+    :param session_retries: how many 409 session-id renewals to follow per try
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base: float = 0.1,
+        cap: float = 5.0,
+        jitter: float = 1.0,
+        idempotent: Iterable[str] = IDEMPOTENT,
+        session_retries: int = 3,
+    ):
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+        self.jitter = jitter
+        self.idempotent = frozenset(idempotent)
+        self.session_retries = session_retries
+
+    def retryable(self, methods: Iterable[str]) -> bool:
+        return self.attempts > 1 and all(m in self.idempotent for m in methods)
+
+    def backoff(self, retry: int) -> float:
+        """
+        Seconds to wait before retry number ``retry`` (0 based)
+        """
+        delay = min(self.cap, self.base * (2**retry))
+        return delay * (1.0 - self.jitter * random.random())
+
+
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+class CircuitBreaker:
+    """
+    Opens after ``threshold`` consecutive connection failures and rejects
+    requests for ``reset_timeout`` seconds, then lets one probe through and
+    closes again if it succeeds
+
+    :param threshold: consecutive failures which open the circuit
+    :param reset_timeout: seconds to stay open before probing
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.probing or time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before(self, daemon: str) -> None:
+        """
+        :raise TransmissionCircuitOpenException: while the circuit is open, or
+         a probe is already in flight
+        """
+        if self.opened_at is None:
+            return
+        if self.probing or time.monotonic() - self.opened_at < self.reset_timeout:
+            raise TransmissionCircuitOpenException(
+                "{} is unavailable after {} failures".format(daemon, self.failures)
+            )
+        self.probing = True
+
+    def success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def release(self) -> None:
+        """
+        Forget an unfinished probe, e.g. when it was cancelled
+        """
+        self.probing = False
+
+    def failure(self) -> None:
+        self.failures += 1
+        self.probing = False
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+# daemon -> breaker shared by every client of that daemon
+BREAKERS: Dict[str, CircuitBreaker] = {}
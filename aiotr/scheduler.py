@@ -0,0 +1,233 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Priority lanes in front of ``TransmissionClient.send_request``. At most
+``concurrency`` requests are in flight; when a slot frees up the next request
+comes from the lane with the lowest weighted pass (stride scheduling), so an
+interactive call overtakes queued background sweeps while background work
+still gets ``weight`` shares of the slots. A request waiting longer than
+``max_wait`` goes first regardless of weights, and a lane may be capped with a
+token bucket::
+
+    scheduler = Scheduler(concurrency=4)
+    client = TransmissionClient(scheduler=scheduler)
+    with priority("background"):
+        await client.torrent_verify()
+    await client.torrent_get(["id"], ids=1, priority="interactive")
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, List, NamedTuple, Optional
+
+from aiotr.deadline import remaining
+from aiotr.exception import TransmissionTimeoutException
+
+PRIORITY: ContextVar[str] = ContextVar("aiotr_priority", default="default")
+
+
+@contextmanager
+def priority(lane: str) -> Iterator[None]:
+    """
+    Send every rpc inside the block through ``lane``
+    """
+    token = PRIORITY.set(lane)
+    try:
+        yield
+    finally:
+        PRIORITY.reset(token)
+
+
+class LaneSettings(NamedTuple):
+    name: str
+    weight: float = 1.0  # share of the slots while every lane is busy
+    rate: Optional[float] = None  # requests per second, None for unlimited
+    burst: Optional[float] = None  # token bucket size, ``rate`` by default
+
+
+DEFAULT_LANES = (
+    LaneSettings("interactive", weight=8.0),
+    LaneSettings("default", weight=4.0),
+    LaneSettings("background", weight=1.0),
+)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.tokens = self.burst
+        self.stamp = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def ready(self) -> float:
+        """
+        Seconds until one token is available, 0 when there is one
+        """
+        self.refill()
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1.0
+
+
+class Lane:
+    __slots__ = ("settings", "stride", "passed", "bucket", "waiters")
+
+    def __init__(self, settings: LaneSettings):
+        self.settings = settings
+        self.stride = 1.0 / settings.weight
+        self.passed = 0.0
+        self.bucket = (
+            TokenBucket(settings.rate, settings.burst)
+            if settings.rate is not None
+            else None
+        )
+        # (enqueued at, future resolved when admitted)
+        self.waiters: Deque[tuple] = deque()
+
+    def head(self) -> Optional[tuple]:
+        waiters = self.waiters
+        while waiters and waiters[0][1].done():
+            waiters.popleft()  # cancelled or timed out while queued
+        return waiters[0] if waiters else None
+
+
+class Scheduler:
+    """
+    :param concurrency: requests in flight at once
+    :param lanes: lane settings, requests name their lane with ``priority``
+    :param max_wait: seconds after which a queued request is admitted before any
+     other, None to disable starvation protection
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        lanes=DEFAULT_LANES,
+        max_wait: Optional[float] = 5.0,
+    ):
+        self.concurrency = concurrency
+        self.max_wait = max_wait
+        self.lanes: Dict[str, Lane] = {s.name: Lane(s) for s in lanes}
+        self.active = 0
+        self.passed = 0.0  # pass of the last admitted request
+        self.timer: Optional[asyncio.TimerHandle] = None
+        # lane -> admitted requests
+        self.admitted: Dict[str, int] = {name: 0 for name in self.lanes}
+
+    def lane(self, name: str) -> Lane:
+        try:
+            return self.lanes[name]
+        except KeyError:
+            raise ValueError("unknown priority lane: {}".format(name)) from None
+
+    def queued(self) -> Dict[str, int]:
+        return {
+            name: sum(not fut.done() for _, fut in lane.waiters)
+            for name, lane in self.lanes.items()
+        }
+
+    async def acquire(self, name: Optional[str] = None) -> None:
+        """
+        Wait for a slot in lane ``name`` (the ``PRIORITY`` context by default)
+
+        :raise TransmissionTimeoutException: the ambient deadline passed while queued
+        """
+        lane = self.lane(name or PRIORITY.get())
+        if (
+            self.active < self.concurrency
+            and (lane.bucket is None or lane.bucket.ready() == 0.0)
+            and not any(other.head() for other in self.lanes.values())
+        ):
+            lane.passed = max(lane.passed, self.passed)
+            self.admit(lane)
+            return
+        future = asyncio.get_running_loop().create_future()
+        if lane.head() is None:
+            # an idle lane does not bank credit while it has nothing to send
+            lane.passed = max(lane.passed, self.passed)
+        lane.waiters.append((time.monotonic(), future))
+        self.dispatch()
+        left = remaining()
+        try:
+            if left is None:
+                await future
+            else:
+                await asyncio.wait_for(future, left)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise TransmissionTimeoutException(
+                "deadline passed in the {} queue".format(lane.settings.name)
+            ) from None
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # admitted and cancelled at the same time
+            raise
+
+    def admit(self, lane: Lane) -> None:
+        if lane.bucket is not None:
+            lane.bucket.take()
+        self.passed = lane.passed
+        lane.passed += lane.stride
+        self.active += 1
+        self.admitted[lane.settings.name] += 1
+
+    def release(self) -> None:
+        self.active -= 1
+        self.dispatch()
+
+    def pick(self) -> Optional[Lane]:
+        """
+        The lane to admit from next, None when no lane may send now
+        """
+        now = time.monotonic()
+        best: Optional[Lane] = None
+        oldest: Optional[Lane] = None
+        oldest_at = now
+        wake: List[float] = []
+        for lane in self.lanes.values():
+            head = lane.head()
+            if head is None:
+                continue
+            if lane.bucket is not None:
+                delay = lane.bucket.ready()
+                if delay:
+                    wake.append(delay)
+                    continue
+            if best is None or lane.passed < best.passed:
+                best = lane
+            if head[0] < oldest_at:
+                oldest, oldest_at = lane, head[0]
+        if (
+            self.max_wait is not None
+            and oldest is not None
+            and now - oldest_at >= self.max_wait
+        ):
+            return oldest
+        if best is None and wake and self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(min(wake), self._wake)
+        return best
+
+    def _wake(self) -> None:
+        self.timer = None
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        while self.active < self.concurrency:
+            lane = self.pick()
+            if lane is None:
+                return
+            _, future = lane.waiters.popleft()
+            self.admit(lane)
+            future.set_result(None)
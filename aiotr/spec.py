@@ -0,0 +1,932 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Declarative description of the rpc methods. Each ``Method`` maps python
+parameter names to rpc argument keys; the client methods and the argument
+builders are compiled from it.
+"""
+
+import inspect
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from typing_extensions import Literal
+
+Ids = Optional[Union[int, List[Union[int, str]], Literal["recently-active"]]]
+
+REQUIRED: Any = inspect.Parameter.empty
+
+
+class Arg(NamedTuple):
+    name: str  # python parameter name
+    key: str  # rpc argument key
+    type: Any = Any
+    default: Any = None  # REQUIRED for arguments without a default
+
+
+class Method(NamedTuple):
+    name: str  # python method name
+    method: str  # rpc method name
+    args: Tuple[Arg, ...] = ()
+    doc: Optional[str] = None
+
+
+# keyword-only options of every client method, forwarded to ``rpc``
+CALL_OPTIONS: Dict[str, Any] = {
+    "timeout": Optional[float],  # seconds for this call
+    "deadline": Optional[float],  # absolute time.monotonic() for this call
+    "priority": Optional[str],  # scheduler lane, see aiotr.scheduler
+}
+
+
+def _source(
+    spec: Method, head: str, tail: str, params: List[str], options: bool = False
+) -> str:
+    params = params + [
+        arg.name if arg.default is REQUIRED else "{}={!r}".format(arg.name, arg.default)
+        for arg in spec.args
+    ]
+    if options:
+        params.append("*")
+        params.extend("{}=None".format(name) for name in CALL_OPTIONS)
+    lines = [
+        head.format(name=spec.name, params=", ".join(params)),
+        "    arguments = {}",
+    ]
+    for arg in spec.args:
+        if arg.default is REQUIRED:
+            lines.append("    arguments[{!r}] = {}".format(arg.key, arg.name))
+        else:
+            # only None means "not set", falsy values like False and 0 are sent
+            lines.append("    if {} is not None:".format(arg.name))
+            lines.append("        arguments[{!r}] = {}".format(arg.key, arg.name))
+    lines.append(tail.format(method=spec.method))
+    return "\n".join(lines) + "\n"
+
+
+def _compile(spec: Method, source: str, options: bool = False) -> Callable:
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, "<aiotr.spec {}>".format(spec.method), "exec"), namespace)
+    func = namespace[spec.name]
+    func.__annotations__ = {arg.name: arg.type for arg in spec.args}
+    if options:
+        func.__annotations__.update(CALL_OPTIONS)
+    func.__doc__ = spec.doc
+    return func
+
+
+def compile_builder(spec: Method) -> Callable[..., dict]:
+    """
+    A function taking the python parameters of ``spec`` and returning the
+    rpc arguments dict holding only the ones which are set
+    """
+    source = _source(spec, "def {name}({params}):", "    return arguments", [])
+    builder = _compile(spec, source)
+    builder.__annotations__["return"] = dict
+    return builder
+
+
+def compile_method(spec: Method) -> Callable:
+    """
+    The ``async`` client method for ``spec``, sending its arguments with ``self.rpc``
+    """
+    forward = "".join(", {0}={0}".format(name) for name in CALL_OPTIONS)
+    source = _source(
+        spec,
+        "async def {name}({params}):",
+        "    return await self.rpc({method!r}, arguments" + forward + ")",
+        ["self"],
+        options=True,
+    )
+    return _compile(spec, source, options=True)
+
+
+# 3. Torrent Requests
+# 3.1 Torrent Action Requests
+TORRENT_START = Method(
+    "torrent_start",
+    "torrent-start",
+    (Arg("ids", "ids", Ids),),
+    """
+    "ids", which specifies which torrents to use.
+              All torrents are used if the "ids" argument is omitted.
+              "ids" should be one of the following:
+
+    :param ids:
+              (1) an integer referring to a torrent id
+              (2) a list of torrent id numbers, sha1 hash strings, or both
+              (3) a string, "recently-active", for recently-active torrents
+    :return: Response arguments: none
+    """,
+)
+
+TORRENT_START_NOW = Method(
+    "torrent_start_now",
+    "torrent-start-now",
+    (Arg("ids", "ids", Ids),),
+)
+
+TORRENT_STOP = Method(
+    "torrent_stop",
+    "torrent-stop",
+    (Arg("ids", "ids", Ids),),
+)
+
+TORRENT_VERIFY = Method(
+    "torrent_verify",
+    "torrent-verify",
+    (Arg("ids", "ids", Ids),),
+)
+
+TORRENT_REANNOUNCE = Method(
+    "torrent_reannounce",
+    "torrent-reannounce",
+    (Arg("ids", "ids", Ids),),
+)
+
+# 3.2 Torrent Mutators
+TORRENT_SET = Method(
+    "torrent_set",
+    "torrent-set",
+    (
+        Arg("bandwidthPriority", "bandwidthPriority", Optional[int]),
+        Arg("downloadLimit", "downloadLimit", Optional[int]),
+        Arg("downloadLimited", "downloadLimited", Optional[bool]),
+        Arg("files_wanted", "files-wanted", Optional[List[str]]),
+        Arg("files_unwanted", "files-unwanted", Optional[List[str]]),
+        Arg("group", "group", Optional[str]),
+        Arg("honorsSessionLimits", "honorsSessionLimits", Optional[bool]),
+        Arg("ids", "ids", Ids),
+        Arg("labels", "labels", Optional[List[str]]),
+        Arg("location", "location", Optional[str]),
+        Arg("peer_limit", "peer-limit", Optional[int]),
+        Arg("priority_high", "priority-high", Optional[List[str]]),
+        Arg("priority_low", "priority-low", Optional[List[str]]),
+        Arg("priority_normal", "priority-normal", Optional[List[str]]),
+        Arg("queuePosition", "queuePosition", Optional[int]),
+        Arg("seedIdleLimit", "seedIdleLimit", Optional[int]),
+        Arg("seedIdleMode", "seedIdleMode", Optional[int]),
+        Arg("seedRatioLimit", "seedRatioLimit", Optional[float]),
+        Arg("seedRatioMode", "seedRatioMode", Optional[int]),
+        Arg("sequentialDownload", "sequentialDownload", Optional[bool]),
+        Arg("trackerAdd", "trackerAdd", Optional[List[str]]),
+        Arg("trackerList", "trackerList", Optional[str]),
+        Arg("trackerRemove", "trackerRemove", Optional[List[str]]),
+        Arg("trackerReplace", "trackerReplace", Optional[List[str]]),
+        Arg("uploadLimit", "uploadLimit", Optional[int]),
+        Arg("uploadLimited", "uploadLimited", Optional[bool]),
+    ),
+    """
+         Just as an empty "ids" value is shorthand for "all ids", using an empty array
+    for "files-wanted", "files-unwanted", "priority-high", "priority-low", or
+    "priority-normal" is shorthand for saying "all files".
+
+     :param bandwidthPriority:             this torrent's bandwidth tr_priority_t
+     :param downloadLimit:                 maximum download speed (KBps)
+     :param downloadLimited:               true if "downloadLimit" is honored
+     :param files_wanted:                  indices of file(s) to download
+     :param files_unwanted:                indices of file(s) to not download
+     :param group:                         The name of this torrent's bandwidth group
+     :param honorsSessionLimits:           true if session upload limits are honored
+     :param ids:                           torrent list, as described in 3.1
+     :param labels:                        array of string labels
+     :param location:                      new location of the torrent's content
+     :param peer_limit:                    maximum number of peers
+     :param priority_high:                 indices of high-priority file(s)
+     :param priority_low:                  indices of low-priority file(s)
+     :param priority_normal:               indices of normal-priority file(s)
+     :param queuePosition:                 position of this torrent in its queue [0...n)
+     :param seedIdleLimit:                 torrent-level number of minutes of seeding inactivity
+     :param seedIdleMode:                  which seeding inactivity to use.  See tr_idlelimit
+     :param seedRatioLimit:                torrent-level seeding ratio
+     :param seedRatioMode:                 which ratio to use.  See tr_ratiolimit
+     :param sequentialDownload:            download torrent pieces sequentially
+     :param trackerAdd:                    strings of announce URLs to add
+     :param trackerList:                   string of announce URLs, one per line, and a blank line between tiers.
+     :param trackerRemove:                 ids of trackers to remove
+     :param trackerReplace:                pairs of <trackerId/new announce URLs>
+     :param uploadLimit:                   maximum upload speed (KBps)
+     :param uploadLimited:                 true if "uploadLimit" is honored
+     :return: Response arguments: none
+    """,
+)
+
+# 3.5 Torrent Accessors
+TORRENT_GET = Method(
+    "torrent_get",
+    "torrent-get",
+    (
+        Arg("fields", "fields", List[str], REQUIRED),
+        Arg("format", "format", Optional[str]),
+        Arg("ids", "ids", Ids),
+    ),
+    """
+     :param fields:A required "fields" array of keys. (see list below)
+     :param format: An optional "format" string specifying how to format the
+    "torrents" response field. Allowed values are "objects" (default)
+    and "table". (see "Response arguments" below)
+     :param ids:An optional "ids" array as described in 3.1.
+     :return:
+     Response arguments:
+
+        (1) A "torrents" array.
+
+            If the "format" request was "objects" (default), "torrents" will
+            be an array of objects, each of which contains the key/value
+            pairs matching the request's "fields" arg. This was the only
+            format before Transmission 3 and has some obvious programmer
+            conveniences, such as parsing directly into Javascript objects.
+
+            If the format was "table", then "torrents" will be an array of
+            arrays. The first row holds the keys and each remaining row holds
+            a torrent's values for those keys. This format is more efficient
+            in terms of JSON generation and JSON parsing.
+
+        (2) If the request's "ids" field was "recently-active",
+            a "removed" array of torrent-id numbers of recently-removed
+            torrents.
+
+        Note: For more information on what these fields mean, see the comments
+        in libtransmission/transmission.h.  The "source" column here
+        corresponds to the data structure there.
+
+
+
+      key                         | type                        | source
+    ----------------------------+-----------------------------+---------
+    activityDate                | number                      | tr_stat
+    addedDate                   | number                      | tr_stat
+    bandwidthPriority           | number                      | tr_priority_t
+    comment                     | string                      | tr_info
+    corruptEver                 | number                      | tr_stat
+    creator                     | string                      | tr_info
+    dateCreated                 | number                      | tr_info
+    desiredAvailable            | number                      | tr_stat
+    doneDate                    | number                      | tr_stat
+    downloadDir                 | string                      | tr_torrent
+    downloadedEver              | number                      | tr_stat
+    downloadLimit               | number                      | tr_torrent
+    downloadLimited             | boolean                     | tr_torrent
+    editDate                    | number                      | tr_stat
+    error                       | number                      | tr_stat
+    errorString                 | string                      | tr_stat
+    eta                         | number                      | tr_stat
+    etaIdle                     | number                      | tr_stat
+    file-count                  | number                      | tr_info
+    files                       | array (see below)           | n/a
+    fileStats                   | array (see below)           | n/a
+    hashString                  | string                      | tr_info
+    haveUnchecked               | number                      | tr_stat
+    haveValid                   | number                      | tr_stat
+    honorsSessionLimits         | boolean                     | tr_torrent
+    id                          | number                      | tr_torrent
+    isFinished                  | boolean                     | tr_stat
+    isPrivate                   | boolean                     | tr_torrent
+    isStalled                   | boolean                     | tr_stat
+    labels                      | array (see below)           | tr_torrent
+    leftUntilDone               | number                      | tr_stat
+    magnetLink                  | string                      | n/a
+    manualAnnounceTime          | number                      | tr_stat
+    maxConnectedPeers           | number                      | tr_torrent
+    metadataPercentComplete     | double                      | tr_stat
+    name                        | string                      | tr_info
+    peer-limit                  | number                      | tr_torrent
+    peers                       | array (see below)           | n/a
+    peersConnected              | number                      | tr_stat
+    peersFrom                   | object (see below)          | n/a
+    peersGettingFromUs          | number                      | tr_stat
+    peersSendingToUs            | number                      | tr_stat
+    percentDone                 | double                      | tr_stat
+    pieces                      | string (see below)          | tr_torrent
+    pieceCount                  | number                      | tr_info
+    pieceSize                   | number                      | tr_info
+    priorities                  | array (see below)           | n/a
+    primary-mime-type           | string                      | tr_torrent
+    queuePosition               | number                      | tr_stat
+    rateDownload (B/s)          | number                      | tr_stat
+    rateUpload (B/s)            | number                      | tr_stat
+    recheckProgress             | double                      | tr_stat
+    secondsDownloading          | number                      | tr_stat
+    secondsSeeding              | number                      | tr_stat
+    seedIdleLimit               | number                      | tr_torrent
+    seedIdleMode                | number                      | tr_inactvelimit
+    seedRatioLimit              | double                      | tr_torrent
+    seedRatioMode               | number                      | tr_ratiolimit
+    sizeWhenDone                | number                      | tr_stat
+    startDate                   | number                      | tr_stat
+    status                      | number                      | tr_stat
+    trackers                    | array (see below)           | n/a
+    trackerStats                | array (see below)           | n/a
+    totalSize                   | number                      | tr_info
+    torrentFile                 | string                      | tr_info
+    uploadedEver                | number                      | tr_stat
+    uploadLimit                 | number                      | tr_torrent
+    uploadLimited               | boolean                     | tr_torrent
+    uploadRatio                 | double                      | tr_stat
+    wanted                      | array (see below)           | n/a
+    webseeds                    | array (see below)           | n/a
+    webseedsSendingToUs         | number                      | tr_stat
+                                |                             |
+                                |                             |
+    -------------------+--------+-----------------------------+
+    files              | array of objects, each containing:   |
+                       +-------------------------+------------+
+                       | bytesCompleted          | number     | tr_torrent
+                       | length                  | number     | tr_info
+                       | name                    | string     | tr_info
+    -------------------+--------------------------------------+
+    fileStats          | a file's non-constant properties.    |
+                       | array of tr_info.filecount objects,  |
+                       | each containing:                     |
+                       +-------------------------+------------+
+                       | bytesCompleted          | number     | tr_torrent
+                       | wanted                  | boolean    | tr_info
+                       | priority                | number     | tr_info
+    -------------------+--------------------------------------+
+    labels             | an array of strings:                 |
+                       +-------------------------+------------+
+                       | label                   | string     | tr_torrent
+    -------------------+--------------------------------------+
+    peers              | array of objects, each containing:   |
+                       +-------------------------+------------+
+                       | address                 | string     | tr_peer_stat
+                       | clientName              | string     | tr_peer_stat
+                       | clientIsChoked          | boolean    | tr_peer_stat
+                       | clientIsInterested      | boolean    | tr_peer_stat
+                       | flagStr                 | string     | tr_peer_stat
+                       | isDownloadingFrom       | boolean    | tr_peer_stat
+                       | isEncrypted             | boolean    | tr_peer_stat
+                       | isIncoming              | boolean    | tr_peer_stat
+                       | isUploadingTo           | boolean    | tr_peer_stat
+                       | isUTP                   | boolean    | tr_peer_stat
+                       | peerIsChoked            | boolean    | tr_peer_stat
+                       | peerIsInterested        | boolean    | tr_peer_stat
+                       | port                    | number     | tr_peer_stat
+                       | progress                | double     | tr_peer_stat
+                       | rateToClient (B/s)      | number     | tr_peer_stat
+                       | rateToPeer (B/s)        | number     | tr_peer_stat
+    -------------------+--------------------------------------+
+    peersFrom          | an object containing:                |
+                       +-------------------------+------------+
+                       | fromCache               | number     | tr_stat
+                       | fromDht                 | number     | tr_stat
+                       | fromIncoming            | number     | tr_stat
+                       | fromLpd                 | number     | tr_stat
+                       | fromLtep                | number     | tr_stat
+                       | fromPex                 | number     | tr_stat
+                       | fromTracker             | number     | tr_stat
+    -------------------+--------------------------------------+
+    pieces             | A bitfield holding pieceCount flags  | tr_torrent
+                       | which are set to 'true' if we have   |
+                       | the piece matching that position.    |
+                       | JSON doesn't allow raw binary data,  |
+                       | so this is a base64-encoded string.  |
+    -------------------+--------------------------------------+
+    priorities         | an array of tr_info.filecount        | tr_info
+                       | numbers. each is the tr_priority_t   |
+                       | mode for the corresponding file.     |
+    -------------------+--------------------------------------+
+    trackers           | array of objects, each containing:   |
+                       +-------------------------+------------+
+                       | announce                | string     | tr_tracker_info
+                       | id                      | number     | tr_tracker_info
+                       | scrape                  | string     | tr_tracker_info
+                       | tier                    | number     | tr_tracker_info
+    -------------------+--------------------------------------+
+    trackerStats       | array of objects, each containing:   |
+                       +-------------------------+------------+
+                       | announce                | string     | tr_tracker_stat
+                       | announceState           | number     | tr_tracker_stat
+                       | downloadCount           | number     | tr_tracker_stat
+                       | hasAnnounced            | boolean    | tr_tracker_stat
+                       | hasScraped              | boolean    | tr_tracker_stat
+                       | host                    | string     | tr_tracker_stat
+                       | id                      | number     | tr_tracker_stat
+                       | isBackup                | boolean    | tr_tracker_stat
+                       | lastAnnouncePeerCount   | number     | tr_tracker_stat
+                       | lastAnnounceResult      | string     | tr_tracker_stat
+                       | lastAnnounceStartTime   | number     | tr_tracker_stat
+                       | lastAnnounceSucceeded   | boolean    | tr_tracker_stat
+                       | lastAnnounceTime        | number     | tr_tracker_stat
+                       | lastAnnounceTimedOut    | boolean    | tr_tracker_stat
+                       | lastScrapeResult        | string     | tr_tracker_stat
+                       | lastScrapeStartTime     | number     | tr_tracker_stat
+                       | lastScrapeSucceeded     | boolean    | tr_tracker_stat
+                       | lastScrapeTime          | number     | tr_tracker_stat
+                       | lastScrapeTimedOut      | boolean    | tr_tracker_stat
+                       | leecherCount            | number     | tr_tracker_stat
+                       | nextAnnounceTime        | number     | tr_tracker_stat
+                       | nextScrapeTime          | number     | tr_tracker_stat
+                       | scrape                  | string     | tr_tracker_stat
+                       | scrapeState             | number     | tr_tracker_stat
+                       | seederCount             | number     | tr_tracker_stat
+                       | tier                    | number     | tr_tracker_stat
+    -------------------+-------------------------+------------+
+    wanted             | an array of tr_info.fileCount        | tr_info
+                       | 'booleans' true if the corresponding |
+                       | file is to be downloaded.            |
+    -------------------+--------------------------------------+
+    webseeds           | an array of strings:                 |
+                       +-------------------------+------------+
+                       | webseed                 | string     | tr_info
+                       +-------------------------+------------+
+    """,
+)
+
+# 3.4 Adding a Torrent
+TORRENT_ADD = Method(
+    "torrent_add",
+    "torrent-add",
+    (
+        Arg("cookies", "cookies", Optional[str]),
+        Arg("download_dir", "download-dir", Optional[str]),
+        Arg("filename", "filename", Optional[str]),
+        Arg("labels", "labels", Optional[List[str]]),
+        Arg("metainfo", "metainfo", Optional[str]),
+        Arg("paused", "paused", Optional[bool]),
+        Arg("peer_limit", "peer-limit", Optional[int]),
+        Arg("bandwidthPriority", "bandwidthPriority", Optional[int]),
+        Arg("files_wanted", "files-wanted", Optional[List[str]]),
+        Arg("files_unwanted", "files-unwanted", Optional[List[str]]),
+        Arg("priority_high", "priority-high", Optional[List[str]]),
+        Arg("priority_low", "priority-low", Optional[List[str]]),
+        Arg("priority_normal", "priority-normal", Optional[List[str]]),
+    ),
+    """
+    :param cookies:               pointer to a string of one or more cookies.
+    :param download_dir:          path to download the torrent to
+    :param filename:              filename or URL of the .torrent file
+    :param labels:                array of string labels
+    :param metainfo:              base64-encoded .torrent content
+    :param paused:                if true, don't start the torrent
+    :param peer_limit:            maximum number of peers
+    :param bandwidthPriority:     torrent's bandwidth tr_priority_t
+    :param files_wanted:          indices of file(s) to download
+    :param files_unwanted:        indices of file(s) to not download
+    :param priority_high:         indices of high-priority file(s)
+    :param priority_low:          indices of low-priority file(s)
+    :param priority_normal:       indices of normal-priority file(s)
+    :return:
+    Response arguments: On success, a "torrent-added" object in the
+                   form of one of 3.3's tr_info objects with the
+                   fields for id, name, and hashString.
+
+                   On failure due to a duplicate torrent existing,
+                   a "torrent-duplicate" object in the same form.
+    """,
+)
+
+# 3.5 Removing a Torrent
+TORRENT_REMOVE = Method(
+    "torrent_remove",
+    "torrent-remove",
+    (
+        Arg("ids", "ids", Ids),
+        Arg("delete_local_data", "delete-local-data", Optional[bool], False),
+    ),
+    """
+    :param ids: torrent list, as described in 3.1
+    :param delete_local_data: delete local data. (default: false)
+    :return:  Response arguments: none
+    """,
+)
+
+# 3.6 Moving a Torrent
+TORRENT_SET_LOCATION = Method(
+    "torrent_set_location",
+    "torrent-set-location",
+    (
+        Arg("location", "location", str, REQUIRED),
+        Arg("ids", "ids", Ids),
+        Arg("move", "move", Optional[bool], False),
+    ),
+    """
+    :param location: the new torrent location
+    :param ids: torrent list, as described in 3.1
+    :param move: if true, move from previous location. otherwise, search "location" for files (default: false)
+    :return:   Response arguments: none
+    """,
+)
+
+#  3.7.  Renaming a Torrent's Path
+TORRENT_RENAME_PATH = Method(
+    "torrent_rename_path",
+    "torrent-rename-path",
+    (
+        Arg("path", "path", str, REQUIRED),
+        Arg("name", "name", str, REQUIRED),
+        Arg("ids", "ids", Ids),
+    ),
+    """
+             For more information on the use of this function, see the transmission.h
+       documentation of tr_torrentRenamePath(). In particular, note that if this
+       call succeeds you'll want to update the torrent's "files" and "name" field
+       with torrent-get.
+    :param path: the path to the file or folder that will be renamed
+    :param name: the file or folder's new name
+    :param ids:  the torrent torrent list, as described in 3.1 (must only be 1 torrent)
+    :return:  Response arguments: "path", "name", and "id", holding the torrent ID integer
+    """,
+)
+
+# 4.  Session Requests
+# 4.1 Session Arguments
+# string                           | value type | description
+#    ---------------------------------+------------+-------------------------------------
+#    "alt-speed-down"                 | number     | max global download speed (KBps)
+#    "alt-speed-enabled"              | boolean    | true means use the alt speeds
+#    "alt-speed-time-begin"           | number     | when to turn on alt speeds (units: minutes after midnight)
+#    "alt-speed-time-enabled"         | boolean    | true means the scheduled on/off times are used
+#    "alt-speed-time-end"             | number     | when to turn off alt speeds (units: same)
+#    "alt-speed-time-day"             | number     | what day(s) to turn on alt speeds (look at tr_sched_day)
+#    "alt-speed-up"                   | number     | max global upload speed (KBps)
+#    "blocklist-url"                  | string     | location of the blocklist to use for "blocklist-update"
+#    "blocklist-enabled"              | boolean    | true means enabled
+#    "blocklist-size"                 | number     | number of rules in the blocklist
+#    "cache-size-mb"                  | number     | maximum size of the disk cache (MB)
+#    "config-dir"                     | string     | location of transmission's configuration directory
+#    "download-dir"                   | string     | default path to download torrents
+#    "download-queue-size"            | number     | max number of torrents to download at once (see download-queue-enabled)
+#    "download-queue-enabled"         | boolean    | if true, limit how many torrents can be downloaded at once
+#    "dht-enabled"                    | boolean    | true means allow dht in public torrents
+#    "encryption"                     | string     | "required", "preferred", "tolerated"
+#    "idle-seeding-limit"             | number     | torrents we're seeding will be stopped if they're idle for this long
+#    "idle-seeding-limit-enabled"     | boolean    | true if the seeding inactivity limit is honored by default
+#    "incomplete-dir"                 | string     | path for incomplete torrents, when enabled
+#    "incomplete-dir-enabled"         | boolean    | true means keep torrents in incomplete-dir until done
+#    "lpd-enabled"                    | boolean    | true means allow Local Peer Discovery in public torrents
+#    "peer-limit-global"              | number     | maximum global number of peers
+#    "peer-limit-per-torrent"         | number     | maximum global number of peers
+#    "pex-enabled"                    | boolean    | true means allow pex in public torrents
+#    "peer-port"                      | number     | port number
+#    "peer-port-random-on-start"      | boolean    | true means pick a random peer port on launch
+#    "port-forwarding-enabled"        | boolean    | true means enabled
+#    "queue-stalled-enabled"          | boolean    | whether or not to consider idle torrents as stalled
+#    "queue-stalled-minutes"          | number     | torrents that are idle for N minuets aren't counted toward seed-queue-size or download-queue-size
+#    "rename-partial-files"           | boolean    | true means append ".part" to incomplete files
+#    "rpc-version"                    | number     | the current RPC API version
+#    "rpc-version-minimum"            | number     | the minimum RPC API version supported
+#    "script-torrent-done-filename"   | string     | filename of the script to run
+#    "script-torrent-done-enabled"    | boolean    | whether or not to call the "done" script
+#    "seedRatioLimit"                 | double     | the default seed ratio for torrents to use
+#    "seedRatioLimited"               | boolean    | true if seedRatioLimit is honored by default
+#    "seed-queue-size"                | number     | max number of torrents to uploaded at once (see seed-queue-enabled)
+#    "seed-queue-enabled"             | boolean    | if true, limit how many torrents can be uploaded at once
+#    "speed-limit-down"               | number     | max global download speed (KBps)
+#    "speed-limit-down-enabled"       | boolean    | true means enabled
+#    "speed-limit-up"                 | number     | max global upload speed (KBps)
+#    "speed-limit-up-enabled"         | boolean    | true means enabled
+#    "start-added-torrents"           | boolean    | true means added torrents will be started right away
+#    "trash-original-torrent-files"   | boolean    | true means the .torrent file of added torrents will be deleted
+#    "units"                          | object     | see below
+#    "utp-enabled"                    | boolean    | true means allow utp
+#    "version"                        | string     | long version string "$version ($revision)"
+#    ---------------------------------+------------+-----------------------------+
+#    units                            | object containing:                       |
+#                                     +--------------+--------+------------------+
+#                                     | speed-units  | array  | 4 strings: KB/s, MB/s, GB/s, TB/s
+#                                     | speed-bytes  | number | number of bytes in a KB (1000 for kB; 1024 for KiB)
+#                                     | size-units   | array  | 4 strings: KB/s, MB/s, GB/s, TB/s
+#                                     | size-bytes   | number | number of bytes in a KB (1000 for kB; 1024 for KiB)
+#                                     | memory-units | array  | 4 strings: KB/s, MB/s, GB/s, TB/s
+#                                     | memory-bytes | number | number of bytes in a KB (1000 for kB; 1024 for KiB)
+#                                     +--------------+--------+------------------+
+#
+#    "rpc-version" indicates the RPC interface version supported by the RPC server.
+#    It is incremented when a new version of Transmission changes the RPC interface.
+#
+#    "rpc-version-minimum" indicates the oldest API supported by the RPC server.
+#    It is changes when a new version of Transmission changes the RPC interface
+#    in a way that is not backwards compatible.  There are no plans for this
+#    to be common behavior.
+# 4.1.1.  Mutators
+SESSION_SET = Method(
+    "session_set",
+    "session-set",
+    (
+        Arg("alt_speed_down", "alt-speed-down", Optional[int]),
+        Arg("alt_speed_enabled", "alt-speed-enabled", Optional[bool]),
+        Arg("alt_speed_time_begin", "alt-speed-time-begin", Optional[int]),
+        Arg("alt_speed_time_enabled", "alt-speed-time-enabled", Optional[bool]),
+        Arg("alt_speed_time_end", "alt-speed-time-end", Optional[int]),
+        Arg("alt_speed_time_day", "alt-speed-time-day", Optional[int]),
+        Arg("alt_speed_up", "alt-speed-up", Optional[int]),
+        Arg("blocklist_url", "blocklist-url", Optional[str]),
+        Arg("blocklist_enabled", "blocklist-enabled", Optional[bool]),
+        Arg("cache_size_mb", "cache-size-mb", Optional[int]),
+        Arg("default_trackers", "default-trackers", Optional[int]),
+        Arg("download_dir", "download-dir", Optional[str]),
+        Arg("download_queue_size", "download-queue-size", Optional[int]),
+        Arg("download_queue_enabled", "download-queue-enabled", Optional[bool]),
+        Arg("dht_enabled", "dht-enabled", Optional[bool]),
+        Arg(
+            "encryption",
+            "encryption",
+            Optional[Literal["required", "preferred", "tolerated"]],
+        ),
+        Arg("idle_seeding_limit", "idle-seeding-limit", Optional[int]),
+        Arg("idle_seeding_limit_enabled", "idle-seeding-limit-enabled", Optional[bool]),
+        Arg("incomplete_dir", "incomplete-dir", Optional[str]),
+        Arg("incomplete_dir_enabled", "incomplete-dir-enabled", Optional[bool]),
+        Arg("lpd_enabled", "lpd-enabled", Optional[bool]),
+        Arg("peer_limit_global", "peer-limit-global", Optional[int]),
+        Arg("peer_limit_per_torrent", "peer-limit-per-torrent", Optional[int]),
+        Arg("pex_enabled", "pex-enabled", Optional[bool]),
+        Arg("peer_port", "peer-port", Optional[int]),
+        Arg("peer_port_random_on_start", "peer-port-random-on-start", Optional[bool]),
+        Arg("port_forwarding_enabled", "port-forwarding-enabled", Optional[bool]),
+        Arg("queue_stalled_enabled", "queue-stalled-enabled", Optional[bool]),
+        Arg("queue_stalled_minutes", "queue-stalled-minutes", Optional[int]),
+        Arg("rename_partial_files", "rename-partial-files", Optional[bool]),
+        Arg(
+            "script_torrent_added_filename",
+            "script-torrent-added-filename",
+            Optional[str],
+        ),
+        Arg(
+            "script_torrent_added_enabled",
+            "script-torrent-added-enabled",
+            Optional[bool],
+        ),
+        Arg(
+            "script_torrent_done_filename",
+            "script-torrent-done-filename",
+            Optional[str],
+        ),
+        Arg(
+            "script_torrent_done_enabled", "script-torrent-done-enabled", Optional[bool]
+        ),
+        Arg(
+            "script_torrent_done_seeding_filename",
+            "script-torrent-done-seeding-filename",
+            Optional[str],
+        ),
+        Arg(
+            "script_torrent_done_seeding_enabled",
+            "script-torrent-done-seeding-enabled",
+            Optional[bool],
+        ),
+        Arg("seedRatioLimit", "seedRatioLimit", Optional[float]),
+        Arg("seedRatioLimited", "seedRatioLimited", Optional[bool]),
+        Arg("seed_queue_size", "seed-queue-size", Optional[int]),
+        Arg("seed_queue_enabled", "seed-queue-enabled", Optional[bool]),
+        Arg("speed_limit_down", "speed-limit-down", Optional[int]),
+        Arg("speed_limit_down_enabled", "speed-limit-down-enabled", Optional[bool]),
+        Arg("speed_limit_up", "speed-limit-up", Optional[int]),
+        Arg("speed_limit_up_enabled", "speed-limit-up-enabled", Optional[bool]),
+        Arg("start_added_torrents", "start-added-torrents", Optional[bool]),
+        Arg(
+            "trash_original_torrent_files",
+            "trash-original-torrent-files",
+            Optional[bool],
+        ),
+        Arg("units", "units", Optional[dict]),
+        Arg("utp_enabled", "utp-enabled", Optional[bool]),
+    ),
+    """
+    :param alt_speed_down:
+    :param alt_speed_enabled:
+    :param alt_speed_time_begin:
+    :param alt_speed_time_enabled:
+    :param alt_speed_time_end:
+    :param alt_speed_time_day:
+    :param alt_speed_up:
+    :param blocklist_url:
+    :param blocklist_enabled:
+    :param cache_size_mb:
+    :param default_trackers: announce URLs, one per line, and a blank line between tiers.
+    :param download_dir:
+    :param download_queue_size:
+    :param download_queue_enabled:
+    :param dht_enabled:
+    :param encryption:
+    :param idle_seeding_limit:
+    :param idle_seeding_limit_enabled:
+    :param incomplete_dir:
+    :param incomplete_dir_enabled:
+    :param lpd_enabled:
+    :param peer_limit_global:
+    :param peer_limit_per_torrent:
+    :param pex_enabled:
+    :param peer_port:
+    :param peer_port_random_on_start:
+    :param port_forwarding_enabled:
+    :param queue_stalled_enabled:
+    :param queue_stalled_minutes:
+    :param rename_partial_files:
+    :param script_torrent_added_filename: whether or not to call the added script
+    :param script_torrent_added_enabled: filename of the script to run
+    :param script_torrent_done_filename:
+    :param script_torrent_done_enabled:
+    :param script_torrent_done_seeding_filename: filename of the script to run
+    :param script_torrent_done_seeding_enabled: whether or not to call the seeding-done script
+    :param seedRatioLimit:
+    :param seedRatioLimited:
+    :param seed_queue_size:
+    :param seed_queue_enabled:
+    :param speed_limit_down:
+    :param speed_limit_down_enabled:
+    :param speed_limit_up:
+    :param speed_limit_up_enabled:
+    :param start_added_torrents:
+    :param trash_original_torrent_files:
+    :param units:
+    :param utp_enabled:
+    :return: Response arguments: none
+    """,
+)
+
+# 4.1.2.  Accessors
+SESSION_GET = Method(
+    "session_get",
+    "session-get",
+    (Arg("fields", "fields", Optional[List[str]]),),
+    """
+     :param fields: an optional "fields" array of keys (see 4.1)
+     :return: Response arguments: key/value pairs matching the request's "fields"
+    argument if present, or all supported fields (see 4.1) otherwise.
+    """,
+)
+
+# 4.2.  Session Statistics
+SESSION_STATS = Method(
+    "session_stats",
+    "session-stats",
+    (),
+    """
+    :return:
+    Response arguments:
+
+       string                     | value type
+       ---------------------------+-------------------------------------------------
+       "activeTorrentCount"       | number
+       "downloadSpeed"            | number
+       "pausedTorrentCount"       | number
+       "torrentCount"             | number
+       "uploadSpeed"              | number
+       ---------------------------+-------------------------------+
+       "cumulative-stats"         | object, containing:           |
+                                  +------------------+------------+
+                                  | uploadedBytes    | number     | tr_session_stats
+                                  | downloadedBytes  | number     | tr_session_stats
+                                  | filesAdded       | number     | tr_session_stats
+                                  | sessionCount     | number     | tr_session_stats
+                                  | secondsActive    | number     | tr_session_stats
+       ---------------------------+-------------------------------+
+       "current-stats"            | object, containing:           |
+                                  +------------------+------------+
+                                  | uploadedBytes    | number     | tr_session_stats
+                                  | downloadedBytes  | number     | tr_session_stats
+                                  | filesAdded       | number     | tr_session_stats
+                                  | sessionCount     | number     | tr_session_stats
+                                  | secondsActive    | number     | tr_session_stats
+    """,
+)
+
+# 4.3.  Blocklist
+BLOCKLIST_UPDATE = Method(
+    "blocklist_update",
+    "blocklist-update",
+    (),
+    """
+    :return:  Response arguments: a number "blocklist-size"
+    """,
+)
+
+# 4.4.  Port Checking
+PORT_TEST = Method(
+    "port_test",
+    "port-test",
+    (Arg("ipProtocol", "ipProtocol", Optional[Literal["ipv4", "ipv6"]]),),
+    """
+        This method tests to see if your incoming peer port is accessible
+     from the outside world.
+    :return: Response arguments:  "port-is-open" ipProtocol string
+    """,
+)
+
+# 4.5.  Session shutdown
+SESSION_CLOSE = Method(
+    "session_close",
+    "session-close",
+    (),
+    """
+     This method tells the transmission session to shut down.
+    :return:  Response arguments: none
+    """,
+)
+
+# 4.6.  Queue Movement Requests
+QUEUE_MOVE_TOP = Method(
+    "queue_move_top",
+    "queue-move-top",
+    (Arg("ids", "ids", Ids),),
+    """
+    :param ids:  array   torrent list, as described in 3.1.
+    :return:  Response arguments: none
+    """,
+)
+
+QUEUE_MOVE_UP = Method(
+    "queue_move_up",
+    "queue-move-up",
+    (Arg("ids", "ids", Ids),),
+)
+
+QUEUE_MOVE_DOWN = Method(
+    "queue_move_down",
+    "queue-move-down",
+    (Arg("ids", "ids", Ids),),
+)
+
+QUEUE_MOVE_BOTTOM = Method(
+    "queue_move_bottom",
+    "queue-move-bottom",
+    (Arg("ids", "ids", Ids),),
+)
+
+# 4.7.  Free Space
+FREE_SPACE = Method(
+    "free_space",
+    "free-space",
+    (Arg("path", "path", str, REQUIRED),),
+    """
+         :param path: string  the directory to query
+         :return: Response arguments:
+
+    string      | value type & description
+    ------------+----------------------------------------------------------
+    "path"      | string  same as the Request argument
+    "size-bytes"| number  the size, in bytes, of the free space in that directory
+    """,
+)
+
+# 4.8.  Bandwidth groups
+GROUP_SET = Method(
+    "group_set",
+    "group-set",
+    (
+        Arg("honorsSessionLimits", "honorsSessionLimits", Optional[bool]),
+        Arg("name", "name", Optional[str]),
+        Arg("speed_limit_down_enabled", "speed-limit-down-enabled", Optional[bool]),
+        Arg("speed_limit_down", "speed-limit-down", Optional[int]),
+        Arg("speed_limit_up_enabled", "speed-limit-up-enabled", Optional[bool]),
+        Arg("speed_limit_up", "speed-limit-up", Optional[int]),
+    ),
+    """
+    :param honorsSessionLimits: true if session upload limits are honored
+    :param name: bandwidth group name
+    :param speed_limit_down_enabled: true means enabled
+    :param speed_limit_down: max download speed of the group (KBps)
+    :param speed_limit_up_enabled: true means enabled
+    :param speed_limit_up: max upload speed of the group (KBps)
+    """,
+)
+
+GROUP_GET = Method(
+    "group_get",
+    "group-get",
+    (Arg("group", "group", Optional[Union[str, List[str]]]),),
+    """
+    :param group: either a string naming the bandwidth group, or a list of such strings.
+     If group is omitted, all bandwidth groups are used.
+    """,
+)
+
+METHODS: Tuple[Method, ...] = (
+    TORRENT_START,
+    TORRENT_START_NOW,
+    TORRENT_STOP,
+    TORRENT_VERIFY,
+    TORRENT_REANNOUNCE,
+    TORRENT_SET,
+    TORRENT_GET,
+    TORRENT_ADD,
+    TORRENT_REMOVE,
+    TORRENT_SET_LOCATION,
+    TORRENT_RENAME_PATH,
+    SESSION_SET,
+    SESSION_GET,
+    SESSION_STATS,
+    BLOCKLIST_UPDATE,
+    PORT_TEST,
+    SESSION_CLOSE,
+    QUEUE_MOVE_TOP,
+    QUEUE_MOVE_UP,
+    QUEUE_MOVE_DOWN,
+    QUEUE_MOVE_BOTTOM,
+    FREE_SPACE,
+    GROUP_SET,
+    GROUP_GET,
+)
+
+# rpc method name -> argument builder
+BUILDERS: Dict[str, Callable[..., dict]] = {
+    spec.method: compile_builder(spec) for spec in METHODS
+}
+
+
+def build_arguments(method: str, **kwargs) -> dict:
+    """
+    Build the rpc arguments of ``method`` from python parameter names
+    """
+    return BUILDERS[method](**kwargs)
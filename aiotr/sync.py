@@ -0,0 +1,184 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Blocking client for synchronous code (Celery tasks, Django views, scripts).
+Every call runs on one long-lived event loop in a background thread, so the
+aiohttp session, its pooled connections and the daemon's session id outlive
+the call, unlike ``asyncio.run(client.torrent_get(...))`` per call site. Any
+number of threads may share one client::
+
+    client = SyncTransmissionClient(url="http://127.0.0.1:9091/transmission/rpc")
+    client.torrent_get(["id", "name"], ids=[1], timeout=2.0)
+    client.close()
+"""
+
+import asyncio
+import atexit
+import functools
+import inspect
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from aiotr.client import TransmissionClient
+from aiotr.spec import METHODS
+
+T = TypeVar("T")
+
+
+class LoopThread:
+    """
+    An event loop running forever in a daemon thread
+    """
+
+    def __init__(self, name: str = "aiotr-loop"):
+        self.name = name
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def alive(self) -> bool:
+        return self.pid == os.getpid() and not self.loop.is_closed()
+
+    def submit(self, coro: Awaitable[T]) -> "Future[T]":
+        error = None
+        if self.pid != os.getpid():
+            error = (
+                "the loop thread of {} does not exist after fork, create the client "
+                "in the child process".format(self.name)
+            )
+        elif threading.current_thread() is self.thread:
+            error = (
+                "blocking call from the loop thread itself would deadlock, await "
+                "the async client instead"
+            )
+        if error is not None:
+            coro.close()  # type: ignore
+            raise RuntimeError(error)
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)  # type: ignore
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """
+        Run ``coro`` on the loop and wait for it, cancelling it on timeout or
+        KeyboardInterrupt
+        """
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def stop(self) -> None:
+        if self.loop.is_closed() or self.pid != os.getpid():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+_shared: Optional[LoopThread] = None
+_shared_lock = threading.Lock()
+
+
+def shared_loop() -> LoopThread:
+    """
+    The loop thread shared by every ``SyncTransmissionClient`` of this process
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None or not _shared.alive:
+            _shared = LoopThread()
+        return _shared
+
+
+def _forget_shared() -> None:
+    global _shared, _shared_lock
+    _shared = None  # its thread did not survive the fork
+    _shared_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_shared)
+
+
+@atexit.register
+def _stop_shared() -> None:
+    if _shared is not None:
+        _shared.stop()
+
+
+def _proxy(name: str, template: Callable) -> Callable:
+    @functools.wraps(template)
+    def method(self, *args, **kwargs):
+        return self._run(getattr(self.client, name)(*args, **kwargs))
+
+    method.__signature__ = inspect.signature(template)  # type: ignore
+    return method
+
+
+def with_sync_methods(cls):
+    """
+    Attach one blocking method per async method of ``TransmissionClient``
+    """
+    for name in [spec.name for spec in METHODS] + list(cls.PROXIED):
+        setattr(cls, name, _proxy(name, getattr(TransmissionClient, name)))
+    return cls
+
+
+@with_sync_methods
+class SyncTransmissionClient:
+    """
+    Takes the arguments of ``TransmissionClient``, plus
+
+    :param loop: the loop thread to run on, the process-wide one by default
+    :param wait: seconds a calling thread waits for any call, None for no limit.
+     Pass ``timeout=`` to a method to bound the rpc itself.
+    """
+
+    PROXIED = ("rpc", "capabilities", "ping", "prewarm")
+
+    def __init__(
+        self,
+        *args,
+        loop: Optional[LoopThread] = None,
+        wait: Optional[float] = None,
+        **kwargs,
+    ):
+        self.loop = loop or shared_loop()
+        self.wait = wait
+
+        async def create() -> TransmissionClient:
+            return TransmissionClient(*args, **kwargs)
+
+        self.client: TransmissionClient = self.loop.run(create())
+
+    @property
+    def daemon(self) -> str:
+        return self.client.daemon
+
+    def _run(self, coro: Awaitable[T]) -> T:
+        return self.loop.run(coro, self.wait)
+
+    def submit(self, name: str, *args, **kwargs) -> "Future[Any]":
+        """
+        Start method ``name`` without waiting, e.g. to fan out from one thread
+        """
+        return self.loop.submit(getattr(self.client, name)(*args, **kwargs))
+
+    def close(self) -> None:
+        if self.loop.alive:
+            self.loop.run(self.client.close())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
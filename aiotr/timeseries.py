@@ -0,0 +1,253 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Fixed-memory history of session and per-torrent transfer rates. Every series
+is an ``array("d")`` ring allocated on its first non-zero sample, aggregates
+run on numpy views of it when numpy is importable and fall back to plain
+python otherwise.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from array import array
+from typing import Dict, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+SESSION_METRICS = ("downloadSpeed", "uploadSpeed")
+TORRENT_METRICS = ("rateDownload", "rateUpload")
+
+
+class RingBuffer:
+    """
+    The last ``capacity`` float samples, ``8 * capacity`` bytes once a non-zero
+    one arrives and none before
+    """
+
+    __slots__ = ("capacity", "data", "head", "size")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data: Optional[array] = None  # every sample is zero until allocated
+        self.head = 0  # next slot to write
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        return 0 if self.data is None else 8 * self.capacity
+
+    def append(self, value: float) -> None:
+        if self.data is None and value:
+            self.data = array("d", bytes(8 * self.capacity))
+        if self.data is not None:
+            self.data[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def window(self, n: Optional[int] = None) -> Sequence[float]:
+        """
+        The newest ``n`` samples (all by default), oldest first. A numpy array
+        when numpy is available, an ``array("d")`` otherwise.
+        """
+        n = self.size if n is None else min(n, self.size)
+        if self.data is None:
+            return array("d", bytes(8 * n)) if np is None else np.zeros(n)
+        start = (self.head - n) % self.capacity
+        data = self.data if np is None else np.frombuffer(self.data, dtype=np.float64)
+        if start + n <= self.capacity:
+            return data[start : start + n]
+        if np is None:
+            return data[start:] + data[: self.head]
+        return np.concatenate((data[start:], data[: self.head]))
+
+    def last(self) -> float:
+        if self.data is None or not self.size:
+            return 0.0
+        return self.data[(self.head - 1) % self.capacity]
+
+    def mean(self, n: Optional[int] = None) -> float:
+        values = self.window(n)
+        if not len(values):
+            return 0.0
+        return float(values.mean()) if np is not None else sum(values) / len(values)
+
+    def ewma(self, alpha: float, n: Optional[int] = None) -> float:
+        """
+        Exponentially weighted mean, the newest sample has weight 1 and each older
+        one ``1 - alpha`` times the next
+        """
+        values = self.window(n)
+        size = len(values)
+        if not size:
+            return 0.0
+        if np is not None:
+            weights = (1.0 - alpha) ** np.arange(size - 1, -1, -1, dtype=np.float64)
+            return float(np.dot(weights, values) / weights.sum())
+        total = weight = 0.0
+        w = 1.0
+        for value in reversed(values):
+            total += w * value
+            weight += w
+            w *= 1.0 - alpha
+        return total / weight
+
+    def percentile(self, q: float, n: Optional[int] = None) -> float:
+        """
+        ``q`` in [0, 100], linear interpolation between the closest ranks
+        """
+        values = self.window(n)
+        size = len(values)
+        if not size:
+            return 0.0
+        if np is not None:
+            return float(np.percentile(values, q))
+        ordered = sorted(values)
+        rank = (size - 1) * q / 100.0
+        low = math.floor(rank)
+        high = min(low + 1, size - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class TieredSeries:
+    """
+    A raw ring plus coarser rings, tier ``i + 1`` receiving the mean of every
+    ``factors[i]`` samples of tier ``i``
+
+    :param capacity: samples kept per tier
+    :param factors: downsampling factor of each coarser tier
+    """
+
+    __slots__ = ("tiers", "factors", "sums", "counts")
+
+    def __init__(self, capacity: int, factors: Sequence[int] = (12, 60)):
+        self.tiers = [RingBuffer(capacity) for _ in range(len(factors) + 1)]
+        self.factors = tuple(factors)
+        self.sums = [0.0] * len(factors)
+        self.counts = [0] * len(factors)
+
+    def append(self, value: float) -> None:
+        self.tiers[0].append(value)
+        for i, factor in enumerate(self.factors):
+            self.sums[i] += value
+            self.counts[i] += 1
+            if self.counts[i] < factor:
+                return
+            value = self.sums[i] / factor
+            self.sums[i] = 0.0
+            self.counts[i] = 0
+            self.tiers[i + 1].append(value)
+
+    def __getitem__(self, tier: int) -> RingBuffer:
+        return self.tiers[tier]
+
+
+class RateRecorder:
+    """
+    Samples session-stats speeds and per-torrent rates every ``interval`` seconds.
+    A torrent costs ``8 * capacity`` bytes per tier of each of its 2 metrics
+    once that tier sees a non-zero rate, 34,560 bytes with every tier in use at
+    the defaults, and about 1.3KB of bookkeeping while it stays idle.
+
+    :param client: a ``TransmissionClient``
+    :param interval: seconds between samples
+    :param capacity: samples kept per tier and series
+    :param factors: downsampling factors of the coarser tiers, by default
+     1 minute and 1 hour buckets at a 5 second interval
+    """
+
+    def __init__(
+        self,
+        client,
+        interval: float = 5.0,
+        capacity: int = 720,
+        factors: Sequence[int] = (12, 60),
+    ):
+        self.client = client
+        self.interval = interval
+        self.capacity = capacity
+        self.factors = tuple(factors)
+        self.times = TieredSeries(capacity, factors)
+        self.session: Dict[str, TieredSeries] = {
+            name: TieredSeries(capacity, factors) for name in SESSION_METRICS
+        }
+        # torrent id -> metric -> series
+        self.torrents: Dict[int, Dict[str, TieredSeries]] = {}
+
+    def record(
+        self, session_stats: dict, torrents: Sequence[dict], removed: Sequence[int] = ()
+    ) -> None:
+        """
+        Append one sample. Known torrents missing from ``torrents`` are idle and
+        record a zero rate.
+        """
+        self.times.append(time.time())
+        for name, series in self.session.items():
+            series.append(session_stats.get(name, 0))
+        for tid in removed:
+            self.torrents.pop(tid, None)
+        seen = set()
+        for torrent in torrents:
+            tid = torrent["id"]
+            seen.add(tid)
+            metrics = self.torrents.get(tid)
+            if metrics is None:
+                metrics = self.torrents[tid] = {
+                    name: TieredSeries(self.capacity, self.factors)
+                    for name in TORRENT_METRICS
+                }
+            for name, series in metrics.items():
+                series.append(torrent.get(name, 0))
+        for tid, metrics in self.torrents.items():
+            if tid not in seen:
+                for series in metrics.values():
+                    series.append(0.0)
+
+    async def sample(self) -> None:
+        session_stats = await self.client.session_stats() or {}
+        data = await self.client.torrent_get(
+            ["id", *TORRENT_METRICS], ids="recently-active" if self.torrents else None
+        )
+        data = data or {}
+        self.record(session_stats, data.get("torrents", ()), data.get("removed", ()))
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.sample()
+            except Exception:
+                logger.exception("sampling %s failed", self.client.daemon)
+            await asyncio.sleep(self.interval)
+
+    def eta(
+        self, tid: int, left_until_done: int, alpha: float = 0.1, tier: int = 0
+    ) -> Optional[float]:
+        """
+        Seconds until done at the smoothed download rate, None when stalled or unknown
+        """
+        metrics = self.torrents.get(tid)
+        if metrics is None:
+            return None
+        rate = metrics["rateDownload"][tier].ewma(alpha)
+        return left_until_done / rate if rate > 0 else None
+
+    def memory(self) -> Tuple[int, int]:
+        """
+        (series, bytes) allocated for sample storage
+        """
+        everything = [self.times, *self.session.values()]
+        for metrics in self.torrents.values():
+            everything.extend(metrics.values())
+        return len(everything), sum(
+            ring.nbytes for series in everything for ring in series.tiers
+        )
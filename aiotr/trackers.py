@@ -0,0 +1,248 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Tracker health per announce host, kept up to date from "trackerStats". The
+first refresh reads every torrent, later ones only the "recently-active"
+torrents and the ids the daemon reports as removed, and fold the difference
+into the per-host aggregates, like ``SnapshotCache`` does for the exporter::
+
+    index = TrackerIndex(client)
+    await index.refresh()
+    for host in index.failing(min_streak=3):
+        await index.reannounce(host)
+    await index.replace("tracker.dead.org", "tracker.alive.org:443")
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+from urllib.parse import urlsplit, urlunsplit
+
+from aiotr.exception import TransmissionException
+from aiotr.utils import tracker_host
+
+logger = logging.getLogger(__name__)
+
+TRACKER_FIELDS = ["id", "trackerStats"]
+
+# host, tracker id, announce, succeeded, timed out, result, announce time,
+# seeders, leechers
+Entry = Tuple[str, int, str, bool, bool, str, int, int, int]
+
+
+class HostHealth:
+    __slots__ = (
+        "host",
+        "trackers",
+        "failing",
+        "timed_out",
+        "seeders",
+        "leechers",
+        "last_result",
+        "last_announce",
+        "streak",
+        "failing_since",
+    )
+
+    def __init__(self, host: str):
+        self.host = host
+        self.trackers = 0  # tracker entries across torrents
+        self.failing = 0  # entries whose last announce failed
+        self.timed_out = 0  # of which timed out
+        self.seeders = 0  # summed seederCount, unknown (-1) counts skipped
+        self.leechers = 0
+        self.last_result = ""  # lastAnnounceResult of the newest announce
+        self.last_announce = 0  # its lastAnnounceTime
+        self.streak = 0  # consecutive refreshes with every entry failing
+        self.failing_since: Optional[float] = None  # time.time() the streak began
+
+    def add(self, sign: int, entry: Entry) -> None:
+        _, _, _, succeeded, timed_out, result, when, seeders, leechers = entry
+        self.trackers += sign
+        if not succeeded:
+            self.failing += sign
+            if timed_out:
+                self.timed_out += sign
+        if seeders > 0:
+            self.seeders += sign * seeders
+        if leechers > 0:
+            self.leechers += sign * leechers
+        if sign > 0 and when >= self.last_announce:
+            self.last_announce = when
+            self.last_result = result
+
+    @property
+    def down(self) -> bool:
+        return self.trackers > 0 and self.failing == self.trackers
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TrackerIndex:
+    """
+    :param client: a ``TransmissionClient``
+    :param full_every: refetch every torrent once per this many refreshes
+    """
+
+    def __init__(self, client, full_every: int = 20):
+        self.client = client
+        self.full_every = full_every
+        self.daemon: str = client.daemon
+        self.entries: Dict[int, Tuple[Entry, ...]] = {}  # torrent id -> its trackers
+        self.hosts: Dict[str, HostHealth] = {}
+        self.torrents: Dict[str, Set[int]] = defaultdict(set)  # host -> torrent ids
+        self.polls = 0
+        self.stale = False  # read every torrent on the next refresh
+
+    @staticmethod
+    def entries_of(stats: Iterable[dict]) -> Tuple[Entry, ...]:
+        return tuple(
+            (
+                tracker_host(s["announce"]),
+                s["id"],
+                s["announce"],
+                # trackers yet to announce do not count as failing
+                bool(s.get("lastAnnounceSucceeded") or not s.get("hasAnnounced", True)),
+                bool(s.get("lastAnnounceTimedOut")),
+                s.get("lastAnnounceResult", ""),
+                s.get("lastAnnounceTime", 0),
+                s.get("seederCount", -1),
+                s.get("leecherCount", -1),
+            )
+            for s in stats
+        )
+
+    def _apply(self, tid: int, entries: Tuple[Entry, ...], sign: int) -> None:
+        for entry in entries:
+            host = entry[0]
+            health = self.hosts.get(host)
+            if health is None:
+                health = self.hosts[host] = HostHealth(host)
+            health.add(sign, entry)
+            if sign > 0:
+                self.torrents[host].add(tid)
+            else:
+                self.torrents[host].discard(tid)
+                if not health.trackers:
+                    del self.hosts[host]
+                    del self.torrents[host]
+
+    def update(
+        self, torrents: List[dict], removed: Iterable[int] = (), full: bool = False
+    ) -> None:
+        """
+        Fold torrent-get rows into the index, touching only what changed
+        """
+        seen = set()
+        for torrent in torrents:
+            tid = torrent["id"]
+            seen.add(tid)
+            entries = self.entries_of(torrent.get("trackerStats") or ())
+            old = self.entries.get(tid)
+            if old == entries:
+                continue
+            if old is not None:
+                self._apply(tid, old, -1)
+            self._apply(tid, entries, 1)
+            self.entries[tid] = entries
+        if full:
+            removed = [tid for tid in self.entries if tid not in seen]
+        for tid in removed:
+            old = self.entries.pop(tid, None)
+            if old is not None:
+                self._apply(tid, old, -1)
+        now = time.time()
+        for health in self.hosts.values():
+            if health.down:
+                if not health.streak:
+                    health.failing_since = now
+                health.streak += 1
+            else:
+                health.streak = 0
+                health.failing_since = None
+
+    async def refresh(self) -> None:
+        full = self.stale or self.polls % self.full_every == 0
+        self.stale = False
+        data = await self.client.torrent_get(
+            TRACKER_FIELDS, ids=None if full else "recently-active"
+        )
+        data = data or {}
+        self.update(data.get("torrents", []), data.get("removed", ()), full)
+        self.polls += 1
+
+    async def run(self, interval: float = 300.0) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("tracker refresh of %s failed", self.daemon)
+            await asyncio.sleep(interval)
+
+    def failing(self, min_streak: int = 1) -> List[str]:
+        """
+        Hosts whose every announce failed for ``min_streak`` refreshes, longest
+        streak first
+        """
+        hosts = [h for h in self.hosts.values() if h.streak >= min_streak]
+        hosts.sort(key=lambda h: h.streak, reverse=True)
+        return [h.host for h in hosts]
+
+    async def reannounce(self, host: str) -> List[int]:
+        """
+        One torrent-reannounce for every torrent announcing to ``host``
+        """
+        ids = sorted(self.torrents.get(host, ()))
+        if ids:
+            await self.client.torrent_reannounce(ids=ids)
+        return ids
+
+    async def replace(
+        self, host: str, replacement: Union[str, Callable[[str], str]]
+    ) -> List[int]:
+        """
+        Swap the announce urls of ``host`` with trackerReplace, torrents whose
+        tracker id and new url agree share one torrent-set, all sent in one
+        batch. The next refresh reads every torrent again.
+
+        :param replacement: the new "host[:port]", or a function from the old
+         announce url to the new one
+        """
+        if isinstance(replacement, str):
+            netloc = replacement
+
+            def rewrite(announce: str) -> str:
+                return urlunsplit(urlsplit(announce)._replace(netloc=netloc))
+
+        else:
+            rewrite = replacement
+        groups: Dict[Tuple[int, str], List[int]] = defaultdict(list)
+        for tid in sorted(self.torrents.get(host, ())):
+            for entry in self.entries[tid]:
+                if entry[0] == host:
+                    groups[(entry[1], rewrite(entry[2]))].append(tid)
+        if not groups:
+            return []
+        async with self.client.batch() as batch:
+            futures = [
+                await batch.torrent_set(ids=ids, trackerReplace=[tracker, url])
+                for (tracker, url), ids in groups.items()
+            ]
+        self.stale = True
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            raise TransmissionException(
+                "trackerReplace of {} failed on {}: {}".format(
+                    host, self.daemon, errors[0]
+                )
+            )
+        return sorted({tid for ids in groups.values() for tid in ids})
+
+    def summary(self) -> List[dict]:
+        return [
+            dict(health.as_dict(), torrents=len(self.torrents[host]))
+            for host, health in sorted(self.hosts.items())
+        ]
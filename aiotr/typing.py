@@ -17,4 +17,18 @@ class Response(TypedDict):
     tag: int
 
 
+class JsonRpcRequest(TypedDict):
+    jsonrpc: Literal["2.0"]
+    method: str
+    params: Optional[dict]
+    id: int
+
+
+class JsonRpcResponse(TypedDict, total=False):
+    jsonrpc: Literal["2.0"]
+    result: Optional[dict]
+    error: dict
+    id: int
+
+
 TagFactory = Callable[[], int]
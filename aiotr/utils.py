@@ -4,12 +4,19 @@ Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
 
 import json
 import sys
+import zlib
+from typing import Optional, Union
+from urllib.parse import urlparse
 
 DEFAULT_JSON_DECODER = json.loads
 DEFAULT_JSON_ENCODER = json.dumps
 
 DEFAULT_HOST = "http://127.0.0.1:9091/transmission/rpc"
+DEFAULT_RPC_PATH = "/transmission/rpc"
 DEFAULT_TIMEOUT = 30.0
+DEFAULT_COMPRESS_THRESHOLD = 64 * 1024
+# first rpc-version whose daemon accepts JSON-RPC 2.0 (and batch) payloads
+JSONRPC_RPC_VERSION = 18
 
 
 class TagGen:
@@ -19,3 +26,35 @@ class TagGen:
     def __call__(self) -> int:
         self._id = (self._id + 1) % sys.maxsize
         return self._id
+
+
+def tracker_host(announce: str) -> str:
+    """
+    The hostname of an announce url, the url itself when it has none
+    """
+    return urlparse(announce).hostname or announce
+
+
+def table_to_objects(data: Optional[dict]) -> Optional[dict]:
+    """
+    Turn a torrent-get "table" response into the "objects" form, in place
+    """
+    if data and data.get("torrents"):
+        keys, *rows = data["torrents"]
+        data["torrents"] = [dict(zip(keys, row)) for row in rows]
+    return data
+
+
+def compress(payload: Union[str, bytes], encoding: str) -> bytes:
+    """
+    Compress a request body with the "gzip" or "deflate" content-coding
+    """
+    if isinstance(payload, str):
+        payload = payload.encode()
+    if encoding == "gzip":
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        compressor = zlib.compressobj()
+    else:
+        raise ValueError("unsupported content-coding: {}".format(encoding))
+    return compressor.compress(payload) + compressor.flush()
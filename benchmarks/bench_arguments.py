@@ -0,0 +1,209 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Cost of building torrent-set / session-set arguments: the baseline client's
+methods (a dict of every parameter, then the falsy values dropped in rpc(),
+copied below from the last release before aiotr.spec) against the builders
+compiled from aiotr.spec.
+
+    python benchmarks/bench_arguments.py
+"""
+
+import timeit
+
+from aiotr.spec import BUILDERS
+
+
+# verbatim from the baseline _BaseTransmissionClient, minus the rpc round trip
+def baseline_rpc(arguments: dict) -> dict:
+    return {k: v for k, v in arguments.items() if v}
+
+
+def baseline_torrent_set(
+    bandwidthPriority=None,
+    downloadLimit=None,
+    downloadLimited=None,
+    files_wanted=None,
+    files_unwanted=None,
+    group=None,
+    honorsSessionLimits=None,
+    ids=None,
+    labels=None,
+    location=None,
+    peer_limit=None,
+    priority_high=None,
+    priority_low=None,
+    priority_normal=None,
+    queuePosition=None,
+    seedIdleLimit=None,
+    seedIdleMode=None,
+    seedRatioLimit=None,
+    seedRatioMode=None,
+    sequentialDownload=None,
+    trackerAdd=None,
+    trackerList=None,
+    trackerRemove=None,
+    trackerReplace=None,
+    uploadLimit=None,
+    uploadLimited=None,
+):
+    arguments = {
+        "bandwidthPriority": bandwidthPriority,
+        "downloadLimit": downloadLimit,
+        "downloadLimited": downloadLimited,
+        "files-wanted": files_wanted,
+        "files-unwanted": files_unwanted,
+        "group": group,
+        "honorsSessionLimits": honorsSessionLimits,
+        "ids": ids,
+        "labels": labels,
+        "location": location,
+        "peer-limit": peer_limit,
+        "priority-high": priority_high,
+        "priority-low": priority_low,
+        "priority-normal": priority_normal,
+        "queuePosition": queuePosition,
+        "seedIdleLimit": seedIdleLimit,
+        "seedIdleMode": seedIdleMode,
+        "seedRatioLimit": seedRatioLimit,
+        "seedRatioMode": seedRatioMode,
+        "sequentialDownload": sequentialDownload,
+        "trackerAdd": trackerAdd,
+        "trackerList": trackerList,
+        "trackerRemove": trackerRemove,
+        "trackerReplace": trackerReplace,
+        "uploadLimit": uploadLimit,
+        "uploadLimited": uploadLimited,
+    }
+    return baseline_rpc(arguments)
+
+
+def baseline_session_set(
+    alt_speed_down=None,
+    alt_speed_enabled=None,
+    alt_speed_time_begin=None,
+    alt_speed_time_enabled=None,
+    alt_speed_time_end=None,
+    alt_speed_time_day=None,
+    alt_speed_up=None,
+    blocklist_url=None,
+    blocklist_enabled=None,
+    cache_size_mb=None,
+    default_trackers=None,
+    download_dir=None,
+    download_queue_size=None,
+    download_queue_enabled=None,
+    dht_enabled=None,
+    encryption=None,
+    idle_seeding_limit=None,
+    idle_seeding_limit_enabled=None,
+    incomplete_dir=None,
+    incomplete_dir_enabled=None,
+    lpd_enabled=None,
+    peer_limit_global=None,
+    peer_limit_per_torrent=None,
+    pex_enabled=None,
+    peer_port=None,
+    peer_port_random_on_start=None,
+    port_forwarding_enabled=None,
+    queue_stalled_enabled=None,
+    queue_stalled_minutes=None,
+    rename_partial_files=None,
+    script_torrent_added_filename=None,
+    script_torrent_added_enabled=None,
+    script_torrent_done_filename=None,
+    script_torrent_done_enabled=None,
+    script_torrent_done_seeding_filename=None,
+    script_torrent_done_seeding_enabled=None,
+    seedRatioLimit=None,
+    seedRatioLimited=None,
+    seed_queue_size=None,
+    seed_queue_enabled=None,
+    speed_limit_down=None,
+    speed_limit_down_enabled=None,
+    speed_limit_up=None,
+    speed_limit_up_enabled=None,
+    start_added_torrents=None,
+    trash_original_torrent_files=None,
+    units=None,
+    utp_enabled=None,
+):
+    arguments = {
+        "alt-speed-down": alt_speed_down,
+        "alt-speed-enabled": alt_speed_enabled,
+        "alt-speed-time-begin": alt_speed_time_begin,
+        "alt-speed-time-enabled": alt_speed_time_enabled,
+        "alt-speed-time-end": alt_speed_time_end,
+        "alt-speed-time-day": alt_speed_time_day,
+        "alt-speed-up": alt_speed_up,
+        "blocklist-url": blocklist_url,
+        "blocklist-enabled": blocklist_enabled,
+        "cache-size-mb": cache_size_mb,
+        "default-trackers": default_trackers,
+        "download-dir": download_dir,
+        "download-queue-size": download_queue_size,
+        "download-queue-enabled": download_queue_enabled,
+        "dht-enabled": dht_enabled,
+        "encryption": encryption,
+        "idle-seeding-limit": idle_seeding_limit,
+        "idle-seeding-limit-enabled": idle_seeding_limit_enabled,
+        "incomplete-dir": incomplete_dir,
+        "incomplete-dir-enabled": incomplete_dir_enabled,
+        "lpd-enabled": lpd_enabled,
+        "peer-limit-global": peer_limit_global,
+        "peer-limit-per-torrent": peer_limit_per_torrent,
+        "pex-enabled": pex_enabled,
+        "peer-port": peer_port,
+        "peer-port-random-on-start": peer_port_random_on_start,
+        "port-forwarding-enabled": port_forwarding_enabled,
+        "queue-stalled-enabled": queue_stalled_enabled,
+        "queue-stalled-minutes": queue_stalled_minutes,
+        "rename-partial-files": rename_partial_files,
+        "script-torrent-added-filename": script_torrent_added_filename,
+        "script-torrent-added-enabled": script_torrent_added_enabled,
+        "script-torrent-done-filename": script_torrent_done_filename,
+        "script-torrent-done-enabled": script_torrent_done_enabled,
+        "script-torrent-done-seeding-filename": script_torrent_done_seeding_filename,
+        "script-torrent-done-seeding-enabled": script_torrent_done_seeding_enabled,
+        "seedRatioLimit": seedRatioLimit,
+        "seedRatioLimited": seedRatioLimited,
+        "seed-queue-size": seed_queue_size,
+        "seed-queue-enabled": seed_queue_enabled,
+        "speed-limit-down": speed_limit_down,
+        "speed-limit-down-enabled": speed_limit_down_enabled,
+        "speed-limit-up": speed_limit_up,
+        "speed-limit-up-enabled": speed_limit_up_enabled,
+        "start-added-torrents": start_added_torrents,
+        "trash-original-torrent-files": trash_original_torrent_files,
+        "units": units,
+        "utp-enabled": utp_enabled,
+    }
+    return baseline_rpc(arguments)
+
+
+BASELINE = {"torrent-set": baseline_torrent_set, "session-set": baseline_session_set}
+
+CASES = {
+    "torrent-set": {"ids": [1, 2, 3], "downloadLimit": 100, "labels": ["tv"]},
+    "session-set": {"speed_limit_down": 1000, "speed_limit_down_enabled": True},
+}
+
+
+def main() -> None:
+    number = 200_000
+    for method, kwargs in CASES.items():
+        builder = BUILDERS[method]
+        baseline = BASELINE[method]
+        # both send the same arguments for truthy values
+        assert baseline(**kwargs) == builder(**kwargs)
+        old = timeit.timeit(lambda: baseline(**kwargs), number=number)
+        new = timeit.timeit(lambda: builder(**kwargs), number=number)
+        print(
+            "{:<12} baseline={:7.3f}us builder={:7.3f}us speedup={:5.1f}x".format(
+                method, old / number * 1e6, new / number * 1e6, old / new
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
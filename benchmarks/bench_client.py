@@ -0,0 +1,263 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+End-to-end client benchmarks against ``aiotr.fake.FakeTransmission`` running in
+its own process, so only client-side cost is measured:
+
+* small rpc throughput and p50/p99 latency at several concurrency levels
+* full torrent-get wall/parse time and peak RSS at 1k/10k/100k torrents
+* torrent-add ingestion throughput
+* encode/decode cost of every installed codec on a torrent-get response
+
+    python benchmarks/bench_client.py [--sizes 1000,10000,100000] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+
+import aiohttp
+
+import aiotr
+from aiotr import TransmissionClient
+from aiotr.codec import available, get_codec
+from aiotr.fake import FakeTransmission
+from aiotr.metrics import MetricsRecorder
+
+TORRENT_FIELDS = [
+    "id",
+    "name",
+    "hashString",
+    "status",
+    "totalSize",
+    "percentDone",
+    "rateDownload",
+    "rateUpload",
+    "uploadRatio",
+    "labels",
+    "queuePosition",
+    "files",
+]
+
+
+def peak_rss() -> int:
+    """
+    Peak resident set size of this process in bytes
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def _serve(torrents: int, conn) -> None:
+    async def main():
+        fake = FakeTransmission(torrents=torrents, log=0)
+        conn.send(await fake.start())
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+        await fake.close()
+
+    asyncio.run(main())
+
+
+@contextmanager
+def daemon(torrents: int = 0) -> Iterator[str]:
+    """
+    Run a fake daemon with ``torrents`` synthetic torrents in a child process
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(torrents, child))
+    process.start()
+    try:
+        yield parent.recv()
+    finally:
+        parent.send(None)
+        process.join()
+
+
+def _isolated(target: Callable, *args):
+    """
+    Run ``target(*args, conn)`` in a fresh process and return what it sends back,
+    so peak RSS is not inherited from earlier measurements
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=target, args=(*args, child))
+    process.start()
+    result = parent.recv()
+    process.join()
+    return result
+
+
+async def throughput(url: str, concurrency: int, requests: int) -> dict:
+    samples: List[float] = []
+
+    async def worker(client: TransmissionClient, count: int) -> None:
+        for _ in range(count):
+            start = time.perf_counter()
+            await client.session_stats()
+            samples.append(time.perf_counter() - start)
+
+    async with TransmissionClient(url=url) as client:
+        await client.session_stats()  # handshake + connection setup
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(worker(client, requests // concurrency) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - start
+    samples.sort()
+    return {
+        "benchmark": "small_rpc",
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "calls_per_sec": len(samples) / elapsed,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+    }
+
+
+def _torrent_get(url: str, torrents: int, codec: str, conn) -> None:
+    async def main():
+        metrics = MetricsRecorder()
+        async with TransmissionClient(url=url, metrics=metrics, codec=codec) as client:
+            await client.session_stats()
+            baseline = peak_rss()
+            start = time.perf_counter()
+            data = await client.torrent_get(TORRENT_FIELDS)
+            elapsed = time.perf_counter() - start
+        assert len(data["torrents"]) == torrents
+        phase = metrics.latency
+        key = (client.daemon, "torrent-get")
+        return {
+            "benchmark": "torrent_get",
+            "codec": codec,
+            "torrents": torrents,
+            "wall_ms": elapsed * 1000,
+            "wire_ms": phase[key + ("wire",)].sum * 1000,
+            "read_ms": phase[key + ("read",)].sum * 1000,
+            "parse_ms": phase[key + ("parse",)].sum * 1000,
+            "response_bytes": int(metrics.size[key + ("response",)].sum),
+            "peak_rss_bytes": peak_rss(),
+            "peak_rss_delta_bytes": peak_rss() - baseline,
+        }
+
+    conn.send(asyncio.run(main()))
+
+
+async def ingestion(url: str, concurrency: int, adds: int) -> dict:
+    async def worker(client: TransmissionClient, offset: int) -> None:
+        for i in range(offset, adds, concurrency):
+            await client.torrent_add(
+                filename="magnet:?xt=urn:btih:{:040x}".format(i), paused=True
+            )
+
+    async with TransmissionClient(url=url) as client:
+        await client.session_stats()
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {
+        "benchmark": "torrent_add",
+        "concurrency": concurrency,
+        "adds": adds,
+        "adds_per_sec": adds / elapsed,
+    }
+
+
+def codec_comparison(torrents: int, rounds: int = 3) -> List[dict]:
+    fake = FakeTransmission(torrents=torrents)
+    message = {
+        "result": "success",
+        "arguments": fake.torrent_get({"fields": TORRENT_FIELDS}),
+        "tag": 1,
+    }
+    results = []
+    for name in available():
+        codec = get_codec(name)
+        dumps, loads = codec.dumps, codec.loads
+        encoded = dumps(message)
+        encode = decode = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            dumps(message)
+            encode = min(encode, time.perf_counter() - start)
+            start = time.perf_counter()
+            loads(encoded)
+            decode = min(decode, time.perf_counter() - start)
+        results.append(
+            {
+                "benchmark": "codec",
+                "codec": name,
+                "torrents": torrents,
+                "bytes": len(encoded),
+                "encode_ms": encode * 1000,
+                "decode_ms": decode * 1000,
+            }
+        )
+    return results
+
+
+def run(sizes: List[int], concurrency: List[int], requests: int, adds: int):
+    results: List[dict] = []
+    with daemon() as url:
+        for c in concurrency:
+            results.append(asyncio.run(throughput(url, c, requests)))
+        results.append(asyncio.run(ingestion(url, 16, adds)))
+    for size in sizes:
+        with daemon(size) as url:
+            for name in available():
+                results.append(_isolated(_torrent_get, url, size, name))
+    results.extend(codec_comparison(min(sizes)))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--concurrency", default="1,8,64")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--adds", type=int, default=2000)
+    parser.add_argument("--output", help="write results as json")
+    args = parser.parse_args()
+    results = run(
+        [int(s) for s in args.sizes.split(",")],
+        [int(c) for c in args.concurrency.split(",")],
+        args.requests,
+        args.adds,
+    )
+    for r in results:
+        print(
+            " ".join(
+                (
+                    "{}={:.2f}".format(k, v)
+                    if isinstance(v, float)
+                    else "{}={}".format(k, v)
+                )
+                for k, v in r.items()
+            )
+        )
+    if args.output:
+        report = {
+            "meta": {
+                "time": time.time(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "aiohttp": aiohttp.__version__,
+                "aiotr": aiotr.__version__,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Bytes on the wire and cpu cost of each content-coding for a torrent-get
+response carrying files and trackerStats.
+
+    python benchmarks/bench_compression.py [torrents] [output.json]
+"""
+
+import json
+import sys
+import time
+import zlib
+from typing import Callable, Dict, List, Tuple
+
+
+def make_payload(torrents: int) -> bytes:
+    rows = []
+    for i in range(torrents):
+        rows.append(
+            {
+                "id": i,
+                "name": "torrent-{:06d}".format(i),
+                "hashString": "{:040x}".format(i * 2654435761),
+                "files": [
+                    {
+                        "name": "torrent-{:06d}/disc{}/track{:02d}.flac".format(
+                            i, d, n
+                        ),
+                        "length": 31_457_280 + n,
+                        "bytesCompleted": 31_457_280,
+                    }
+                    for d in range(2)
+                    for n in range(8)
+                ],
+                "trackerStats": [
+                    {
+                        "announce": "udp://tracker{}.example.org:6969/announce".format(
+                            t
+                        ),
+                        "host": "udp://tracker{}.example.org:6969".format(t),
+                        "id": t,
+                        "lastAnnounceResult": "Success",
+                        "lastAnnounceSucceeded": True,
+                        "seederCount": (i * 7 + t) % 500,
+                        "leecherCount": (i * 3 + t) % 50,
+                        "tier": t,
+                    }
+                    for t in range(3)
+                ],
+            }
+        )
+    data = {"result": "success", "arguments": {"torrents": rows}, "tag": 1}
+    return json.dumps(data).encode()
+
+
+def codecs() -> Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    result = {
+        "identity": (lambda b: b, lambda b: b),
+        "gzip-1": (
+            lambda b: _zlib_compress(b, 1, 16 + zlib.MAX_WBITS),
+            lambda b: zlib.decompress(b, 16 + zlib.MAX_WBITS),
+        ),
+        "gzip-6": (
+            lambda b: _zlib_compress(b, 6, 16 + zlib.MAX_WBITS),
+            lambda b: zlib.decompress(b, 16 + zlib.MAX_WBITS),
+        ),
+        "deflate-6": (
+            lambda b: _zlib_compress(b, 6, zlib.MAX_WBITS),
+            zlib.decompress,
+        ),
+    }
+    try:
+        import brotli
+
+        result["br-4"] = (lambda b: brotli.compress(b, quality=4), brotli.decompress)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+
+        result["zstd-3"] = (
+            zstandard.ZstdCompressor(level=3).compress,
+            zstandard.ZstdDecompressor().decompress,
+        )
+    except ImportError:
+        pass
+    return result
+
+
+def _zlib_compress(data: bytes, level: int, wbits: int) -> bytes:
+    compressor = zlib.compressobj(level, wbits=wbits)
+    return compressor.compress(data) + compressor.flush()
+
+
+def run(torrents: int) -> List[dict]:
+    payload = make_payload(torrents)
+    results = []
+    for name, (compress, decompress) in codecs().items():
+        start = time.process_time()
+        compressed = compress(payload)
+        compress_cpu = time.process_time() - start
+        start = time.process_time()
+        decompress(compressed)
+        decompress_cpu = time.process_time() - start
+        results.append(
+            {
+                "encoding": name,
+                "torrents": torrents,
+                "raw_bytes": len(payload),
+                "wire_bytes": len(compressed),
+                "ratio": len(payload) / len(compressed),
+                "compress_cpu_ms": compress_cpu * 1000,
+                "decompress_cpu_ms": decompress_cpu * 1000,
+            }
+        )
+    return results
+
+
+def main() -> None:
+    torrents = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    results = run(torrents)
+    for r in results:
+        print(
+            "{encoding:<10} wire={wire_bytes:>11,}B ratio={ratio:6.2f} "
+            "compress={compress_cpu_ms:8.1f}ms decompress={decompress_cpu_ms:7.1f}ms".format(
+                **r
+            )
+        )
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
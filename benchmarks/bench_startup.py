@@ -0,0 +1,75 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Cold-start cost in a fresh interpreter: ``import aiotr``, constructing a client,
+and the first and second rpc against a fake daemon.
+
+    python benchmarks/bench_startup.py [runs] [output.json]
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+
+from bench_client import daemon
+
+PROBE = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import aiotr
+imported = time.perf_counter()
+client = aiotr.TransmissionClient(url=sys.argv[1])
+constructed = time.perf_counter()
+
+async def main():
+    t0 = time.perf_counter()
+    await client.session_stats()
+    t1 = time.perf_counter()
+    await client.session_stats()
+    t2 = time.perf_counter()
+    await client.close()
+    return t1 - t0, t2 - t1
+
+first, second = asyncio.run(main())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "construct_ms": (constructed - imported) * 1000,
+    "first_call_ms": first * 1000,
+    "second_call_ms": second * 1000,
+}))
+"""
+
+
+def run(runs: int) -> dict:
+    samples = []
+    with daemon() as url:
+        for _ in range(runs):
+            out = subprocess.run(
+                [sys.executable, "-c", PROBE, url],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            samples.append(json.loads(out))
+    return {
+        key: {
+            "median": statistics.median(s[key] for s in samples),
+            "min": min(s[key] for s in samples),
+        }
+        for key in samples[0]
+    }
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    results = run(runs)
+    for key, value in results.items():
+        print("{:<15} median={median:8.2f} min={min:8.2f}".format(key, **value))
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Blocking call sites: ``asyncio.run`` with a fresh client per call (what sync
+code does without a facade) against ``SyncTransmissionClient`` sharing one
+background loop, from 1 and from many threads.
+
+    python benchmarks/bench_sync.py [--calls 500] [--threads 1,8,32] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from bench_client import daemon, percentile
+
+from aiotr import TransmissionClient
+from aiotr.sync import SyncTransmissionClient
+
+
+def asyncio_run_call(url: str) -> Callable[[], None]:
+    def call() -> None:
+        async def once():
+            client = TransmissionClient(url=url)
+            try:
+                await client.session_stats()
+            finally:
+                await client.close()
+
+        asyncio.run(once())
+
+    return call
+
+
+def measure(call: Callable[[], None], calls: int, threads: int) -> dict:
+    latencies: List[float] = []
+
+    def timed(_) -> None:
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(timed, range(calls)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "calls_per_sec": calls / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--threads", default="1,8,32")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    results = []
+    with daemon() as url:
+        client = SyncTransmissionClient(url=url)
+        client.session_stats()  # handshake before measuring
+        patterns = {
+            "asyncio.run": asyncio_run_call(url),
+            "SyncTransmissionClient": client.session_stats,
+        }
+        for threads in map(int, args.threads.split(",")):
+            for name, call in patterns.items():
+                row = {"pattern": name, "threads": threads}
+                row.update(measure(call, args.calls, threads))
+                results.append(row)
+                print(
+                    "{pattern:<24} threads={threads:<3} {calls_per_sec:9.0f} calls/s "
+                    "p50={p50_ms:7.2f}ms p99={p99_ms:7.2f}ms".format(**row)
+                )
+        client.close()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
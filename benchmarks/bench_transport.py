@@ -0,0 +1,71 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Compare rpc latency over loopback TCP and a UNIX domain socket.
+
+    python benchmarks/bench_transport.py [requests]
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+from aiotr import TransmissionClient
+
+
+async def handle_rpc(request: web.Request) -> web.Response:
+    if request.headers.get("X-Transmission-Session-Id") != "bench":
+        return web.Response(status=409, headers={"X-Transmission-Session-Id": "bench"})
+    data = json.loads(await request.read())
+    return web.json_response({"result": "success", "arguments": {}, "tag": data["tag"]})
+
+
+async def measure(url: str, requests: int) -> dict:
+    async with TransmissionClient(url=url) as client:
+        await client.session_stats()  # handshake + connection setup
+        samples = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            await client.session_stats()
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p99_us": samples[int(len(samples) * 0.99)] * 1e6,
+        "mean_us": statistics.fmean(samples) * 1e6,
+    }
+
+
+async def main(requests: int) -> None:
+    app = web.Application()
+    app.router.add_post("/transmission/rpc", handle_rpc)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        socket_path = os.path.join(tmpdir, "transmission.sock")
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        await web.UnixSite(runner, socket_path).start()
+        port = runner.addresses[0][1]
+        try:
+            for name, url in (
+                ("tcp", f"http://127.0.0.1:{port}/transmission/rpc"),
+                ("unix", f"unix://{socket_path}"),
+            ):
+                result = await measure(url, requests)
+                print(
+                    "{:<5} p50={p50_us:8.1f}us p99={p99_us:8.1f}us mean={mean_us:8.1f}us".format(
+                        name, **result
+                    )
+                )
+        finally:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
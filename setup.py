@@ -39,8 +39,9 @@ def main():
         author="synodriver",
         author_email="diguohuangjiajinweijun@gmail.com",
         maintainer="v-vinson",
-        python_requires=">=3.6",
+        python_requires=">=3.8",
         install_requires=["aiohttp"],
+        entry_points={"console_scripts": ["aiotr = aiotr.cli:main"]},
         license="GPLv3",
         classifiers=[
             "Development Status :: 3 - Alpha",
@@ -0,0 +1,83 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import asyncio
+import base64
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import TransmissionClient, TransmissionException
+from aiotr.allocator import Allocator
+from aiotr.fake import FakeTransmission
+from aiotr.locate import bencode
+
+GIB = 1 << 30
+
+
+def metainfo(name: str, length: int) -> str:
+    info = {"name": name, "length": length, "piece length": 1 << 20, "pieces": b""}
+    return base64.b64encode(bencode({"info": info})).decode()
+
+
+class TestAllocator(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fake = FakeTransmission()
+        self.fake.free_space.update({"/a": 10 * GIB, "/b": 8 * GIB})
+        # 4 GiB still to download into /a, found through a subdirectory
+        self.fake.add_synthetic(
+            downloadDir="/a/tv/", sizeWhenDone=6 * GIB, leftUntilDone=4 * GIB
+        )
+        self.fake.add_synthetic(downloadDir="/elsewhere", leftUntilDone=GIB)
+        self.client = TransmissionClient(url=await self.fake.start())
+
+    async def test_choose(self):
+        allocator = Allocator()
+        allocator.track(self.client, ["/a", "/b/"])
+        with self.assertRaises(TransmissionException):
+            allocator.choose(self.client)  # nothing fetched yet
+        await allocator.refresh(self.client)
+        self.assertEqual(self.fake.calls["free-space"], 2)
+        self.assertEqual(allocator.available(self.client, "/a"), 6 * GIB)
+        self.assertEqual(allocator.choose(self.client, GIB), "/b")
+        # concurrent adds share the cached figures, the second one goes to /a
+        first = allocator.reserve(self.client, 3 * GIB)
+        second = allocator.reserve(self.client, 3 * GIB)
+        self.assertEqual((first.path, second.path), ("/b", "/a"))
+        with self.assertRaises(TransmissionException):
+            allocator.reserve(self.client, 6 * GIB)
+        allocator.release(first)
+        self.assertEqual(allocator.available(self.client, "/b"), 8 * GIB)
+        self.assertEqual(self.fake.calls["free-space"], 2)
+
+    async def test_add(self):
+        allocator = Allocator(interval=0.05, headroom=GIB)
+        allocator.track(self.client, ["/a", "/b"])
+        async with allocator:
+            results = await asyncio.gather(
+                allocator.add(self.client, metainfo=metainfo("x", 4 * GIB)),
+                allocator.add(self.client, size=2 * GIB, filename="magnet:?xt=y"),
+            )
+            added = [r["torrent-added"]["id"] for r in results]
+            dirs = [self.fake.torrents[i]["downloadDir"] for i in added]
+            self.assertEqual(dirs, ["/b", "/a"])
+            self.assertEqual(allocator.available(self.client, "/b"), 3 * GIB)
+            # a duplicate releases its reservation
+            await allocator.add(self.client, size=GIB, filename="magnet:?xt=y")
+            self.assertEqual(allocator.available(self.client, "/b"), 3 * GIB)
+            await asyncio.sleep(0.15)
+        # the refresh replaced the reservations with the daemon's own figures
+        self.assertFalse(any(allocator.reservations.values()))
+        left = self.fake.torrents[added[0]]["leftUntilDone"]
+        self.assertEqual(allocator.available(self.client, "/b"), 8 * GIB - left - GIB)
+        self.assertIsNone(allocator._task)
+        with self.assertRaises(ValueError):
+            await allocator.add(self.client, filename="magnet:?xt=z")
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.fake.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import TransmissionClient, TransmissionException
+from aiotr.capabilities import PROFILES
+from aiotr.fake import FakeTransmission
+
+
+class TestBatch(IsolatedAsyncioTestCase):
+    async def start(self, rpc_version: int) -> TransmissionClient:
+        self.daemon = FakeTransmission(torrents=1, rpc_version=rpc_version)
+        self.client = TransmissionClient(url=await self.daemon.start())
+        return self.client
+
+    async def test_jsonrpc_batch(self):
+        client = await self.start(18)
+        del self.daemon.handlers["blocklist-update"]
+        async with client.batch() as batch:
+            stats = await batch.session_stats()
+            torrents = await batch.torrent_get(["id", "name"])
+            missing = await batch.blocklist_update()
+        self.assertTrue(client.jsonrpc)
+        self.assertEqual(stats.result()["torrentCount"], 1)
+        self.assertEqual(torrents.result()["torrents"][0]["name"], "synthetic-000001")
+        self.assertRaises(TransmissionException, missing.result)
+        # one detection request, then one batch post
+        self.assertEqual(len(self.daemon.requests), 2)
+        self.assertEqual(len(self.daemon.requests[1]), 3)
+
+    async def test_legacy_fallback(self):
+        client = await self.start(17)
+        async with client.batch() as batch:
+            stats = await batch.session_stats()
+            torrents = await batch.torrent_get(["id", "name"])
+        self.assertFalse(client.jsonrpc)
+        self.assertEqual(stats.result()["torrentCount"], 1)
+        self.assertEqual(torrents.result()["torrents"][0]["id"], 1)
+        self.assertFalse(any(isinstance(post, list) for post in self.daemon.requests))
+
+    async def asyncTearDown(self) -> None:
+        PROFILES.clear()
+        await self.client.close()
+        await self.daemon.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import Capabilities, TransmissionClient, TransmissionException
+from aiotr.capabilities import PROFILES
+from aiotr.fake import FakeTransmission
+
+
+class TestProfile(unittest.TestCase):
+    def test_adapt(self):
+        profile = Capabilities(15, 14, "2.94")
+        self.assertFalse(profile.table_format)
+        self.assertFalse(profile.supports("group-get"))
+        self.assertEqual(
+            profile.adapt("torrent-get", {"fields": ["id", "labels", "file-count"]}),
+            {"fields": ["id"]},
+        )
+        self.assertEqual(
+            profile.adapt("torrent-set", {"ids": 1, "group": "slow"}), {"ids": 1}
+        )
+        self.assertRaises(TransmissionException, profile.adapt, "group-get", {})
+
+
+class TestCapabilities(IsolatedAsyncioTestCase):
+    async def start(self, rpc_version: int) -> TransmissionClient:
+        self.daemon = FakeTransmission(torrents=2, rpc_version=rpc_version)
+        self.client = TransmissionClient(url=await self.daemon.start(), negotiate=True)
+        return self.client
+
+    async def test_handshake_cached(self):
+        client = await self.start(17)
+        profile = await client.capabilities()
+        self.assertEqual((profile.rpc_version, profile.version), (17, "4.0.5 (fake)"))
+        await client.session_stats()
+        await client.session_stats()
+        self.assertEqual(
+            [r["method"] for r in self.daemon.requests],
+            ["session-get", "session-stats", "session-stats"],
+        )
+
+    async def test_table_format(self):
+        client = await self.start(17)
+        data = await client.torrent_get(["id", "name"])
+        self.assertEqual(self.daemon.requests[-1]["arguments"]["format"], "table")
+        self.assertEqual(
+            data["torrents"],
+            [
+                {"id": 1, "name": "synthetic-000001"},
+                {"id": 2, "name": "synthetic-000002"},
+            ],
+        )
+
+    async def test_old_daemon(self):
+        client = await self.start(15)
+        data = await client.torrent_get(["id", "labels"])
+        self.assertEqual(self.daemon.requests[-1]["arguments"], {"fields": ["id"]})
+        self.assertEqual(data["torrents"], [{"id": 1}, {"id": 2}])
+
+    async def test_unix_daemons(self):
+        client = await self.start(17)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fakes = [FakeTransmission(torrents=1, rpc_version=v) for v in (15, 17)]
+            clients = [
+                TransmissionClient(
+                    url=await fake.start(
+                        unix=os.path.join(tmpdir, "{}.sock".format(i))
+                    ),
+                    negotiate=True,
+                )
+                for i, fake in enumerate(fakes)
+            ]
+            try:
+                # every unix client posts to http://localhost/transmission/rpc
+                versions = [(await c.capabilities()).rpc_version for c in clients]
+                self.assertEqual(versions, [15, 17])
+                await clients[0].torrent_get(["id"])
+                self.assertNotIn("format", fakes[0].requests[-1]["arguments"])
+                await clients[1].torrent_get(["id"])
+                self.assertEqual(fakes[1].requests[-1]["arguments"]["format"], "table")
+            finally:
+                for c, fake in zip(clients, fakes):
+                    await c.close()
+                    await fake.close()
+        self.assertEqual(len(PROFILES), 2)
+        # credentials are not part of the key
+        async with TransmissionClient("user", "secret", url=client.daemon) as authed:
+            await authed.capabilities()
+        self.assertIn(client.daemon, PROFILES)
+        self.assertFalse(any("secret" in key for key in PROFILES))
+
+    async def asyncTearDown(self) -> None:
+        PROFILES.clear()
+        await self.client.close()
+        await self.daemon.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
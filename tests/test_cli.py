@@ -0,0 +1,171 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import contextlib
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from aiotr.cli import Cache, Term, main
+from aiotr.fake import FakeTransmission
+from aiotr.sync import LoopThread
+
+
+class TestTerm(unittest.TestCase):
+    def test_match(self):
+        row = {
+            "name": "Ubuntu-24.04.iso",
+            "status": 6,
+            "uploadRatio": 2.5,
+            "totalSize": 5 << 30,
+            "labels": ["linux", "iso"],
+        }
+        for text, expected in [
+            ("status=seeding", True),
+            ("status!=6", False),
+            ("ratio>2", True),
+            ("size<=4G", False),
+            ("label=linux", True),
+            ("label!=iso", False),
+            ("label~LIN", True),
+            ("name~ubuntu*", True),
+            ("name~debian", False),
+            ("name=Ubuntu-24.04.iso", True),
+        ]:
+            with self.subTest(text):
+                self.assertIs(Term.parse(text)(row), expected)
+        for text in (
+            "name",
+            "status=resting",
+            "peersConnected>0",  # not in the cached fields
+            "label>tv",
+            "size~4G",
+            "ratio>high",
+        ):
+            with self.subTest(text), self.assertRaises(ValueError):
+                Term.parse(text)
+        # a field the daemon did not return matches nothing
+        self.assertFalse(Term.parse("label!=tv")({"name": "x"}))
+
+
+class TestCli(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.daemon_loop = LoopThread("fake-daemon")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.daemon_loop.stop()
+
+    def setUp(self) -> None:
+        self.fake = FakeTransmission(torrents=6)
+        self.url = self.daemon_loop.run(self.fake.start())
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.cache_dir = temp.name
+        self.addCleanup(lambda: self.daemon_loop.run(self.fake.close()))
+
+    def aiotr(self, *argv: str, urls=None) -> str:
+        argv = sum((["--url", url] for url in urls or [self.url]), []) + list(argv)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(main(["--cache-dir", self.cache_dir] + argv), 0)
+        return out.getvalue()
+
+    def test_list_cached(self):
+        first = self.aiotr("list", "--json")
+        self.assertEqual(len(first.splitlines()), 6)
+        self.assertEqual(self.fake.calls["torrent-get"], 1)
+        # served from the cache while it is younger than --max-age
+        self.fake.torrents[1]["name"] = "renamed"
+        self.assertEqual(self.aiotr("list", "--json"), first)
+        seeding = [t["id"] for t in self.fake.torrents.values() if t["status"] == 6]
+        self.assertEqual(
+            self.aiotr("filter", "status=seeding", "--ids").split(),
+            [str(tid) for tid in seeding],
+        )
+        self.assertEqual(self.fake.calls["torrent-get"], 1)
+        # stale: shown as is, refreshed by a detached process
+        with mock.patch("aiotr.cli.spawn_refresh") as spawn:
+            self.assertEqual(self.aiotr("list", "--json", "--max-age", "0"), first)
+            self.assertEqual(spawn.call_args[0][1], [self.url])
+            # the lock keeps a second invocation from spawning another refresh
+            self.aiotr("list", "--max-age", "0")
+            self.assertEqual(spawn.call_count, 1)
+        self.aiotr("refresh")
+        self.assertIn("renamed", self.aiotr("list"))
+        self.assertTrue(Cache(self.cache_dir, self.url).claim())
+
+    def test_actions(self):
+        downloading = [t for t in self.fake.torrents.values() if t["status"] == 4]
+        hash_string = downloading[0]["hashString"]
+        out = self.aiotr("stop", "-n", hash_string)
+        self.assertTrue(out.startswith("would stop {} ".format(downloading[0]["id"])))
+        self.assertEqual(downloading[0]["status"], 4)
+        self.aiotr("stop", "status=downloading")
+        self.assertTrue(all(t["status"] == 0 for t in downloading))
+        # the cache follows the change without another refresh
+        self.assertEqual(self.aiotr("filter", "status=downloading", "--ids"), "")
+        self.aiotr("remove", "--delete", str(downloading[0]["id"]))
+        self.assertNotIn(downloading[0]["id"], self.fake.torrents)
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                main(["--url", self.url, "--url", self.url + "?x", "start", "1"])
+
+    def test_fleet(self):
+        other = FakeTransmission(torrents=3, seed=1)
+        url = self.daemon_loop.run(other.start())
+        self.addCleanup(lambda: self.daemon_loop.run(other.close()))
+        rows = [
+            json.loads(line)
+            for line in self.aiotr("list", "--json", urls=[self.url, url]).splitlines()
+        ]
+        self.assertEqual(len(rows), 9)
+        self.assertEqual({row["daemon"] for row in rows}, {self.url, url})
+        table = self.aiotr("list", urls=[self.url, url])
+        self.assertTrue(table.startswith("DAEMON"))
+        # a daemon that is down does not hide the others
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            with contextlib.redirect_stderr(io.StringIO()) as err:
+                status = main(
+                    ["--cache-dir", self.cache_dir, "--url", url, "--url"]
+                    + ["http://127.0.0.1:1/transmission/rpc", "list", "--json"]
+                    + ["--refresh"]
+                )
+        self.assertEqual(status, 1)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+        self.assertIn("127.0.0.1:1", err.getvalue())
+
+    def test_top(self):
+        out = self.aiotr("top", "--iterations", "2", "--interval", "0", "--limit", "3")
+        self.assertIn("6 torrents", out)
+        self.assertEqual(self.fake.requests[-1]["arguments"]["ids"], "recently-active")
+        data = Cache(self.cache_dir, self.url).load()
+        self.assertEqual(len(data["torrents"]), 6)
+
+    def test_cold_start(self):
+        self.aiotr("list")
+        probe = (
+            "import sys\n"
+            "from aiotr.cli import main\n"
+            "main(sys.argv[1:])\n"
+            "assert 'asyncio' not in sys.modules, 'asyncio imported'\n"
+            "assert 'aiohttp' not in sys.modules, 'aiohttp imported'\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", probe, "--cache-dir", self.cache_dir]
+            + ["--url", self.url, "list", "--max-age", "3600"],
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("synthetic-000001", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,17 +1,30 @@
 """
 Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+
+Runs against the bundled fake daemon, set AIOTR_TEST_DAEMON=1 to use a real
+one on the default url instead.
 """
 
+import os
 import unittest
 from pprint import pprint
 from unittest import IsolatedAsyncioTestCase
 
 from aiotr import TransmissionClient
+from aiotr.fake import FakeTransmission
+
+REAL_DAEMON = bool(os.environ.get("AIOTR_TEST_DAEMON"))
 
 
 class TestClient(IsolatedAsyncioTestCase):
     async def asyncSetUp(self) -> None:
-        self.client = TransmissionClient("synodriver", "adman")
+        if REAL_DAEMON:
+            self.fake = None
+            self.client = TransmissionClient("synodriver", "adman")
+        else:
+            self.fake = FakeTransmission(username="synodriver", password="adman")
+            url = await self.fake.start()
+            self.client = TransmissionClient("synodriver", "adman", url=url)
 
     async def test_connect(self):
         data = await self.client.port_test()
@@ -29,6 +42,8 @@ class TestClient(IsolatedAsyncioTestCase):
 
     async def asyncTearDown(self) -> None:
         await self.client.close()
+        if self.fake is not None:
+            await self.fake.close()
 
 
 if __name__ == "__main__":
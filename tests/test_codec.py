@@ -0,0 +1,107 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import json
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import TransmissionClient
+from aiotr.capabilities import PROFILES
+from aiotr.codec import DEFAULT_CODEC, MsgspecCodec, available, get_codec
+from aiotr.fake import FakeTransmission
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - msgspec is optional
+    msgspec = None
+
+
+class TestCodec(unittest.TestCase):
+    def test_json_identical(self):
+        codec = get_codec("json")
+        message = {"method": "torrent-get", "arguments": {"name": "β"}, "tag": 2}
+        self.assertEqual(codec.dumps(message), json.dumps(message).encode())
+        self.assertEqual(codec.loads(codec.dumps(message)), message)
+
+    def test_available(self):
+        names = available()
+        self.assertEqual(names[-1], "json")
+        self.assertIn(DEFAULT_CODEC.name, names)
+        message = {"torrents": [{"id": 1, "name": "ü", "percentDone": 0.5}]}
+        for name in names:
+            codec = get_codec(name)
+            self.assertIsInstance(codec.dumps(message), bytes)
+            self.assertEqual(codec.loads(codec.dumps(message)), message, name)
+
+
+class TestClientCodec(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fake = FakeTransmission(torrents=3)
+        self.url = await self.fake.start()
+
+    async def test_codecs(self):
+        expected = None
+        for name in available():
+            async with TransmissionClient(url=self.url, codec=name) as client:
+                data = await client.torrent_get(["id", "name", "labels"])
+            expected = expected or data
+            self.assertEqual(data, expected, name)
+
+    async def test_custom_functions(self):
+        seen = []
+
+        def loads(body):
+            seen.append(type(body))
+            return json.loads(body)
+
+        async with TransmissionClient(url=self.url, loads=loads) as client:
+            await client.session_stats()
+        self.assertEqual(client.codec.name, "custom")
+        self.assertEqual(seen, [str])
+        # str-only decoders keep working
+        decoder = json.JSONDecoder().decode
+        async with TransmissionClient(url=self.url, loads=decoder) as client:
+            self.assertIn("torrentCount", await client.session_stats())
+
+    async def test_deprecated_attributes(self):
+        client = TransmissionClient(url=self.url)
+        with self.assertWarns(DeprecationWarning):
+            self.assertIs(client.loads, client.codec.loads)
+        with self.assertWarns(DeprecationWarning):
+            self.assertEqual(client.dumps({"a": 1}), client.codec.dumps({"a": 1}))
+        seen = []
+
+        def loads(body):
+            seen.append(type(body))
+            return json.loads(body)
+
+        with self.assertWarns(DeprecationWarning):
+            client.loads = loads
+        async with client:
+            self.assertIn("torrentCount", await client.session_stats())
+        self.assertEqual(seen, [str])
+
+    @unittest.skipIf(msgspec is None, "msgspec is not installed")
+    async def test_typed(self):
+        class Torrent(msgspec.Struct):
+            id: int
+            name: str
+            percentDone: float = 0.0
+
+        codec = MsgspecCodec(Torrent)
+        async with TransmissionClient(
+            url=self.url, codec=codec, negotiate=True
+        ) as client:
+            data = await client.torrent_get(["id", "name", "percentDone"])
+        self.assertNotIn("format", self.fake.requests[-1]["arguments"])
+        self.assertIsInstance(data["torrents"][0], Torrent)
+        self.assertEqual(data["torrents"][1].name, "synthetic-000002")
+
+    async def asyncTearDown(self) -> None:
+        PROFILES.clear()
+        await self.fake.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
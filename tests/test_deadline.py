@@ -0,0 +1,78 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import asyncio
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import TransmissionClient, TransmissionTimeoutException
+from aiotr.deadline import DEADLINE, deadline, remaining
+from aiotr.fake import Fault, FakeTransmission
+from aiotr.metrics import MetricsRecorder
+from aiotr.retry import NO_RETRY
+
+
+class TestScope(unittest.TestCase):
+    def test_nesting(self):
+        self.assertIsNone(remaining())
+        with deadline(10) as outer:
+            with deadline(60) as inner:
+                self.assertEqual(inner, outer)
+            with deadline(1) as inner:
+                self.assertLess(inner, outer)
+                self.assertLessEqual(remaining(), 1)
+            self.assertEqual(DEADLINE.get(), outer)
+        self.assertIsNone(DEADLINE.get())
+
+
+class TestDeadline(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fake = FakeTransmission()
+        self.metrics = MetricsRecorder(trace=True)
+        self.client = TransmissionClient(
+            url=await self.fake.start(), metrics=self.metrics, retry=NO_RETRY
+        )
+        await self.client.session_stats()
+
+    def created(self) -> int:
+        return self.metrics.connections[(self.client.daemon, "created")]
+
+    async def test_timeout_keeps_connection(self):
+        self.fake.inject(Fault(delay=0.2))
+        start = time.monotonic()
+        with self.assertRaises(TransmissionTimeoutException):
+            await self.client.torrent_get(["id"], timeout=0.05)
+        self.assertLess(time.monotonic() - start, 0.15)
+        await asyncio.sleep(0.25)  # the abandoned exchange completes
+        await self.client.session_stats()
+        self.assertEqual(self.created(), 1)
+
+    async def test_expired_not_sent(self):
+        sent = len(self.fake.requests)
+        with deadline(at=time.monotonic() - 1):
+            with self.assertRaises(TransmissionTimeoutException):
+                await self.client.session_stats()
+        with self.assertRaises(TransmissionTimeoutException):
+            await self.client.session_stats(deadline=time.monotonic())
+        self.assertEqual(len(self.fake.requests), sent)
+
+    async def test_cancel_keeps_connection(self):
+        self.fake.inject(Fault(delay=0.1))
+        task = asyncio.ensure_future(self.client.session_stats())
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.15)
+        await self.client.session_stats()
+        self.assertEqual(self.created(), 1)
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.fake.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
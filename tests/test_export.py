@@ -0,0 +1,174 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import TransmissionClient
+from aiotr.codec import MsgspecCodec
+from aiotr.export import ArrowWriter, export, guess
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pyarrow = None
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - msgspec is optional
+    msgspec = None
+
+from aiotr.fake import FakeTransmission
+
+FIELDS = ["id", "name", "labels", "totalSize"]
+
+
+class TestExport(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fake = FakeTransmission(torrents=25)
+        self.client = TransmissionClient(url=await self.fake.start())
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+
+    def test_guess(self):
+        self.assertEqual(guess("a/fleet.csv.gz"), ("csv", "gzip"))
+        self.assertEqual(guess("fleet.jsonl"), ("jsonl", None))
+        self.assertEqual(guess("fleet.parquet"), ("parquet", None))
+        self.assertEqual(guess("fleet.txt.xz"), (None, "xz"))
+
+    async def test_jsonl(self):
+        path = self.path("fleet.jsonl.gz")
+        written = await export(self.client, path, FIELDS, batch_size=10)
+        self.assertEqual(written, 25)
+        # the id listing, then one torrent-get per batch
+        self.assertEqual(self.fake.calls["torrent-get"], 4)
+        with gzip.open(path, "rt") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([r["id"] for r in rows], list(range(1, 26)))
+        self.assertEqual(set(rows[0]), set(FIELDS))
+        self.assertEqual(rows[3]["labels"], self.fake.torrents[4]["labels"])
+
+    async def test_csv_stream(self):
+        stream = io.BytesIO()
+        written = await export(
+            self.client, stream, FIELDS, ids=[3, 4, 5], format="csv", batch_size=2
+        )
+        self.assertEqual(written, 3)
+        self.assertFalse(stream.closed)
+        rows = list(csv.reader(io.StringIO(stream.getvalue().decode())))
+        self.assertEqual(rows[0], FIELDS)
+        self.assertEqual([r[0] for r in rows[1:]], ["3", "4", "5"])
+        self.assertEqual(json.loads(rows[1][2]), self.fake.torrents[3]["labels"])
+        with self.assertRaises(ValueError):
+            await export(self.client, stream, FIELDS, format="xml")
+
+    async def test_empty(self):
+        self.fake.torrents.clear()
+        path = self.path("empty.csv")
+        self.assertEqual(await export(self.client, path, FIELDS), 0)
+        with open(path) as f:
+            self.assertEqual(f.read().strip(), ",".join(FIELDS))
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    async def test_arrow_empty(self):
+        self.fake.torrents.clear()
+        for name in ("empty.arrow", "empty.parquet"):
+            path = self.path(name)
+            self.assertEqual(await export(self.client, path, FIELDS), 0)
+            if name.endswith(".parquet"):
+                import pyarrow.parquet as pq
+
+                table = pq.read_table(path)
+            else:
+                with pyarrow.ipc.open_file(path) as reader:
+                    table = reader.read_all()
+            self.assertEqual(table.num_rows, 0)
+            self.assertEqual(table.column_names, FIELDS)
+            labels = table.schema.field("labels").type
+            self.assertEqual(labels, pyarrow.list_(pyarrow.string()))
+        # a field without a known type is a string column when no batch came
+        path = self.path("unknown.arrow")
+        ArrowWriter(path, ["id", "extra"]).close()
+        with pyarrow.ipc.open_file(path) as reader:
+            self.assertEqual(reader.schema.field("extra").type, pyarrow.string())
+
+    @unittest.skipIf(msgspec is None, "msgspec is not installed")
+    async def test_typed_codec(self):
+        class Torrent(msgspec.Struct):
+            id: int
+            name: str = ""
+            labels: list = []
+            totalSize: int = 0
+
+        client = TransmissionClient(url=self.client.url, codec=MsgspecCodec(Torrent))
+        self.addAsyncCleanup(client.close)
+        names = ["fleet.jsonl", "fleet.csv"]
+        if pyarrow is not None:
+            names.append("fleet.parquet")
+        for name in names:
+            with self.subTest(name):
+                path = self.path(name)
+                self.assertEqual(await export(client, path, FIELDS, batch_size=10), 25)
+                if name.endswith(".jsonl"):
+                    with open(path) as f:
+                        rows = [json.loads(line) for line in f]
+                elif name.endswith(".csv"):
+                    with open(path, newline="") as f:
+                        rows = list(csv.DictReader(f))
+                    for row in rows:
+                        row["id"] = int(row["id"])
+                        row["totalSize"] = int(row["totalSize"])
+                        row["labels"] = json.loads(row["labels"])
+                else:
+                    import pyarrow.parquet as pq
+
+                    rows = pq.read_table(path).to_pylist()
+                self.assertEqual(rows[4]["id"], 5)
+                self.assertEqual(rows[4]["name"], self.fake.torrents[5]["name"])
+                self.assertEqual(rows[4]["labels"], self.fake.torrents[5]["labels"])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    async def test_arrow(self):
+        path = self.path("fleet.arrow")
+        await export(self.client, path, FIELDS, batch_size=10, compression="zstd")
+        with pyarrow.ipc.open_file(path) as reader:
+            table = reader.read_all()
+        self.assertEqual(table.num_rows, 25)
+        self.assertEqual(table.column_names, FIELDS)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_arrow_null_first_batch(self):
+        fields = ["id", "labels", "errorString", "extra"]
+        first = {"id": 1, "labels": [], "errorString": None, "extra": None}
+        second = {"id": 2, "labels": ["a"], "errorString": "x", "extra": "y"}
+        for name, parquet in (("late.arrow", False), ("late.parquet", True)):
+            writer = ArrowWriter(self.path(name), fields, parquet=parquet)
+            # nothing in the first batch tells the type of these columns
+            writer.write([first])
+            writer.write([second])
+            writer.close()
+            if parquet:
+                import pyarrow.parquet as pq
+
+                table = pq.read_table(self.path(name))
+            else:
+                with pyarrow.ipc.open_file(self.path(name)) as reader:
+                    table = reader.read_all()
+            self.assertEqual(table.to_pylist(), [first, second])
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.fake.close()
+        self.tmp.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
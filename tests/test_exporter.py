@@ -0,0 +1,132 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import aiohttp
+
+from aiotr.exporter import PrometheusExporter, SnapshotCache
+from aiotr.metrics import MetricsRecorder, RequestRecord
+
+
+def torrent(tid, status, labels, rate, tracker="udp://t.example.org:6969/announce"):
+    return {
+        "id": tid,
+        "status": status,
+        "labels": labels,
+        "trackers": [{"announce": tracker}],
+        "rateDownload": rate,
+        "rateUpload": 0,
+    }
+
+
+class StaticDaemon:
+    daemon = "http://daemon:9091/transmission/rpc"
+
+    def __init__(self):
+        self.calls = 0
+        self.torrents = [torrent(1, 4, ["tv"], 100), torrent(2, 6, ["tv", "hd"], 0)]
+        self.removed = []
+
+    async def session_stats(self):
+        self.calls += 1
+        return {"downloadSpeed": 100, "cumulative-stats": {"uploadedBytes": 5}}
+
+    async def torrent_get(self, fields, ids=None):
+        self.calls += 1
+        if ids == "recently-active":
+            return {"torrents": self.torrents[:1], "removed": self.removed}
+        return {"torrents": self.torrents}
+
+
+class TestExporter(IsolatedAsyncioTestCase):
+    async def test_incremental(self):
+        daemon = StaticDaemon()
+        cache = SnapshotCache(daemon)
+        exporter = PrometheusExporter([cache])
+        await cache.refresh()
+        text = exporter.render()
+        self.assertIn(
+            'transmission_download_speed_bytes{daemon="%s"} 100' % daemon.daemon, text
+        )
+        self.assertIn('status="downloading"} 1', text)
+        self.assertIn('label="tv"} 2', text)
+        self.assertIn('tracker="t.example.org"} 2', text)
+        self.assertIs(exporter.render_cache(cache), exporter.render_cache(cache))
+
+        daemon.torrents[0] = torrent(1, 6, ["tv"], 0)
+        daemon.removed = [2]
+        await cache.refresh()
+        text = exporter.render()
+        self.assertIn('status="seeding"} 1', text)
+        self.assertIn('status="downloading"} 0', text)
+        self.assertNotIn('label="hd"', text)
+        self.assertEqual(set(cache.torrents), {1})
+
+    async def test_families(self):
+        first, second = StaticDaemon(), StaticDaemon()
+        second.daemon = "http://other:9091/transmission/rpc"
+        caches = [SnapshotCache(first), SnapshotCache(second)]
+        for cache in caches:
+            await cache.refresh()
+        lines = PrometheusExporter(caches).render().splitlines()
+        types = [line.split()[2] for line in lines if line.startswith("# TYPE")]
+        self.assertEqual(len(types), len(set(types)))
+        self.assertIn("# TYPE transmission_uploaded_bytes_total counter", lines)
+        self.assertIn("# TYPE transmission_label_torrents gauge", lines)
+        # the samples of a family follow its TYPE line, both daemons together
+        family = None
+        for line in lines:
+            if line.startswith("# TYPE"):
+                family = line.split()[2]
+            else:
+                self.assertEqual(line.split("{")[0], family)
+        samples = [
+            line for line in lines if line.startswith("transmission_label_torrents{")
+        ]
+        self.assertEqual(len(samples), 4)
+
+    async def test_byte_counter(self):
+        metrics = MetricsRecorder()
+        for size in (13921290, 3):
+            record = RequestRecord("http://d/transmission/rpc", "torrent-get")
+            record.response_bytes = size
+            metrics.on_request(record)
+        text = PrometheusExporter([], metrics).render_metrics()
+        # exact, not rounded to 6 significant digits
+        self.assertIn(
+            'aiotr_rpc_bytes_total{daemon="http://d/transmission/rpc",'
+            'method="torrent-get",direction="response"} 13921293\n',
+            text,
+        )
+
+    async def test_serve(self):
+        daemon = StaticDaemon()
+        cache = SnapshotCache(daemon)
+        await cache.refresh()
+        metrics = MetricsRecorder()
+        metrics.on_request(RequestRecord(daemon.daemon, "session-stats"))
+        exporter = PrometheusExporter([cache], metrics)
+        server = await exporter.serve(port=0, poll=False)
+        port = server.sockets[0].getsockname()[1]
+        calls = daemon.calls
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as resp:
+                    self.assertEqual(resp.status, 200)
+                    text = await resp.text()
+                async with session.get(f"http://127.0.0.1:{port}/") as resp:
+                    self.assertEqual(resp.status, 404)
+        finally:
+            server.close()
+            await server.wait_closed()
+        self.assertEqual(daemon.calls, calls)  # scrapes never reach the daemon
+        self.assertIn("transmission_uploaded_bytes_total", text)
+        self.assertIn('aiotr_rpc_requests_total{daemon="%s"' % daemon.daemon, text)
+        self.assertIn('le="+Inf"', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import os
+import tempfile
+import unittest
+import zlib
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import (
+    TransmissionClient,
+    TransmissionConnectException,
+    TransmissionException,
+    TransmissionMisdirectedException,
+    TransmissionUnauthorizedException,
+)
+from aiotr.fake import DOWNLOAD, SEED, STOPPED, Fault, FakeTransmission
+
+
+class TestFakeTransmission(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fake = FakeTransmission(torrents=3, files=2, rpc_version=18)
+        self.client = TransmissionClient(url=await self.fake.start())
+
+    async def test_torrents(self):
+        data = await self.client.torrent_get(["id", "files", "trackerStats"])
+        self.assertEqual([t["id"] for t in data["torrents"]], [1, 2, 3])
+        self.assertEqual(len(data["torrents"][0]["files"]), 2)
+        self.assertTrue(data["torrents"][0]["trackerStats"])
+
+        added = await self.client.torrent_add(
+            filename="magnet:?xt=urn:btih:x", paused=True
+        )
+        tid = added["torrent-added"]["id"]
+        duplicate = await self.client.torrent_add(filename="magnet:?xt=urn:btih:x")
+        self.assertEqual(duplicate["torrent-duplicate"]["id"], tid)
+        await self.client.torrent_set(ids=tid, labels=["new"])
+        await self.client.torrent_stop(ids=[1])
+        await self.client.queue_move_top(ids=tid)
+        await self.client.torrent_remove(ids=2)
+
+        data = await self.client.torrent_get(
+            ["id", "status", "labels", "queuePosition"], ids="recently-active"
+        )
+        self.assertEqual(data["removed"], [2])
+        active = {t["id"]: t for t in data["torrents"]}
+        self.assertEqual(active[tid]["labels"], ["new"])
+        self.assertEqual(active[tid]["queuePosition"], 0)
+        self.assertEqual(active[tid]["status"], STOPPED)
+        self.assertEqual(active[1]["status"], STOPPED)
+        await self.client.torrent_start(ids=1)
+        self.assertIn(self.fake.torrents[1]["status"], (DOWNLOAD, SEED))
+
+        stats = await self.client.session_stats()
+        self.assertEqual(stats["torrentCount"], 3)
+        await self.client.group_set(name="slow", speed_limit_up=10)
+        self.assertEqual((await self.client.group_get())["group"][0]["name"], "slow")
+        self.fake.free_space["/data"] = 123
+        self.assertEqual((await self.client.free_space("/data"))["size-bytes"], 123)
+
+    async def test_table_missing(self):
+        data = await self.client.rpc(
+            "torrent-get",
+            {"fields": ["id", "fileLengths", "no-such-field"], "format": "table"},
+        )
+        self.assertEqual(
+            data["torrents"],
+            [["id", "fileLengths", "no-such-field"]]
+            + [[i, None, None] for i in (1, 2, 3)],
+        )
+
+    async def test_tracker_stats_stable(self):
+        data = await self.client.torrent_get(["id", "trackerStats"], ids=[1])
+        stat, *_ = data["torrents"][0]["trackerStats"]
+        seed = zlib.crc32("1:{}".format(stat["announce"]).encode())
+        self.assertEqual(stat["seederCount"], seed % 400)
+
+    async def test_faults(self):
+        self.fake.rotate_session()
+        await self.client.session_stats()
+        self.fake.inject(Fault(result="no such torrent"), "torrent-verify")
+        with self.assertRaises(TransmissionException):
+            await self.client.torrent_verify()
+        self.fake.inject(Fault(disconnect=True))
+        with self.assertRaises(TransmissionConnectException):
+            await self.client.torrent_start()
+        self.fake.inject(Fault(disconnect=True))
+        await self.client.session_stats()  # idempotent, retried
+        self.assertEqual(self.fake.calls["session-stats"], 2)
+        self.assertEqual(self.fake.calls["torrent-start"], 0)
+
+    async def test_access(self):
+        fake = FakeTransmission(username="user", password="secret", hosts=["localhost"])
+        url = await fake.start()
+        try:
+            async with TransmissionClient("user", "wrong", url=url) as client:
+                with self.assertRaises(TransmissionUnauthorizedException):
+                    await client.session_get()
+            async with TransmissionClient("user", "secret", url=url) as client:
+                client.host = "rebind.example.org"
+                with self.assertRaises(TransmissionMisdirectedException):
+                    await client.session_get()
+            async with TransmissionClient("user", "secret", url=url) as client:
+                self.assertEqual((await client.session_get())["rpc-version"], 17)
+        finally:
+            await fake.close()
+
+    async def test_unix(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fake = FakeTransmission(torrents=1)
+            url = await fake.start(unix=os.path.join(tmpdir, "rpc.sock"))
+            try:
+                async with TransmissionClient(url=url) as client:
+                    data = await client.torrent_get(["id"])
+                self.assertEqual(data["torrents"], [{"id": 1}])
+            finally:
+                await fake.close()
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.fake.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
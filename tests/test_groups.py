@@ -0,0 +1,97 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import TransmissionClient, TransmissionException
+from aiotr.fake import FakeTransmission
+from aiotr.groups import GroupManager, sync_fleet
+
+DESIRED = {
+    "slow": {"speed_limit_up_enabled": True, "speed_limit_up": 100},
+    "fast": {"speed_limit_up_enabled": False, "honorsSessionLimits": False},
+}
+
+
+class TestGroups(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fake = FakeTransmission(torrents=4)
+        self.client = TransmissionClient(url=await self.fake.start())
+        await self.client.group_set(name="slow", speed_limit_up=50)
+
+    def posts(self, method):
+        return [
+            body
+            for post in self.fake.requests
+            for body in (post if isinstance(post, list) else [post])
+            if body["method"] == method
+        ]
+
+    async def test_group_set_keys(self):
+        await self.client.group_set(
+            name="slow", speed_limit_down_enabled=True, speed_limit_down=7
+        )
+        group = self.fake.groups["slow"]
+        self.assertTrue(group["speed-limit-down-enabled"])
+        self.assertEqual(group["speed-limit-down"], 7)
+        self.assertEqual(group["speed-limit-up"], 50)
+
+    async def test_sync(self):
+        manager = GroupManager(self.client)
+        self.assertEqual(
+            manager.diff(DESIRED), {name: dict(s) for name, s in DESIRED.items()}
+        )
+        changes = await manager.sync(DESIRED)
+        self.assertEqual(
+            changes,
+            {
+                "slow": {"speed_limit_up_enabled": True, "speed_limit_up": 100},
+                "fast": DESIRED["fast"],
+            },
+        )
+        self.assertEqual(self.fake.groups["slow"]["speed-limit-up"], 100)
+        self.assertFalse(self.fake.groups["fast"]["honorsSessionLimits"])
+        # converged: nothing to send, and the cache answers group-get
+        self.assertEqual(await manager.sync(DESIRED), {})
+        self.assertEqual(self.fake.calls["group-get"], 1)
+        self.assertEqual(self.fake.calls["group-set"], 3)
+        # drift on the daemon is found once the cache expires
+        self.fake.groups["fast"]["speed-limit-up-enabled"] = True
+        changes = await manager.sync(DESIRED, force=True)
+        self.assertEqual(changes, {"fast": {"speed_limit_up_enabled": False}})
+        self.assertEqual(
+            self.posts("group-set")[-1]["arguments"],
+            {"name": "fast", "speed-limit-up-enabled": False},
+        )
+        with self.assertRaises(ValueError):
+            manager.diff({"slow": {"speedlimit-down": 1}})
+
+    async def test_sync_failure(self):
+        manager = GroupManager(self.client)
+        del self.fake.handlers["group-set"]
+        (result,) = await sync_fleet([manager], DESIRED)
+        self.assertIsInstance(result, TransmissionException)
+        self.assertIsNone(manager.fetched)
+
+    async def test_assign(self):
+        manager = GroupManager(self.client)
+        self.fake.torrents[4]["group"] = "fast"
+        moved = await manager.assign({1: "slow", 2: "slow", 3: "fast", 4: "fast"})
+        self.assertEqual(moved, {"slow": [1, 2], "fast": [3]})
+        self.assertEqual(
+            [t["group"] for t in self.fake.torrents.values()],
+            ["slow", "slow", "fast", "fast"],
+        )
+        self.assertEqual(self.fake.calls["torrent-set"], 2)
+        self.assertEqual(await manager.assign({1: "slow", 2: "slow"}), {})
+        self.assertEqual(self.fake.calls["torrent-set"], 2)
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.fake.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
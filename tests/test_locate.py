@@ -0,0 +1,166 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import hashlib
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import TransmissionClient, TransmissionException
+from aiotr.fake import FakeTransmission
+from aiotr.locate import Metainfo, bdecode, bencode, match_locations, relocate
+
+PIECE = 16 * 1024
+
+
+def make_torrent(root: str, name: str, files: dict, padding=()) -> bytes:
+    """
+    Write ``files`` (relative path -> content) under ``root/name`` and return
+    the metainfo describing them. Paths in ``padding`` are BEP 47 padding files,
+    zeros that are not written.
+    """
+    data = b""
+    entries = []
+    for path, content in files.items():
+        entry = {"length": len(content), "path": path.split("/")}
+        if path in padding:
+            entry["attr"] = "p"
+        else:
+            full = os.path.join(root, name, path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, "wb") as f:
+                f.write(content)
+        data += content
+        entries.append(entry)
+    pieces = b"".join(
+        hashlib.sha1(data[i : i + PIECE]).digest() for i in range(0, len(data), PIECE)
+    )
+    info = {"name": name, "piece length": PIECE, "pieces": pieces, "files": entries}
+    return bencode({"announce": "http://tracker.example.org/announce", "info": info})
+
+
+class TestLocate(IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.executor = ProcessPoolExecutor(2)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.executor.shutdown()
+
+    async def asyncSetUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = {
+            "a.bin": os.urandom(PIECE * 3 + 100),
+            "sub/b.bin": os.urandom(PIECE // 2),
+            "empty": b"",
+            "c.bin": os.urandom(PIECE * 2 + 7),
+        }
+        self.good = os.path.join(self.root, "good")
+        self.torrent = make_torrent(self.good, "show", self.content)
+        # same layout but one file rewritten, and a directory with nothing at all
+        self.stale = os.path.join(self.root, "stale")
+        changed = dict(self.content, **{"c.bin": os.urandom(PIECE * 2 + 7)})
+        make_torrent(self.stale, "show", changed)
+        self.missing = os.path.join(self.root, "missing")
+        self.fake = FakeTransmission(torrents=1)
+        self.url = await self.fake.start()
+
+    def test_bencode(self):
+        value = {"b": [1, -2, b"x"], "a": {"k": b""}}
+        self.assertEqual(bencode(value), b"d1:ad1:k0:e1:bli1ei-2e1:xee")
+        self.assertEqual(bdecode(bencode(value)), value)
+        with self.assertRaises(ValueError):
+            bdecode(b"i1ee")
+        with self.assertRaises(ValueError):
+            bdecode(b"5:ab")
+
+    def test_metainfo(self):
+        meta = Metainfo.parse(self.torrent)
+        self.assertEqual(meta.name, "show")
+        self.assertEqual(meta.total_size, sum(map(len, self.content.values())))
+        self.assertEqual(meta.piece_count, -(-meta.total_size // PIECE))
+        self.assertIn((os.path.join("show", "sub", "b.bin"), PIECE // 2), meta.files)
+        sample = meta.sample(3)
+        self.assertEqual(len(sample), 3)
+        self.assertEqual(sample[-1], meta.piece_count - 1)
+        single = bencode(
+            {
+                "info": {
+                    "name": "x",
+                    "length": 5,
+                    "piece length": PIECE,
+                    "pieces": b"0" * 20,
+                }
+            }
+        )
+        self.assertEqual(Metainfo.parse(single).files, (("x", 5),))
+        v2 = bencode({"info": {"name": "x", "piece length": PIECE, "meta version": 2}})
+        with self.assertRaisesRegex(ValueError, "v2-only"):
+            Metainfo.parse(v2)
+
+    async def test_padding(self):
+        content = {
+            "a.bin": os.urandom(PIECE + 100),
+            ".pad/16284": bytes(PIECE - 100),
+            "b.bin": os.urandom(PIECE * 2),
+        }
+        location = os.path.join(self.root, "padded")
+        meta = Metainfo.parse(
+            make_torrent(location, "show", content, padding={".pad/16284"})
+        )
+        self.assertEqual(meta.padding, {1})
+        (match,) = await match_locations(meta, [location], executor=self.executor)
+        self.assertEqual(match.score, 1.0)
+        self.assertEqual(match.present, meta.total_size)
+        # padding alone does not make a candidate worth hashing
+        (match,) = await match_locations(meta, [self.missing], executor=self.executor)
+        self.assertEqual(match.score, 0.0)
+
+    async def test_match(self):
+        meta = Metainfo.parse(self.torrent)
+        matches = await match_locations(
+            meta, [self.missing, self.stale, self.good], executor=self.executor, chunk=2
+        )
+        self.assertEqual(
+            [m.location for m in matches], [self.good, self.stale, self.missing]
+        )
+        self.assertEqual(matches[0].score, 1.0)
+        self.assertTrue(0 < matches[1].score < 1)
+        self.assertEqual(matches[2].score, 0.0)
+        self.assertEqual(matches[2].present, 0)
+
+    async def test_relocate(self):
+        (tid,) = self.fake.torrents
+        async with TransmissionClient(url=self.url) as client:
+            match = await relocate(
+                client,
+                tid,
+                self.torrent,
+                [self.missing, self.stale, self.good],
+                executor=self.executor,
+            )
+            self.assertEqual(match.location, self.good)
+            (body,) = [
+                b for b in self.fake.requests if b["method"] == "torrent-set-location"
+            ]
+            self.assertEqual(
+                body["arguments"],
+                {"location": self.good, "ids": [tid], "move": False},
+            )
+            with self.assertRaises(TransmissionException):
+                await relocate(
+                    client, tid, self.torrent, [self.missing], executor=self.executor
+                )
+
+    async def asyncTearDown(self) -> None:
+        await self.fake.close()
+        self.tmp.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import json
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from aiohttp import web
+
+from aiotr import TransmissionClient, TransmissionException
+from aiotr.metrics import Histogram, MetricsRecorder
+
+
+async def handle_rpc(request: web.Request) -> web.Response:
+    if request.headers.get("X-Transmission-Session-Id") != "metrics":
+        return web.Response(
+            status=409, headers={"X-Transmission-Session-Id": "metrics"}
+        )
+    data = json.loads(await request.read())
+    if data["method"] == "session-close":
+        return web.json_response({"result": "not allowed", "tag": data["tag"]})
+    return web.json_response({"result": "success", "arguments": {}, "tag": data["tag"]})
+
+
+class TestHistogram(unittest.TestCase):
+    def test_quantile(self):
+        histogram = Histogram((1, 2, 4, 8))
+        for value in (0.5, 1.5, 3, 3, 7, 100):
+            histogram.observe(value)
+        self.assertEqual(list(histogram.counts), [1, 1, 2, 1, 1])
+        self.assertEqual(histogram.quantile(0.5), 4)
+        self.assertEqual(histogram.quantile(1.0), float("inf"))
+        self.assertAlmostEqual(histogram.mean, 115 / 6)
+
+
+class TestMetrics(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        app = web.Application()
+        app.router.add_post("/transmission/rpc", handle_rpc)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, "127.0.0.1", 0).start()
+        self.daemon = "http://127.0.0.1:{}/transmission/rpc".format(
+            self.runner.addresses[0][1]
+        )
+
+    async def test_record(self):
+        metrics = MetricsRecorder(trace=True)
+        async with TransmissionClient(
+            "user", "secret", url=self.daemon, metrics=metrics
+        ) as client:
+            await client.session_stats()
+            await client.session_stats()
+            with self.assertRaises(TransmissionException):
+                await client.session_close()
+        self.assertEqual(metrics.results[(self.daemon, "session-stats", "success")], 2)
+        self.assertEqual(
+            metrics.results[(self.daemon, "session-close", "TransmissionException")], 1
+        )
+        self.assertEqual(metrics.retries[(self.daemon, "session-stats")], 1)
+        self.assertEqual(
+            metrics.latency[(self.daemon, "session-stats", "wire")].count, 2
+        )
+        self.assertGreater(
+            metrics.size[(self.daemon, "session-stats", "response")].sum, 0
+        )
+        self.assertEqual(metrics.connections[(self.daemon, "created")], 1)
+        self.assertEqual(metrics.connections[(self.daemon, "reused")], 2)
+
+    async def asyncTearDown(self) -> None:
+        await self.runner.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
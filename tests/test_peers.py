@@ -0,0 +1,94 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import unittest
+from collections import Counter
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import TransmissionClient
+from aiotr import peers as peers_module
+from aiotr.fake import FakeTransmission
+from aiotr.peers import PeerCollector, PeerTable, pack_address, unpack_address
+
+
+class TestPeers(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fake = FakeTransmission(torrents=12)
+        self.fake.torrents[1]["peersConnected"] = 0
+        self.client = TransmissionClient(url=await self.fake.start())
+
+    async def expected(self):
+        data = await self.client.torrent_get(["id", "peers"])
+        return [p for t in data["torrents"] for p in t["peers"]]
+
+    def test_address(self):
+        for address in ("10.1.2.3", "2001:db8::1", "::ffff:10.0.0.1"):
+            packed = pack_address(address)
+            self.assertEqual(len(packed), 16)
+        self.assertEqual(unpack_address(pack_address("10.1.2.3")), "10.1.2.3")
+        self.assertEqual(unpack_address(pack_address("2001:db8::1")), "2001:db8::1")
+
+    async def test_collect(self):
+        table = await PeerCollector(self.client, chunk=3).collect()
+        peers = await self.expected()
+        active = [t for t in self.fake.torrents.values() if t["peersConnected"]]
+        # one listing, then one torrent-get per chunk of active torrents
+        self.assertEqual(self.fake.calls["torrent-get"], 2 + -(-len(active) // 3))
+        self.assertEqual(len(table), len(peers))
+        self.assertEqual(table.row(0)["address"], peers[0]["address"])
+        self.assertEqual(table.row(0)["clientName"], peers[0]["clientName"])
+        self.assertLess(table.nbytes(), 64 * len(peers))
+        names = Counter(p["clientName"] for p in peers)
+        nets = Counter(p["address"].rsplit(".", 1)[0] + ".0/24" for p in peers)
+        self.addCleanup(setattr, peers_module, "np", peers_module.np)
+        for numpy in (peers_module.np, None):
+            peers_module.np = numpy
+            with self.subTest(numpy=numpy is not None):
+                self.assertEqual(
+                    dict(table.top_clients(100)), dict(names.most_common())
+                )
+                self.assertAlmostEqual(
+                    table.encrypted_ratio(),
+                    sum(p["isEncrypted"] for p in peers) / len(peers),
+                )
+                incoming = sum(p["isIncoming"] for p in peers)
+                self.assertEqual(
+                    table.directions(),
+                    {"incoming": incoming, "outgoing": len(peers) - incoming},
+                )
+                self.assertEqual(
+                    dict((n, c) for n, c, _ in table.subnets(24, n=1000)),
+                    dict(nets),
+                )
+                self.assertEqual(
+                    table.client_rates()[peers[0]["clientName"]][0],
+                    sum(
+                        p["rateToClient"]
+                        for p in peers
+                        if p["clientName"] == peers[0]["clientName"]
+                    ),
+                )
+
+    def test_ipv6(self):
+        table = PeerTable()
+        table.extend(
+            1,
+            [
+                {"address": "2001:db8:1::5", "port": 1, "clientName": "x"},
+                {"address": "2001:db8:1::6", "port": 2, "clientName": "x"},
+                {"address": "10.0.0.1", "port": 3, "clientName": "y"},
+            ],
+        )
+        self.assertEqual(
+            table.subnets(),
+            [("2001:db8:1::/48", 2, 2 / 3), ("10.0.0.0/24", 1, 1 / 3)],
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.fake.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import contextlib
+import unittest
+from unittest import IsolatedAsyncioTestCase, mock
+
+from aiotr import TransmissionClient
+from aiotr.fake import SEED, STOPPED, FakeTransmission
+from aiotr.policy import DAY, GIB, Field, FreeSpace, Now, Policy, Rule, Snapshot
+
+RULES = [
+    Rule(
+        "ratio",
+        (Field("uploadRatio") > 2) & (Field("secondsSeeding") > 7 * DAY),
+        "remove",
+        {"delete_local_data": True},
+    ),
+    Rule("idle", Now() - Field("activityDate") > 30 * DAY, "stop"),
+    Rule("tv", Field("labels").contains("tv"), "set", {"uploadLimit": 200}),
+    Rule("tv-on", Field("labels").contains("tv"), "set", {"uploadLimited": True}),
+    Rule("disk", FreeSpace() < 10 * GIB, "stop"),
+]
+
+
+class TestPolicy(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fake = FakeTransmission()
+        add = self.fake.add_synthetic
+        now = Now().evaluate(Snapshot({"id": []}))
+        add("seeded", uploadRatio=3.0, secondsSeeding=30 * DAY, labels=["tv"])
+        add("idle", uploadRatio=0.5, activityDate=now - 60 * DAY, labels=[])
+        add("tv", uploadRatio=0.5, activityDate=now, labels=["tv", "music"])
+        add("full", uploadRatio=0.1, activityDate=now, labels=[], downloadDir="/full")
+        add("fine", uploadRatio=1.0, activityDate=now, labels=["books"], status=SEED)
+        self.fake.free_space["/full"] = GIB
+        self.url = await self.fake.start()
+
+    def names(self, ids):
+        return sorted(self.fake.torrents[i]["name"] for i in ids)
+
+    async def test_plan(self):
+        policy = Policy(RULES)
+        self.assertEqual(
+            policy.fields,
+            [
+                "activityDate",
+                "downloadDir",
+                "id",
+                "labels",
+                "secondsSeeding",
+                "uploadRatio",
+            ],
+        )
+        async with TransmissionClient(url=self.url) as client:
+            report = await policy.run(client, dry_run=True)
+        self.assertEqual(report.torrents, 5)
+        self.assertEqual(
+            report.matched, {"ratio": 1, "idle": 1, "tv": 2, "tv-on": 2, "disk": 1}
+        )
+        actions = {(a.method, tuple(a.arguments.items())): a for a in report.actions}
+        self.assertEqual(len(actions), 3)
+        remove = actions[("torrent_remove", (("delete_local_data", True),))]
+        self.assertEqual(self.names(remove.ids), ["seeded"])
+        stop = actions[("torrent_stop", ())]
+        self.assertEqual(self.names(stop.ids), ["full", "idle"])
+        self.assertEqual(stop.rules, ("idle", "disk"))
+        # the removed torrent gets no limits, both set rules merge into one call
+        limit = actions[
+            ("torrent_set", (("uploadLimit", 200), ("uploadLimited", True)))
+        ]
+        self.assertEqual(self.names(limit.ids), ["tv"])
+        self.assertEqual(set(report.timings), {"fetch", "free_space", "evaluate"})
+        self.assertIn("[dry run]", report.format())
+        # one torrent-get in table format and one free-space per distinct dir
+        self.assertEqual(self.fake.calls["torrent-get"], 1)
+        self.assertEqual(self.fake.calls["free-space"], 2)
+        self.assertFalse(self.fake.calls["torrent-stop"])
+
+    async def test_apply(self):
+        policy = Policy(RULES)
+        other = FakeTransmission(torrents=3)
+        async with TransmissionClient(url=self.url) as client, TransmissionClient(
+            url=await other.start()
+        ) as second:
+            report, again = await policy.run_fleet([client, second])
+        await other.close()
+        self.assertFalse(report.errors)
+        self.assertEqual(again.torrents, 3)
+        self.assertEqual(self.names(self.fake.torrents), ["fine", "full", "idle", "tv"])
+        by_name = {t["name"]: t for t in self.fake.torrents.values()}
+        self.assertEqual(by_name["idle"]["status"], STOPPED)
+        self.assertEqual(by_name["tv"]["uploadLimit"], 200)
+        self.assertTrue(by_name["tv"]["uploadLimited"])
+        self.assertIn("apply", report.timings)
+
+    async def test_missing_field(self):
+        policy = Policy(
+            [
+                Rule("new", Field("noSuchField") > 0, "stop"),
+                Rule("ratio", Field("uploadRatio") > 2, "stop"),
+            ]
+        )
+        # left out of objects, null cells in table format
+        for negotiate in (False, True):
+            with self.subTest(negotiate=negotiate):
+                async with TransmissionClient(
+                    url=self.url, negotiate=negotiate
+                ) as client:
+                    report = await policy.run(client, dry_run=True)
+                self.assertEqual(report.matched, {"new": 0, "ratio": 1})
+
+    def test_null_cells(self):
+        snapshot = Snapshot(
+            {"id": [1, 2, 3], "uploadRatio": [3.0, None, 1.0], "labels": [[], None, []]}
+        )
+        when = (Field("uploadRatio") > 2) | (Field("uploadRatio") * 2 < 3)
+        policy = Policy([Rule("r", when & ~Field("labels").contains("tv"), "stop")])
+        for pure in (False, True):
+            with self.subTest(pure=pure), contextlib.ExitStack() as stack:
+                if pure:
+                    stack.enter_context(mock.patch("aiotr.policy.np", None))
+                actions, matched = policy.plan(Snapshot(snapshot.raw))
+                self.assertEqual(matched, {"r": 2})
+                self.assertEqual(actions[0].ids, [1, 3])
+
+    def test_unknown_action(self):
+        with self.assertRaises(ValueError):
+            Policy([Rule("x", Field("id") > 0, "delete")])
+        with self.assertRaises(TypeError):
+            Field("id") > 0 and Field("id") < 5
+
+    async def asyncTearDown(self) -> None:
+        await self.fake.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
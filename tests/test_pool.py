@@ -0,0 +1,73 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import TransmissionClient
+from aiotr.exporter import PrometheusExporter
+from aiotr.fake import FakeTransmission
+from aiotr.metrics import MetricsRecorder
+from aiotr.pool import PoolSettings
+from aiotr.retry import CircuitBreaker
+
+
+class TestPool(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fake = FakeTransmission()
+        self.url = await self.fake.start()
+
+    async def test_prewarm_reuse(self):
+        metrics = MetricsRecorder(trace=True)
+        pool = PoolSettings(limit_per_host=4, prewarm=4)
+        async with TransmissionClient(
+            url=self.url, pool=pool, metrics=metrics
+        ) as client:
+            self.assertEqual(metrics.connections[(client.daemon, "created")], 4)
+            await asyncio.gather(*(client.session_stats() for _ in range(8)))
+        self.assertEqual(metrics.connections[(client.daemon, "created")], 4)
+        self.assertEqual(metrics.connections[(client.daemon, "reused")], 8)
+        text = PrometheusExporter([], metrics).render_metrics()
+        self.assertIn(
+            'aiotr_connections_total{daemon="%s",state="reused"} 8' % client.daemon,
+            text,
+        )
+
+    async def test_idle_check(self):
+        pool = PoolSettings(idle_check=0.05)
+        async with TransmissionClient(url=self.url, pool=pool) as client:
+            await client.session_stats()
+            await asyncio.sleep(0.2)
+            self.assertGreaterEqual(self.fake.calls["session-get"], 2)
+        self.assertIsNone(client._idle_task)
+
+    async def test_idle_check_breaker_open(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=1.0)
+        breaker.failure()
+        pool = PoolSettings(idle_check=0.05)
+        async with TransmissionClient(
+            url=self.url, pool=pool, breaker=breaker
+        ) as client:
+            client.client_session  # starts the idle checker
+            # failing pings must not keep the loop busy until the breaker resets
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await asyncio.sleep(0.2)
+            self.assertLess(loop.time() - start, 0.5)
+            self.assertEqual(breaker.state, "open")
+        self.assertEqual(self.fake.calls["session-get"], 0)
+
+    async def test_force_close(self):
+        pool = PoolSettings(limit=1, force_close=True)
+        async with TransmissionClient(url=self.url, pool=pool) as client:
+            await asyncio.gather(client.session_stats(), client.session_stats())
+            self.assertEqual(client.client_session.connector.limit, 1)
+
+    async def asyncTearDown(self) -> None:
+        await self.fake.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import (
+    TransmissionCircuitOpenException,
+    TransmissionClient,
+    TransmissionConnectException,
+    TransmissionException,
+    TransmissionTimeoutException,
+)
+from aiotr.fake import Fault, FakeTransmission
+from aiotr.retry import NO_RETRY, CircuitBreaker, RetryPolicy
+
+
+class TestPolicy(unittest.TestCase):
+    def test_backoff(self):
+        policy = RetryPolicy(base=0.1, cap=1.0, jitter=0.5)
+        for retry, ceiling in ((0, 0.1), (2, 0.4), (10, 1.0)):
+            delay = policy.backoff(retry)
+            self.assertTrue(ceiling / 2 <= delay <= ceiling, (retry, delay))
+        self.assertTrue(policy.retryable(["torrent-get", "session-stats"]))
+        self.assertFalse(policy.retryable(["torrent-get", "torrent-add"]))
+        self.assertFalse(NO_RETRY.retryable(["torrent-get"]))
+
+
+class TestRetry(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fake = FakeTransmission(torrents=1)
+        self.url = await self.fake.start()
+
+    async def test_retry_idempotent(self):
+        policy = RetryPolicy(attempts=3, base=0.001)
+        async with TransmissionClient(url=self.url, retry=policy) as client:
+            self.fake.inject(Fault(disconnect=True), "torrent-get", times=2)
+            data = await client.torrent_get(["id"])
+            self.assertEqual(data["torrents"], [{"id": 1}])
+            self.fake.inject(Fault(disconnect=True), "torrent-get", times=3)
+            with self.assertRaises(TransmissionConnectException):
+                await client.torrent_get(["id"])
+            self.fake.inject(Fault(disconnect=True), "torrent-add")
+            with self.assertRaises(TransmissionConnectException):
+                await client.torrent_add(filename="magnet:?xt=urn:btih:1")
+            await client.torrent_add(filename="magnet:?xt=urn:btih:1")
+        self.assertEqual(len(self.fake.torrents), 2)
+
+    async def test_timeout(self):
+        self.fake.inject(Fault(delay=0.5))
+        async with TransmissionClient(
+            url=self.url, timeout=0.1, retry=NO_RETRY
+        ) as client:
+            with self.assertRaises(TransmissionTimeoutException):
+                await client.session_stats()
+
+    async def test_session_bounded(self):
+        self.fake.inject(Fault(status=409), times=10)
+        async with TransmissionClient(
+            url=self.url, retry=RetryPolicy(session_retries=2)
+        ) as client:
+            with self.assertRaises(TransmissionException):
+                await client.session_stats()
+        self.assertEqual(len(self.fake.faults[None]), 8)  # first 409 is the handshake
+
+    async def test_breaker(self):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=0.1)
+        async with TransmissionClient(
+            url=self.url, retry=NO_RETRY, breaker=breaker
+        ) as client:
+            await client.session_stats()
+            self.fake.inject(Fault(disconnect=True), times=2)
+            for _ in range(2):
+                with self.assertRaises(TransmissionConnectException):
+                    await client.session_stats()
+            sent = len(self.fake.requests)
+            with self.assertRaises(TransmissionCircuitOpenException):
+                await client.session_stats()
+            self.assertEqual(len(self.fake.requests), sent)
+            self.assertEqual(breaker.state, "open")
+            await asyncio.sleep(0.1)
+            await client.session_stats()
+            self.assertEqual(breaker.state, "closed")
+
+    async def asyncTearDown(self) -> None:
+        await self.fake.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
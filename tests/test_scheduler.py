@@ -0,0 +1,119 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import asyncio
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import TransmissionClient, TransmissionTimeoutException
+from aiotr.deadline import deadline
+from aiotr.fake import FakeTransmission
+from aiotr.metrics import MetricsRecorder
+from aiotr.scheduler import DEFAULT_LANES, LaneSettings, Scheduler, priority
+
+
+class TestScheduler(IsolatedAsyncioTestCase):
+    async def run_queue(self, scheduler, lanes):
+        """
+        Queue one request per entry of ``lanes`` behind a held slot, return the
+        order in which they are admitted
+        """
+        order = []
+
+        async def request(i, lane):
+            await scheduler.acquire(lane)
+            order.append(i)
+            await asyncio.sleep(0)
+            scheduler.release()
+
+        await scheduler.acquire("default")
+        tasks = [
+            asyncio.ensure_future(request(i, lane)) for i, lane in enumerate(lanes)
+        ]
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    async def test_weighted(self):
+        scheduler = Scheduler(concurrency=1)
+        lanes = ["background"] * 10 + ["interactive"] * 10
+        order = await self.run_queue(scheduler, lanes)
+        first = [lanes[i] for i in order[:9]]
+        self.assertEqual(first.count("interactive"), 8)
+        self.assertEqual(first.count("background"), 1)
+        self.assertEqual(scheduler.active, 0)
+
+    async def test_starvation(self):
+        scheduler = Scheduler(concurrency=1, max_wait=0.0)
+        lanes = ["background"] * 3 + ["interactive"] * 3
+        order = await self.run_queue(scheduler, lanes)
+        self.assertEqual(order, [0, 1, 2, 3, 4, 5])  # oldest first
+
+    async def test_rate_limit(self):
+        lanes = DEFAULT_LANES + (LaneSettings("sweep", rate=50.0, burst=1.0),)
+        scheduler = Scheduler(lanes=lanes)
+        start = time.monotonic()
+        for _ in range(4):
+            await scheduler.acquire("sweep")
+            scheduler.release()
+        self.assertGreaterEqual(time.monotonic() - start, 0.055)
+        with self.assertRaises(ValueError):
+            await scheduler.acquire("nope")
+
+
+class TestClientScheduler(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fake = FakeTransmission(torrents=2, latency=0.01)
+        self.scheduler = Scheduler(concurrency=1)
+        self.client = TransmissionClient(
+            url=await self.fake.start(), scheduler=self.scheduler
+        )
+        await self.client.session_stats()
+
+    async def test_interactive_first(self):
+        async def sweep():
+            with priority("background"):
+                await self.client.torrent_verify()
+
+        sweeps = [asyncio.ensure_future(sweep()) for _ in range(4)]
+        await asyncio.sleep(0.005)  # the first sweep is in flight
+        await self.client.torrent_get(["id"], ids=1, priority="interactive")
+        await asyncio.gather(*sweeps)
+        methods = [r["method"] for r in self.fake.requests][1:]
+        self.assertEqual(methods.index("torrent-get"), 1)
+        self.assertEqual(self.scheduler.admitted["background"], 4)
+
+    async def test_schedule_phase(self):
+        metrics = MetricsRecorder()
+        self.client.metrics = metrics
+        # the background lane holds the only slot for 4 x 10ms
+        sweeps = [
+            asyncio.ensure_future(self.client.torrent_verify(priority="background"))
+            for _ in range(4)
+        ]
+        await asyncio.gather(*sweeps)
+        waited = metrics.latency[(self.client.daemon, "torrent-verify", "schedule")]
+        self.assertEqual(waited.count, 4)
+        # the last sweep queued behind the other three
+        self.assertGreaterEqual(waited.sum, 0.05)
+        self.assertLess(waited.quantile(0.25), 0.005)
+
+    async def test_deadline_in_queue(self):
+        sweep = asyncio.ensure_future(self.client.torrent_verify())
+        await asyncio.sleep(0)
+        with deadline(0.001):
+            with self.assertRaises(TransmissionTimeoutException):
+                await self.client.torrent_get(["id"])
+        await sweep
+        self.assertEqual(self.scheduler.active, 0)
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.fake.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
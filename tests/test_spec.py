@@ -0,0 +1,46 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import inspect
+import unittest
+
+from aiotr import TransmissionClient
+from aiotr.spec import CALL_OPTIONS, METHODS, build_arguments
+
+
+class TestSpec(unittest.TestCase):
+    def test_falsy_values_kept(self):
+        self.assertEqual(
+            build_arguments(
+                "torrent-set", ids=[1], downloadLimited=False, queuePosition=0
+            ),
+            {"downloadLimited": False, "ids": [1], "queuePosition": 0},
+        )
+        self.assertEqual(
+            build_arguments("torrent-add", paused=False), {"paused": False}
+        )
+        self.assertEqual(build_arguments("session-stats"), {})
+
+    def test_keys(self):
+        self.assertEqual(
+            build_arguments("session-set", alt_speed_down=10, seedRatioLimit=1.5),
+            {"alt-speed-down": 10, "seedRatioLimit": 1.5},
+        )
+        self.assertEqual(
+            build_arguments("torrent-get", fields=["id"]), {"fields": ["id"]}
+        )
+        self.assertRaises(TypeError, build_arguments, "torrent-get")
+
+    def test_methods(self):
+        for spec in METHODS:
+            method = getattr(TransmissionClient, spec.name)
+            self.assertTrue(inspect.iscoroutinefunction(method))
+            self.assertEqual(
+                list(inspect.signature(method).parameters)[1:],
+                [arg.name for arg in spec.args] + list(CALL_OPTIONS),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import inspect
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from aiotr import TransmissionException
+from aiotr.fake import FakeTransmission
+from aiotr.metrics import MetricsRecorder
+from aiotr.sync import LoopThread, SyncTransmissionClient, shared_loop
+
+
+class TestSync(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        # the fake daemon gets a loop of its own
+        cls.daemon_loop = LoopThread("fake-daemon")
+        cls.fake = FakeTransmission(torrents=5)
+        cls.url = cls.daemon_loop.run(cls.fake.start())
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.daemon_loop.run(cls.fake.close())
+        cls.daemon_loop.stop()
+
+    def test_calls(self):
+        with SyncTransmissionClient(url=self.url) as client:
+            self.assertIs(client.loop, shared_loop())
+            data = client.torrent_get(["id", "name"], ids=[1], timeout=5)
+            self.assertEqual(data["torrents"][0]["id"], 1)
+            self.assertIn("ids", inspect.signature(client.torrent_get).parameters)
+            self.assertEqual(
+                client.torrent_get.__doc__, client.client.torrent_get.__doc__
+            )
+            future = client.submit("session_stats")
+            self.assertEqual(future.result(5)["torrentCount"], 5)
+            with self.assertRaises(TransmissionException):
+                client.rpc("no-such-method", {})
+
+    def test_threads(self):
+        metrics = MetricsRecorder(trace=True)
+        client = SyncTransmissionClient(url=self.url, metrics=metrics)
+        calls = self.fake.calls["session-stats"]
+        with ThreadPoolExecutor(16) as pool:
+            results = list(
+                pool.map(lambda _: client.session_stats()["torrentCount"], range(200))
+            )
+        client.close()
+        self.assertEqual(results, [5] * 200)
+        self.assertEqual(self.fake.calls["session-stats"] - calls, 200)
+        # one session-id handshake and pooled connections for every thread
+        created = metrics.connections[(client.daemon, "created")]
+        self.assertLessEqual(created, 16)
+        self.assertGreater(metrics.connections[(client.daemon, "reused")], 150)
+
+    def test_loop_thread_guard(self):
+        client = SyncTransmissionClient(url=self.url)
+
+        async def inside():
+            return client.session_stats()
+
+        with self.assertRaises(RuntimeError):
+            client.loop.run(inside())
+        client.close()
+        self.assertNotEqual(threading.current_thread(), client.loop.thread)
+
+
+if __name__ == "__main__":
+    unittest.main()
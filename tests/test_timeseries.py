@@ -0,0 +1,80 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import unittest
+
+from aiotr.timeseries import RateRecorder, RingBuffer, TieredSeries
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_wraparound(self):
+        ring = RingBuffer(4)
+        for value in range(1, 7):
+            ring.append(value)
+        self.assertEqual(len(ring), 4)
+        self.assertEqual(list(ring.window()), [3, 4, 5, 6])
+        self.assertEqual(list(ring.window(2)), [5, 6])
+        self.assertEqual(ring.last(), 6)
+        self.assertEqual(ring.mean(), 4.5)
+
+    def test_aggregates(self):
+        ring = RingBuffer(8)
+        for value in (10, 20, 30, 40):
+            ring.append(value)
+        self.assertAlmostEqual(ring.percentile(50), 25)
+        self.assertAlmostEqual(ring.percentile(100), 40)
+        self.assertAlmostEqual(ring.ewma(1.0), 40)
+        self.assertAlmostEqual(ring.ewma(0.0), 25)
+        self.assertAlmostEqual(ring.ewma(0.5), (40 + 15 + 5 + 1.25) / 1.875)
+        self.assertEqual(RingBuffer(2).mean(), 0.0)
+
+
+class TestTieredSeries(unittest.TestCase):
+    def test_downsample(self):
+        series = TieredSeries(10, factors=(2, 3))
+        for value in range(12):
+            series.append(value)
+        self.assertEqual(list(series[0].window()), list(range(2, 12)))
+        self.assertEqual(list(series[1].window()), [0.5, 2.5, 4.5, 6.5, 8.5, 10.5])
+        self.assertEqual(list(series[2].window()), [2.5, 8.5])
+
+
+class TestRateRecorder(unittest.TestCase):
+    def test_record(self):
+        recorder = RateRecorder(None, capacity=4, factors=(2,))
+        recorder.record(
+            {"downloadSpeed": 100},
+            [{"id": 1, "rateDownload": 100}, {"id": 2, "rateDownload": 50}],
+        )
+        recorder.record({"downloadSpeed": 300}, [{"id": 1, "rateDownload": 300}], [])
+        recorder.record({}, [], removed=[2])
+        self.assertEqual(
+            list(recorder.session["downloadSpeed"][0].window()), [100, 300, 0]
+        )
+        self.assertEqual(
+            list(recorder.torrents[1]["rateDownload"][0].window()), [100, 300, 0]
+        )
+        self.assertEqual(list(recorder.torrents[1]["rateDownload"][1].window()), [200])
+        self.assertNotIn(2, recorder.torrents)
+        self.assertIsNone(recorder.eta(1, 1000, alpha=1.0))
+        self.assertAlmostEqual(recorder.eta(1, 1000, alpha=1.0, tier=1), 5.0)
+        # uploadSpeed and rateUpload only saw zeros, their rings are not allocated
+        self.assertEqual(recorder.memory(), (5, 6 * 8 * 4))
+        self.assertEqual(list(recorder.torrents[1]["rateUpload"][0].window()), [0] * 3)
+
+    def test_idle_torrents(self):
+        recorder = RateRecorder(None, capacity=4, factors=(2,))
+        recorder.record({}, [{"id": i, "rateDownload": 0} for i in range(100)])
+        recorder.record({}, [{"id": 7, "rateDownload": 10}])
+        # both tiers of the sample times and of torrent 7's download rate
+        self.assertEqual(recorder.memory(), (203, 4 * 8 * 4))
+        series = recorder.torrents[7]["rateDownload"][0]
+        self.assertEqual(list(series.window()), [0, 10])
+        self.assertEqual(series.last(), 10)
+        idle = recorder.torrents[8]["rateDownload"][0]
+        self.assertEqual((idle.last(), idle.mean(), idle.percentile(50)), (0, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Copyright (c) 2008-2024 synodriver <synodriver@gmail.com>
+"""
+
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from aiotr import TransmissionClient
+from aiotr.fake import TRACKERS, FakeTransmission
+from aiotr.trackers import TrackerIndex
+
+DEAD = "tracker.example.org"
+
+
+class TestTrackers(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fake = FakeTransmission(torrents=20)
+        self.client = TransmissionClient(url=await self.fake.start())
+        self.index = TrackerIndex(self.client, full_every=100)
+
+    def announcing(self, host):
+        return sorted(
+            t["id"]
+            for t in self.fake.torrents.values()
+            if any(host in url for url in t["trackerUrls"])
+        )
+
+    async def test_index(self):
+        await self.index.refresh()
+        self.assertEqual(
+            set(self.index.hosts), {url.split("/")[2].split(":")[0] for url in TRACKERS}
+        )
+        self.assertEqual(sorted(self.index.torrents[DEAD]), self.announcing(DEAD))
+        health = self.index.hosts[DEAD]
+        self.assertEqual(health.trackers, len(self.announcing(DEAD)))
+        self.assertEqual(health.failing, 0)
+        self.assertEqual(health.last_result, "Success")
+        self.assertEqual(self.index.failing(), [])
+
+        # only recently-active torrents are read after the first sync
+        self.fake.tracker_errors[DEAD] = "Connection refused"
+        changed = self.announcing(DEAD)[:2]
+        for tid in changed:
+            self.fake.torrents[tid]["activityDate"] = int(time.time()) + 1
+            self.fake.touch(self.fake.torrents[tid])
+        removed = self.announcing(DEAD)[-1]
+        await self.client.torrent_remove(ids=[removed])
+        await self.index.refresh()
+        body = self.fake.requests[-1]
+        self.assertEqual(body["arguments"]["ids"], "recently-active")
+        self.assertEqual(health.failing, 2)
+        self.assertEqual(health.last_result, "Connection refused")
+        self.assertNotIn(removed, self.index.torrents[DEAD])
+        self.assertEqual(self.index.failing(), [])
+
+        # every torrent of the host reports the failure
+        for tid in self.announcing(DEAD):
+            self.fake.touch(self.fake.torrents[tid])
+        await self.index.refresh()
+        await self.index.refresh()
+        self.assertTrue(health.down)
+        self.assertEqual(health.streak, 2)
+        self.assertEqual(self.index.failing(min_streak=2), [DEAD])
+        summary = {row["host"]: row for row in self.index.summary()}
+        self.assertEqual(summary[DEAD]["torrents"], len(self.announcing(DEAD)))
+
+    async def test_actions(self):
+        await self.index.refresh()
+        ids = await self.index.reannounce(DEAD)
+        self.assertEqual(ids, self.announcing(DEAD))
+        self.assertEqual(self.fake.calls["torrent-reannounce"], 1)
+        moved = await self.index.replace(DEAD, "tracker.example.net:8443")
+        self.assertEqual(moved, ids)
+        self.assertEqual(self.announcing(DEAD), [])
+        self.assertEqual(
+            self.announcing("http://tracker.example.net:8443/announce"), ids
+        )
+        await self.index.refresh()
+        self.assertEqual(self.fake.requests[-1]["arguments"].get("ids"), None)
+        self.assertNotIn(DEAD, self.index.hosts)
+        self.assertEqual(sorted(self.index.torrents["tracker.example.net"]), ids)
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.fake.close()
+
+
+if __name__ == "__main__":
+    unittest.main()